@@ -0,0 +1,38 @@
+"""
+Helpers des notebooks Exo de Récap.
+
+Chaque notebook charge son helper avec, par exemple :
+
+    from helpers import load_etl_helper
+    load_etl_helper()
+
+Les modules ne sont importés qu'au premier appel d'un chargeur, et leurs
+dépendances lourdes (pandas, numpy, ipywidgets...) qu'au premier usage.
+"""
+
+import importlib
+
+_LOADERS = {
+    "load_python_basics_helper": ("python_basics_helper", "load_python_basics_helper"),
+    "load_pandas_helper": ("setup_helper", "load_helper"),
+    "load_etl_helper": ("etl_helper", "load_etl_helper"),
+    "load_sqlite_helper": ("sqlite_helper", "load_sqlite_helper"),
+    "load_docker_helper": ("docker_helper", "load_docker_helper"),
+    "load_mongo_helper": ("mongo_helper", "load_mongo_helper"),
+    "load_api_helper": ("api_helper", "load_api_helper"),
+}
+
+__all__ = sorted(_LOADERS)
+
+
+def __getattr__(name):
+    if name not in _LOADERS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, attribute = _LOADERS[name]
+    loader = getattr(importlib.import_module(f"{__name__}.{module_name}"), attribute)
+    globals()[name] = loader
+    return loader
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,30 @@
+"""
+Imports paresseux pour les modules helpers.
+
+Les dépendances lourdes (pandas, numpy, ipywidgets, IPython, pymongo) ne
+sont importées qu'au premier accès à l'attribut correspondant du module,
+via le __getattr__ de module (PEP 562).
+"""
+
+import importlib
+import sys
+
+
+def lazy_getattr(module_name, imports):
+    """Construit un __getattr__ de module pour la table {nom: 'module[:attribut]'}."""
+
+    def __getattr__(name):
+        target = imports.get(name)
+        if target is None:
+            raise AttributeError(f"module {module_name!r} has no attribute {name!r}")
+        module_path, _, attribute = target.partition(":")
+        value = importlib.import_module(module_path)
+        if attribute:
+            value = getattr(value, attribute)
+        # Mise en cache : les accès suivants ne repassent plus par __getattr__
+        module = sys.modules.get(module_name)
+        if module is not None:
+            setattr(module, name, value)
+        return value
+
+    return __getattr__
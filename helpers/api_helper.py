@@ -3,8 +3,14 @@
 Fournit des aides contextuelles pour l'apprentissage des APIs REST avec FastAPI.
 """
 
-from IPython.display import HTML, display
-import pandas as pd
+from helpers._lazy import lazy_getattr
+
+# pandas et IPython ne sont importés qu'au premier usage
+__getattr__ = lazy_getattr(__name__, {
+    "pd": "pandas",
+    "HTML": "IPython.display:HTML",
+    "display": "IPython.display:display",
+})
 
 class APIHelper:
     def __init__(self):
@@ -37,6 +43,7 @@ class APIHelper:
             self._show_error(section, list(sections.keys()))
 
     def _show_main_help(self):
+        from IPython.display import HTML, display
         display(HTML("""
         <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
                     padding: 20px; border-radius: 10px; color: white; margin: 10px 0;'>
@@ -57,6 +64,7 @@ class APIHelper:
         """))
     
     def _show_error(self, section, available_sections):
+        from IPython.display import HTML, display
         display(HTML(f"""
         <div style='background: #ff6b6b; padding: 15px; border-radius: 8px; color: white; margin: 10px 0;'>
             <h3>❌ Section introuvable</h3>
@@ -67,6 +75,7 @@ class APIHelper:
     
     def _help_7_3_2(self):
         """Aide pour la section 7.3.2 - Middleware et CORS"""
+        from IPython.display import HTML, display
         html_content = """
         <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
                     padding: 20px; border-radius: 10px; color: white; margin: 10px 0;'>
@@ -169,6 +178,7 @@ async def test_middleware():
 
     def _help_7_1_1(self):
         """Aide pour la comparaison des protocoles"""
+        from IPython.display import HTML, display
         html_content = """
         <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
                     padding: 20px; border-radius: 10px; color: white; margin: 10px 0;'>
@@ -186,6 +196,7 @@ async def test_middleware():
 
     def _help_7_1_2(self):
         """Aide pour les principes REST"""
+        from IPython.display import HTML, display
         html_content = """
         <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
                     padding: 20px; border-radius: 10px; color: white; margin: 10px 0;'>
@@ -206,6 +217,7 @@ async def test_middleware():
 
     def _help_7_2_1(self):
         """Aide pour FastAPI basics"""
+        from IPython.display import HTML, display
         html_content = """
         <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
                     padding: 20px; border-radius: 10px; color: white; margin: 10px 0;'>
@@ -226,6 +238,7 @@ async def test_middleware():
 
     def _help_7_2_2(self):
         """Aide pour Pydantic"""
+        from IPython.display import HTML, display
         html_content = """
         <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
                     padding: 20px; border-radius: 10px; color: white; margin: 10px 0;'>
@@ -245,6 +258,7 @@ async def test_middleware():
 
     def _help_7_3_1(self):
         """Aide pour JWT"""
+        from IPython.display import HTML, display
         html_content = """
         <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
                     padding: 20px; border-radius: 10px; color: white; margin: 10px 0;'>
@@ -268,6 +282,7 @@ async def test_middleware():
 
     def _help_7_4_1(self):
         """Aide pour les tests"""
+        from IPython.display import HTML, display
         html_content = """
         <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
                     padding: 20px; border-radius: 10px; color: white; margin: 10px 0;'>
@@ -287,6 +302,7 @@ async def test_middleware():
 
     def _help_7_4_2(self):
         """Aide pour le déploiement"""
+        from IPython.display import HTML, display
         html_content = """
         <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
                     padding: 20px; border-radius: 10px; color: white; margin: 10px 0;'>
@@ -306,6 +322,8 @@ async def test_middleware():
 
     def compare_protocols(self):
         """Fonction de démonstration pour comparer les protocoles API"""
+        import pandas as pd
+        from IPython.display import display
         comparison = pd.DataFrame({
             'Aspect': ['Format', 'Transport', 'Verbes', 'Structure', 'Performance', 
                        'Sécurité', 'Cache', 'Complexité', 'Usage'],
@@ -322,5 +340,20 @@ async def test_middleware():
         display(comparison)
         print("✅ Recommandation : REST pour APIs publiques, GraphQL pour frontends complexes")
 
-# Créer l'instance globale
-api_helper = APIHelper()
\ No newline at end of file
+def load_api_helper():
+    """Charge le système d'aide API et l'expose sous le nom `api_helper`."""
+    from IPython import get_ipython
+    helper = APIHelper()
+    ip = get_ipython()
+    if ip is not None:
+        ip.user_ns['api_helper'] = helper
+    return helper
+
+
+if __name__ == "__main__":
+    # Compatibilité avec exec(open('helpers/api_helper.py').read()) :
+    # le notebook retrouve pd, HTML et display, mais pas le __getattr__ paresseux
+    del __getattr__
+    import pandas as pd
+    from IPython.display import HTML, display
+    api_helper = load_api_helper()
@@ -0,0 +1,345 @@
+"""
+Accès asynchrone à entreprise.db pour les exercices FastAPI (module 7).
+
+sqlite3 est bloquant : appelé directement dans un endpoint `async def`, il
+fige la boucle d'événements pendant toute la requête SQL. AsyncSQLitePool
+exécute les requêtes dans un ThreadPoolExecutor borné dont chaque thread
+garde sa propre connexion (profil PRAGMA "read-heavy" : WAL, les lecteurs
+ne bloquent pas l'écrivain). create_app() sert la table `employes` avec ce
+pool, et run_load_test() mesure les requêtes/s sous uvicorn, par défaut
+sur une base temporaire (entreprise.db n'est pas modifiée) :
+
+    python -m helpers.async_sqlite --requests 2000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from helpers.sqlite_helper import PRAGMA_PROFILES
+
+DB_NAME = "entreprise.db"
+DEPARTEMENTS = ['IT', 'RH', 'Finance', 'Marketing', 'Ventes']
+
+
+def _connect(database, profile="read-heavy"):
+    # check_same_thread=False : la connexion ne sert qu'à son thread, mais
+    # close() est appelé depuis le thread qui ferme le pool
+    conn = sqlite3.connect(database, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    if profile:
+        for name, value in PRAGMA_PROFILES[profile].items():
+            if name != "page_size":
+                conn.execute(f"PRAGMA {name}={value}")
+    return conn
+
+
+class AsyncSQLitePool:
+    """Pool de connexions SQLite servi par un ThreadPoolExecutor de `size` threads.
+
+        async with AsyncSQLitePool("entreprise.db") as pool:
+            rows = await pool.fetchall("SELECT * FROM employes WHERE departement = ?", ("IT",))
+    """
+
+    def __init__(self, database=DB_NAME, size=4, profile="read-heavy"):
+        from concurrent.futures import ThreadPoolExecutor
+        self.database = database
+        self.profile = profile
+        self.size = size
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="sqlite")
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = _connect(self.database, self.profile)
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _call(self, fn, args):
+        return fn(self._connection(), *args)
+
+    async def run(self, fn, *args):
+        """Exécute fn(conn, *args) dans un thread du pool, avec la connexion de ce thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._call, fn, args)
+
+    async def fetchall(self, sql, params=()):
+        return await self.run(_fetchall, sql, params)
+
+    async def fetchone(self, sql, params=()):
+        return await self.run(_fetchone, sql, params)
+
+    async def execute(self, sql, params=()):
+        """Écriture validée ; retourne (rowcount, lastrowid)."""
+        return await self.run(_execute, sql, params)
+
+    async def close(self):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._executor.shutdown)
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+def _fetchall(conn, sql, params):
+    return [dict(row) for row in conn.execute(sql, params).fetchall()]
+
+
+def _fetchone(conn, sql, params):
+    row = conn.execute(sql, params).fetchone()
+    return dict(row) if row is not None else None
+
+
+def _execute(conn, sql, params):
+    with conn:
+        cursor = conn.execute(sql, params)
+    return cursor.rowcount, cursor.lastrowid
+
+
+# Requêtes sur la table employes (schéma de l'étape 4.1.2), partagées par le
+# mode pool et le mode bloquant
+def list_employes(conn, departement=None, limit=100, offset=0):
+    if departement:
+        return _fetchall(conn, "SELECT * FROM employes WHERE departement = ? ORDER BY id LIMIT ? OFFSET ?",
+                         (departement, limit, offset))
+    return _fetchall(conn, "SELECT * FROM employes ORDER BY id LIMIT ? OFFSET ?", (limit, offset))
+
+
+def get_employe(conn, employe_id):
+    return _fetchone(conn, "SELECT * FROM employes WHERE id = ?", (employe_id,))
+
+
+def stats_departements(conn):
+    return _fetchall(conn, "SELECT departement, COUNT(*) AS effectif, AVG(salaire) AS salaire_moyen "
+                           "FROM employes GROUP BY departement ORDER BY departement", ())
+
+
+def create_employe(conn, nom, departement, salaire, date_embauche=None):
+    _, employe_id = _execute(
+        conn, "INSERT INTO employes (nom, departement, salaire, date_embauche) VALUES (?, ?, ?, ?)",
+        (nom, departement, salaire, date_embauche)
+    )
+    return get_employe(conn, employe_id)
+
+
+def delete_employe(conn, employe_id):
+    rowcount, _ = _execute(conn, "DELETE FROM employes WHERE id = ?", (employe_id,))
+    return rowcount > 0
+
+
+def create_app(database=DB_NAME, pool_size=4, blocking=False):
+    """Application FastAPI servant la table employes.
+
+    Par défaut les requêtes passent par un AsyncSQLitePool. blocking=True
+    reproduit l'anti-pattern (sqlite3 appelé directement dans l'endpoint
+    async, sur une connexion partagée) pour comparaison dans run_load_test.
+    """
+    from contextlib import asynccontextmanager
+    from typing import Optional
+    from fastapi import FastAPI, HTTPException
+    from pydantic import BaseModel, Field
+
+    class EmployeCreate(BaseModel):
+        nom: str = Field(..., min_length=2)
+        departement: str = Field(..., min_length=1)
+        salaire: float = Field(..., gt=0)
+        date_embauche: Optional[str] = None
+
+    state = {}
+
+    @asynccontextmanager
+    async def lifespan(app):
+        if blocking:
+            state["conn"] = _connect(database)
+        else:
+            state["pool"] = AsyncSQLitePool(database, pool_size)
+        yield
+        if blocking:
+            state["conn"].close()
+        else:
+            await state["pool"].close()
+
+    async def call(fn, *args):
+        if blocking:
+            return fn(state["conn"], *args)
+        return await state["pool"].run(fn, *args)
+
+    app = FastAPI(title="API Employés", description="Table employes de entreprise.db", lifespan=lifespan)
+
+    @app.get("/employes")
+    async def lister(departement: Optional[str] = None, limit: int = 100, offset: int = 0):
+        return await call(list_employes, departement, min(limit, 1000), offset)
+
+    @app.get("/departements")
+    async def departements():
+        return await call(stats_departements)
+
+    @app.get("/employes/{employe_id}")
+    async def lire(employe_id: int):
+        employe = await call(get_employe, employe_id)
+        if employe is None:
+            raise HTTPException(status_code=404, detail="Employé non trouvé")
+        return employe
+
+    @app.post("/employes", status_code=201)
+    async def creer(employe: EmployeCreate):
+        return await call(create_employe, employe.nom, employe.departement,
+                          employe.salaire, employe.date_embauche)
+
+    @app.delete("/employes/{employe_id}")
+    async def supprimer(employe_id: int):
+        if not await call(delete_employe, employe_id):
+            raise HTTPException(status_code=404, detail="Employé non trouvé")
+        return {"supprime": employe_id}
+
+    return app
+
+
+def ensure_employes(database, rows=10_000, seed=0):
+    """Crée et remplit la table employes si elle est absente ou vide ; retourne la liste de ses id."""
+    conn = sqlite3.connect(database)
+    try:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS employes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                nom TEXT NOT NULL,
+                departement TEXT NOT NULL,
+                salaire REAL NOT NULL,
+                date_embauche DATE
+            )
+        ''')
+        count = conn.execute("SELECT COUNT(*) FROM employes").fetchone()[0]
+        if count == 0:
+            rng = random.Random(seed)
+            conn.executemany(
+                "INSERT INTO employes (nom, departement, salaire, date_embauche) VALUES (?, ?, ?, ?)",
+                [(f"Employé {i}", rng.choice(DEPARTEMENTS), rng.randint(30000, 80000),
+                  f"20{rng.randint(10, 24)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}")
+                 for i in range(rows)]
+            )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_departement ON employes(departement)")
+        conn.commit()
+        return [row[0] for row in conn.execute("SELECT id FROM employes")]
+    finally:
+        conn.close()
+
+
+def run_load_test(database=None, requests=2000, concurrency=50, pool_size=4, blocking=False,
+                  host="127.0.0.1", port=8765, rows=10_000):
+    """Lance l'API sous uvicorn et l'interroge avec `concurrency` clients httpx simultanés.
+
+    La charge mêle lectures par id (tirés parmi les id existants),
+    listes filtrées par département et agrégats par département (un
+    quart des requêtes, un scan complet). database=None : base temporaire
+    de `rows` employés, supprimée ensuite ; une base donnée explicitement
+    est remplie si sa table employes est vide. Retourne requêtes/s,
+    latences p50 / p95 (ms) et nombre d'erreurs.
+    """
+    import httpx
+    import uvicorn
+
+    if database is None:
+        with tempfile.TemporaryDirectory(prefix="async_sqlite_") as tmp:
+            return run_load_test(os.path.join(tmp, DB_NAME), requests, concurrency, pool_size,
+                                 blocking, host, port, rows)
+
+    ids = ensure_employes(database, rows)
+    if not ids:
+        raise ValueError(f"La table employes de {database} est vide")
+    server = uvicorn.Server(uvicorn.Config(
+        create_app(database, pool_size, blocking), host=host, port=port, log_level="warning"
+    ))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError(f"uvicorn n'a pas démarré sur {host}:{port}")
+        time.sleep(0.05)
+
+    latencies = []
+    errors = 0
+    rng = random.Random(1)
+    paths = [
+        "/departements" if i % 4 == 3
+        else f"/employes?departement={rng.choice(DEPARTEMENTS)}&limit=20&offset={rng.randint(0, 500)}"
+        if i % 2 else f"/employes/{rng.choice(ids)}"
+        for i in range(requests)
+    ]
+
+    async def client_loop(client, queue):
+        nonlocal errors
+        while queue:
+            path = queue.pop()
+            start = time.perf_counter()
+            try:
+                response = await client.get(path)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    async def main():
+        queue = list(paths)
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=f"http://{host}:{port}", limits=limits, timeout=60) as client:
+            await asyncio.gather(*(client_loop(client, queue) for _ in range(concurrency)))
+
+    try:
+        start = time.perf_counter()
+        asyncio.run(main())
+        duree = time.perf_counter() - start
+    finally:
+        server.should_exit = True
+        thread.join()
+
+    latencies.sort()
+    return {
+        "mode": "bloquant" if blocking else f"pool ({pool_size} threads)",
+        "requetes": requests,
+        "concurrence": concurrency,
+        "duree_s": round(duree, 2),
+        "requetes_par_s": round(requests / duree, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))] * 1000, 2),
+        "erreurs": errors,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Test de charge de l'API employes sous uvicorn")
+    parser.add_argument("--database", help="base à interroger (défaut : base temporaire)")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+
+    print(f"🚀 {args.requests} requêtes, {args.concurrency} clients simultanés "
+          f"sur {args.database or 'une base temporaire'}")
+    for blocking in (True, False):
+        result = run_load_test(args.database, args.requests, args.concurrency, args.pool_size,
+                               blocking=blocking, port=args.port)
+        print(f"  {result['mode']:<20} {result['requetes_par_s']:>8} req/s   "
+              f"p50 {result['p50_ms']} ms   p95 {result['p95_ms']} ms   erreurs {result['erreurs']}")
+
+
+if __name__ == "__main__":
+    main()
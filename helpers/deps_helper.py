@@ -0,0 +1,200 @@
+"""
+Résolution des dépendances partagée par tous les helpers.
+
+Les versions installées sont lues via importlib.metadata et comparées aux
+versions verrouillées dans requirements.txt, prises comme des minimums :
+une version plus récente déjà installée est gardée, jamais rétrogradée.
+pip n'est lancé qu'une seule fois, pour les seuls paquets manquants ou
+trop anciens, et l'empreinte de l'environnement
+résolu est mise en cache pour que le démarrage suivant ne lance aucun
+sous-processus.
+"""
+
+import hashlib
+import importlib
+import json
+import os
+import re
+import subprocess
+import sys
+from importlib import metadata
+from pathlib import Path
+
+REQUIREMENTS_FILE = Path(__file__).resolve().parent.parent / "requirements.txt"
+CACHE_FILE = Path(__file__).resolve().parent / ".cache" / "deps_fingerprint.json"
+
+_SPEC_RE = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)(\[[^\]]*\])?\s*(.*)$")
+_OPERATORS = ("~=", "==", "!=", ">=", "<=", ">", "<")
+
+
+def _normalize(name):
+    """Normalise un nom de distribution (PEP 503)."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def _split_spec(spec):
+    """Découpe 'pkg[extra]>=1.0' en (nom, extras, contraintes)."""
+    match = _SPEC_RE.match(spec)
+    if not match:
+        raise ValueError(f"Spécification de paquet invalide: {spec!r}")
+    name, extras, constraints = match.groups()
+    return name, extras or "", constraints.strip()
+
+
+def read_requirements(path=REQUIREMENTS_FILE):
+    """Retourne {nom normalisé: spécification} à partir de requirements.txt."""
+    pins = {}
+    try:
+        lines = Path(path).read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return pins
+    for line in lines:
+        line = line.split("#", 1)[0].strip()
+        if not line or line.startswith("-"):
+            continue
+        name, _, _ = _split_spec(line)
+        pins[_normalize(name)] = line
+    return pins
+
+
+def _version_tuple(version):
+    """Extrait la partie numérique d'une version ('2.3.3rc1' -> (2, 3, 3))."""
+    match = re.match(r"\d+(\.\d+)*", version.strip())
+    if not match:
+        return ()
+    return tuple(int(part) for part in match.group(0).split("."))
+
+
+def _compare(installed, operator, wanted):
+    """Compare deux versions en complétant la plus courte par des zéros."""
+    size = max(len(installed), len(wanted))
+    installed = installed + (0,) * (size - len(installed))
+    padded = wanted + (0,) * (size - len(wanted))
+    if operator == "==":
+        return installed == padded
+    if operator == "!=":
+        return installed != padded
+    if operator == ">=":
+        return installed >= padded
+    if operator == "<=":
+        return installed <= padded
+    if operator == ">":
+        return installed > padded
+    if operator == "<":
+        return installed < padded
+    if operator == "~=":
+        prefix = wanted[:-1] if len(wanted) > 1 else wanted
+        return installed >= padded and installed[:len(prefix)] == prefix
+    raise ValueError(f"Opérateur de version inconnu: {operator}")
+
+
+def is_satisfied(spec):
+    """Vrai si la distribution est installée dans une version compatible."""
+    name, _, constraints = _split_spec(spec)
+    try:
+        installed = _version_tuple(metadata.version(name))
+    except metadata.PackageNotFoundError:
+        return False
+    for constraint in filter(None, (c.strip() for c in constraints.split(","))):
+        operator = next((op for op in _OPERATORS if constraint.startswith(op)), None)
+        if operator is None:
+            continue
+        if not _compare(installed, operator, _version_tuple(constraint[len(operator):])):
+            return False
+    return True
+
+
+def _as_minimum(spec):
+    """'pandas==2.3.3' -> 'pandas>=2.3.3' : une version verrouillée sert de minimum."""
+    name, extras, constraints = _split_spec(spec)
+    constraints = ",".join(
+        ">=" + c.strip()[2:] if c.strip().startswith("==") and not c.strip().startswith("===") else c.strip()
+        for c in constraints.split(",")
+    )
+    return f"{name}{extras}{constraints}"
+
+
+def resolve_specs(packages, pins=None):
+    """Remplace chaque paquet demandé par sa version verrouillée, prise comme minimum (>=)."""
+    pins = read_requirements() if pins is None else pins
+    specs = []
+    for package in packages:
+        name, _, _ = _split_spec(package)
+        specs.append(_as_minimum(pins[_normalize(name)]) if _normalize(name) in pins else package)
+    return specs
+
+
+def _site_dirs():
+    """Répertoires d'installation dont la date change à chaque pip install."""
+    dirs = set()
+    for entry in sys.path:
+        if entry and os.path.basename(entry) in ("site-packages", "dist-packages"):
+            dirs.add(entry)
+    return sorted(d for d in dirs if os.path.isdir(d))
+
+
+def environment_fingerprint(specs):
+    """Empreinte de l'interpréteur, des contraintes et des site-packages."""
+    digest = hashlib.sha256()
+    digest.update(sys.executable.encode())
+    digest.update(sys.version.encode())
+    for spec in sorted(specs):
+        digest.update(spec.encode())
+    for directory in _site_dirs():
+        digest.update(directory.encode())
+        digest.update(str(os.stat(directory).st_mtime_ns).encode())
+    return digest.hexdigest()
+
+
+def _load_cache():
+    try:
+        return set(json.loads(CACHE_FILE.read_text(encoding="utf-8")).get("fingerprints", []))
+    except (OSError, ValueError):
+        return set()
+
+
+def _save_cache(fingerprint):
+    fingerprints = _load_cache()
+    fingerprints.add(fingerprint)
+    try:
+        CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        CACHE_FILE.write_text(json.dumps({"fingerprints": sorted(fingerprints)}), encoding="utf-8")
+    except OSError:
+        pass
+
+
+def ensure_packages(packages, install=True):
+    """Installe en un seul appel pip les paquets absents ou trop anciens (voir resolve_specs).
+
+    Retourne la liste des spécifications qui manquaient (vide si tout était
+    déjà satisfait). Avec install=False, se contente de les signaler.
+    """
+    specs = resolve_specs(packages)
+    fingerprint = environment_fingerprint(specs)
+    if fingerprint in _load_cache():
+        print("✅ Environnement déjà vérifié, aucune installation nécessaire.")
+        return []
+
+    missing = [spec for spec in specs if not is_satisfied(spec)]
+    if not missing:
+        print("✅ Tous les packages sont déjà installés.")
+        _save_cache(fingerprint)
+        return []
+
+    if not install:
+        print(f"⚠️ Packages manquants: {', '.join(missing)}")
+        return missing
+
+    print(f"📦 Installation de: {', '.join(missing)}")
+    try:
+        subprocess.check_call([sys.executable, "-m", "pip", "install", "--quiet", *missing])
+    except subprocess.CalledProcessError:
+        print(f"❌ Erreur lors de l'installation de {', '.join(missing)}.")
+        return missing
+
+    # pip modifie les site-packages : l'empreinte doit être recalculée
+    importlib.invalidate_caches()
+    _save_cache(environment_fingerprint(specs))
+    for spec in missing:
+        print(f"✅ {spec} installé.")
+    return missing
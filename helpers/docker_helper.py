@@ -1,27 +1,27 @@
 import subprocess
 import os
+import sys
 
-# Détection sécurisée de Jupyter (si disponible)
-try:
-    from IPython.display import HTML, display
-    from IPython import get_ipython
-    JUPYTER_AVAILABLE = get_ipython() is not None
-except Exception:
-    JUPYTER_AVAILABLE = False
 
-    # Fallback minimal pour l'affichage en mode console
-    class HTML:
-        def __init__(self, data):
-            self.data = data
+def _jupyter_available():
+    """Détecte un noyau Jupyter sans importer IPython s'il ne l'est pas déjà."""
+    ipython = sys.modules.get("IPython")
+    try:
+        return ipython is not None and ipython.get_ipython() is not None
+    except Exception:
+        return False
+
 
-    def display(html_obj):
-        # En mode console, on n'affiche pas le HTML
-        print()  # noop placeholder
+# Détection sécurisée de Jupyter (IPython n'est importé qu'à l'affichage)
+JUPYTER_AVAILABLE = _jupyter_available()
 
 
 def install_docker_packages():
     """Informer sur les dépendances nécessaires (ne pas forcer d'installations)."""
-    print("📝 Vérifiez que 'ipywidgets' et 'requests' sont installés dans votre environnement Jupyter si vous utilisez l'interface HTML.")
+    from helpers.deps_helper import ensure_packages
+    missing = ensure_packages(["ipywidgets", "requests", "docker"], install=False)
+    if missing:
+        print("📝 Installez-les avec: pip install -r requirements.txt")
     print("� Note: Docker lui-même doit être installé séparément (Docker Desktop).")
 
 class DockerHelper:
@@ -147,6 +147,7 @@ except Exception as e:
         help_data = self.helps[step]
         
         if JUPYTER_AVAILABLE:
+            from IPython.display import HTML, display
             # Mode Jupyter avec HTML
             # Conseil caché
             html_hint = f"""
@@ -188,6 +189,7 @@ except Exception as e:
     
     def success(self, message):
         if JUPYTER_AVAILABLE:
+            from IPython.display import HTML, display
             html = self.success_style.format(message=message)
             display(HTML(html))
         else:
@@ -206,27 +208,31 @@ except Exception as e:
         except Exception as e:
             return False, str(e)
 
-# Initialisation automatique
-install_docker_packages()
+def load_docker_helper(force_reload=True):
+    """Charge le système d'aide Docker. Si force_reload=True, remplace l'instance existante."""
+    install_docker_packages()
+
+    if not JUPYTER_AVAILABLE:
+        # Mode console - créer directement l'instance helper
+        print("🐳 Système d'aide Docker chargé (mode console)")
+        print("✨ Utilisez helper.help('5.1.1') pour obtenir de l'aide")
+        return DockerHelper()
 
-if JUPYTER_AVAILABLE:
     # Mode Jupyter: forcer le rechargement de l'instance helper dans user_ns
-    def load_docker_helper(force_reload=True):
-        """Charge le système d'aide Docker. Si force_reload=True, remplace l'instance existante."""
-        try:
-            if force_reload or 'helper' not in get_ipython().user_ns:
-                get_ipython().user_ns['helper'] = DockerHelper()
-                print("🐳 Système d'aide Docker chargé (Jupyter) !")
-                print("✨ Prêt pour la conteneurisation !")
-            else:
-                print("✅ Le système d'aide Docker est déjà chargé.")
-        except Exception as e:
-            print(f"❌ Erreur lors du chargement: {e}")
-
-    # Charger en écrasant l'ancienne instance si nécessaire
-    load_docker_helper(force_reload=True)
-else:
-    # Mode console - créer directement l'instance helper
-    helper = DockerHelper()
-    print("🐳 Système d'aide Docker chargé (mode console)")
-    print("✨ Utilisez helper.help('5.1.1') pour obtenir de l'aide")
\ No newline at end of file
+    from IPython import get_ipython
+    try:
+        if force_reload or 'helper' not in get_ipython().user_ns:
+            get_ipython().user_ns['helper'] = DockerHelper()
+            print("🐳 Système d'aide Docker chargé (Jupyter) !")
+            print("✨ Prêt pour la conteneurisation !")
+        else:
+            print("✅ Le système d'aide Docker est déjà chargé.")
+    except Exception as e:
+        print(f"❌ Erreur lors du chargement: {e}")
+    return get_ipython().user_ns.get('helper')
+
+
+if __name__ == "__main__":
+    # Compatibilité avec exec(open("helpers/docker_helper.py").read()) :
+    # charger en écrasant l'ancienne instance si nécessaire
+    helper = load_docker_helper(force_reload=True)
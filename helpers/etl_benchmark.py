@@ -0,0 +1,245 @@
+"""
+Benchmark des solutions ETL (module 3) à plusieurs échelles de données.
+
+Les données sont générées par ETLHelper.create_sample_data (graine fixe)
+dans un dossier temporaire, puis chaque étape Extract / Transform / Load de
+la solution 3.4.1 et le pipeline_etl complet sont chronométrés. Les étapes
+3.1.1 à 3.3.2 utilisent des colonnes absentes des données générées (prix,
+email, client_id) : elles sont mesurées à travers leurs équivalents 3.4.1.
+
+Tout tourne hors ligne. Le code de sortie vaut 1 si une mesure dépasse la
+référence (--baseline) de plus de la tolérance :
+
+    python -m helpers.etl_benchmark --scales 1e3 1e5 --save-baseline bench.json
+    python -m helpers.etl_benchmark --scales 1e3 1e5 --baseline bench.json --tolerance 0.25
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+from helpers.etl_helper import ETLHelper, ETLMetrics, transform_clients, transform_ventes
+
+SCALES = (1_000, 100_000, 10_000_000)
+SEED = 42
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_MEMORY_TOLERANCE = 0.25
+# En dessous de ce temps, les écarts relèvent du bruit de mesure
+MIN_SECONDS = 0.005
+
+
+def _extract_ventes(state):
+    import pandas as pd
+    state['df_ventes'] = pd.read_csv('data_etl/ventes.csv')
+    return len(state['df_ventes'])
+
+
+def _extract_clients(state):
+    import pandas as pd
+    with open('data_etl/clients.json', 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    state['df_clients'] = pd.DataFrame(data['clients'])
+    return len(state['df_clients'])
+
+
+def _transform_ventes(state):
+    state['df_ventes_clean'] = transform_ventes(state['df_ventes'])
+    return len(state['df_ventes_clean'])
+
+
+def _transform_clients(state):
+    state['df_clients_clean'] = transform_clients(state['df_clients'])
+    return len(state['df_clients_clean'])
+
+
+def _load_ventes(state):
+    state['df_ventes_clean'].to_csv('data_etl/ventes_clean.csv', index=False)
+    return len(state['df_ventes_clean'])
+
+
+def _load_clients(state):
+    state['df_clients_clean'].to_csv('data_etl/clients_clean.csv', index=False)
+    return len(state['df_clients_clean'])
+
+
+def _pipeline_etl(state):
+    metriques = state['pipeline_etl']()
+    return metriques['ventes_lues'] + metriques['clients_lus']
+
+
+# Étapes enchaînées dans l'ordre : chacune lit l'état laissé par la précédente
+STEPS = [
+    ('extract_ventes', _extract_ventes),
+    ('extract_clients', _extract_clients),
+    ('transform_ventes', _transform_ventes),
+    ('transform_clients', _transform_clients),
+    ('load_ventes', _load_ventes),
+    ('load_clients', _load_clients),
+    ('pipeline_etl', _pipeline_etl),
+]
+
+
+def _compile_pipeline(helper):
+    """Compile la fonction pipeline_etl de la solution 3.4.1."""
+    import numpy as np
+    import pandas as pd
+    namespace = {'pd': pd, 'np': np, 'json': json, 'datetime': datetime}
+    exec(helper.helps['3.4.1']['solution'], namespace)
+    return namespace['pipeline_etl']
+
+
+@contextlib.contextmanager
+def _working_dir(path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def run_scale(rows, repeat=None, clients=None):
+    """Mesure toutes les étapes sur `rows` ventes ; renvoie une liste de résultats."""
+    repeat = repeat or (5 if rows <= 100_000 else 1)
+    clients = clients or max(50, rows // 100)
+    timings = {name: [] for name, _ in STEPS}
+    with tempfile.TemporaryDirectory(prefix='etl_bench_') as tmp, _working_dir(tmp):
+        with contextlib.redirect_stdout(io.StringIO()):
+            helper = ETLHelper()
+            helper.create_sample_data(rows=rows, clients=clients, seed=SEED)
+        state = {'pipeline_etl': _compile_pipeline(helper)}
+        for _ in range(repeat):
+            metrics = ETLMetrics()
+            for name, step in STEPS:
+                with contextlib.redirect_stdout(io.StringIO()), metrics.stage(name) as run:
+                    run.rows_in = run.rows_out = step(state)
+            for record in metrics.records():
+                timings[record['etape']].append(record)
+            state = {'pipeline_etl': state['pipeline_etl']}
+
+    results = []
+    for name, records in timings.items():
+        durees = [r['duree_s'] for r in records]
+        mediane = statistics.median(durees)
+        lignes = records[0]['lignes_sortie']
+        rss = [r['pic_rss_octets'] for r in records if r['pic_rss_octets'] is not None]
+        results.append({
+            'echelle': rows,
+            'etape': name,
+            'repetitions': len(records),
+            'duree_mediane_s': round(mediane, 6),
+            'duree_min_s': round(min(durees), 6),
+            'cpu_median_s': round(statistics.median(r['cpu_s'] for r in records), 6),
+            'lignes': lignes,
+            'lignes_par_s': round(lignes / mediane, 1) if mediane else None,
+            'pic_rss_octets': max(rss) if rss else None,
+        })
+    return results
+
+
+def environment():
+    import numpy as np
+    import pandas as pd
+    return {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def run_benchmark(scales=SCALES, repeat=None):
+    results = []
+    for rows in scales:
+        print(f"⏱️ Échelle {rows:,} lignes...")
+        results.extend(run_scale(rows, repeat))
+    return {'date': datetime.now().isoformat(), 'environnement': environment(), 'resultats': results}
+
+
+def compare(report, baseline, tolerance=DEFAULT_TOLERANCE, memory_tolerance=DEFAULT_MEMORY_TOLERANCE):
+    """Liste des régressions (temps médian ou pic RSS) par rapport à la référence."""
+    reference = {(r['echelle'], r['etape']): r for r in baseline['resultats']}
+    regressions = []
+    for result in report['resultats']:
+        base = reference.get((result['echelle'], result['etape']))
+        if base is None:
+            continue
+        duree, duree_ref = result['duree_mediane_s'], base['duree_mediane_s']
+        if duree > MIN_SECONDS and duree > duree_ref * (1 + tolerance):
+            regressions.append({**_key(result), 'mesure': 'duree_mediane_s',
+                                'reference': duree_ref, 'actuel': duree})
+        rss, rss_ref = result['pic_rss_octets'], base['pic_rss_octets']
+        if rss and rss_ref and rss > rss_ref * (1 + memory_tolerance):
+            regressions.append({**_key(result), 'mesure': 'pic_rss_octets',
+                                'reference': rss_ref, 'actuel': rss})
+    return regressions
+
+
+def _key(result):
+    return {'echelle': result['echelle'], 'etape': result['etape']}
+
+
+def print_report(report):
+    print(f"{'Échelle':>12} {'Étape':<18}{'Médiane (s)':>13}{'Lignes/s':>14}{'Pic RSS (Mo)':>14}")
+    for r in report['resultats']:
+        debit = f"{r['lignes_par_s']:.0f}" if r['lignes_par_s'] else '-'
+        rss = f"{r['pic_rss_octets'] / 2**20:.1f}" if r['pic_rss_octets'] else '-'
+        print(f"{r['echelle']:>12,} {r['etape']:<18}{r['duree_mediane_s']:>13.4f}{debit:>14}{rss:>14}")
+
+
+def _scale(value):
+    return int(float(value))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark des solutions ETL à plusieurs échelles")
+    parser.add_argument('--scales', nargs='+', type=_scale, default=list(SCALES),
+                        help="nombres de lignes de ventes (ex. 1e3 1e5 1e7)")
+    parser.add_argument('--repeat', type=int, default=None,
+                        help="répétitions par échelle (défaut : 5 jusqu'à 1e5, puis 1)")
+    parser.add_argument('--output', help="fichier JSON lines où ajouter les résultats")
+    parser.add_argument('--baseline', help="rapport de référence à comparer")
+    parser.add_argument('--save-baseline', help="enregistre ce rapport comme référence")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="ralentissement relatif toléré (0.25 = +25 %%)")
+    parser.add_argument('--memory-tolerance', type=float, default=DEFAULT_MEMORY_TOLERANCE,
+                        help="hausse relative tolérée du pic RSS")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.scales, args.repeat)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'a', encoding='utf-8') as f:
+            for result in report['resultats']:
+                f.write(json.dumps({'date': report['date'], **report['environnement'], **result}) + '\n')
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps(report, indent=2), encoding='utf-8')
+        print(f"💾 Référence enregistrée: {args.save_baseline}")
+    if not args.baseline:
+        return 0
+
+    baseline = json.loads(Path(args.baseline).read_text(encoding='utf-8'))
+    if baseline.get('environnement') != report['environnement']:
+        print("⚠️ Environnement différent de celui de la référence, comparaison indicative.")
+    regressions = compare(report, baseline, args.tolerance, args.memory_tolerance)
+    for r in regressions:
+        print(f"❌ Régression {r['echelle']:,} / {r['etape']} : {r['mesure']} "
+              f"{r['reference']} → {r['actuel']}")
+    if regressions:
+        return 1
+    print("✅ Aucune régression par rapport à la référence.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
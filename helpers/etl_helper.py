@@ -1,16 +1,26 @@
-import subprocess
-import sys
-import ipywidgets as widgets
-import pandas as pd
-import numpy as np
+import hashlib
 import json
 import csv
+import math
 import os
-import random
+import re
+import shutil
+import sys
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from pathlib import Path
-from IPython.display import HTML, display
-from IPython import get_ipython
+
+from helpers._lazy import lazy_getattr
+
+# pandas, numpy, ipywidgets et IPython ne sont importés qu'au premier usage
+__getattr__ = lazy_getattr(__name__, {
+    "pd": "pandas",
+    "np": "numpy",
+    "widgets": "ipywidgets",
+    "HTML": "IPython.display:HTML",
+    "display": "IPython.display:display",
+    "get_ipython": "IPython:get_ipython",
+})
 
 def install_etl_packages():
     """Installe les packages nécessaires pour le notebook ETL."""
@@ -20,18 +30,15 @@ def install_etl_packages():
         "ipywidgets>=7.6.0",
         "requests>=2.28.0",
         "openpyxl>=3.0.0",
-        "xlsxwriter>=3.0.0"
+        "xlsxwriter>=3.0.0",
+        "pyarrow>=14.0.0"
     ]
     
     print("🚀 Démarrage de l'installation des packages ETL...")
     print("Cette opération peut prendre quelques instants.")
     
-    for package in packages:
-        try:
-            subprocess.check_call([sys.executable, "-m", "pip", "install", package, "--quiet"])
-            print(f"✅ {package} installé.")
-        except subprocess.CalledProcessError:
-            print(f"❌ Erreur lors de l'installation de {package}.")
+    from helpers.deps_helper import ensure_packages
+    ensure_packages(packages)
             
     print("\\n✨ Installation terminée !")
 
@@ -203,6 +210,7 @@ print(f"📊 {len(df_final)} enregistrements dans le fichier final")""",
             print(f"❌ Aide non trouvée pour l'étape {step}")
             return
             
+        from IPython.display import HTML, display
         help_data = self.helps[step]
         
         # Conseil caché
@@ -234,6 +242,7 @@ print(f"📊 {len(df_final)} enregistrements dans le fichier final")""",
         display(HTML(html_solution))
     
     def solution(self, code, explanation=""):
+        from IPython.display import HTML, display
         html = f"""
         <details style="margin: 10px 0; border: 1px solid #ddd; border-radius: 5px; padding: 5px;">
             <summary style="cursor: pointer; background: #fff3e0; padding: 10px; border-radius: 3px; font-weight: bold;">
@@ -248,6 +257,7 @@ print(f"📊 {len(df_final)} enregistrements dans le fichier final")""",
         display(HTML(html))
     
     def hint(self, text):
+        from IPython.display import HTML, display
         html = f"""
         <details style="margin: 10px 0; border: 1px solid #ddd; border-radius: 5px; padding: 5px;">
             <summary style="cursor: pointer; background: #fff3e0; padding: 10px; border-radius: 3px; font-weight: bold;">
@@ -261,51 +271,1348 @@ print(f"📊 {len(df_final)} enregistrements dans le fichier final")""",
         display(HTML(html))
     
     def success(self, message):
+        from IPython.display import HTML, display
         html = self.success_style.format(message=message)
         display(HTML(html))
         
-    def create_sample_data(self):
-        """Crée des fichiers de données d'exemple pour les exercices"""
-        # CSV des ventes
-        sales_data = {
-            'date': [f"2024-{random.randint(1,12):02d}-{random.randint(1,28):02d}" for _ in range(100)],
-            'produit': [random.choice(['Laptop', 'Mouse', 'Keyboard', 'Monitor', 'Phone']) for _ in range(100)],
-            'quantite': [random.randint(1, 10) for _ in range(100)],
-            'prix_unitaire': [round(random.uniform(10, 1000), 2) for _ in range(100)],
-            'vendeur': [random.choice(['Alice', 'Bob', 'Charlie', 'Diana', 'Eve']) for _ in range(100)]
+    def create_sample_data(self, rows=100, clients=50, seed=None, chunksize=1_000_000,
+                           file_format="csv", compression=None):
+        """Crée des fichiers de données d'exemple pour les exercices.
+
+        Les données sont tirées de façon vectorisée (numpy.random.Generator) et
+        écrites bloc par bloc de `chunksize` lignes : la mémoire reste bornée
+        même pour des millions de lignes. `seed` rend la génération
+        reproductible. Avec file_format="parquet" ou "feather", écrit
+        ventes.<format> et clients.<format> (compression snappy, zstd...)
+        au lieu de ventes.csv et clients.json.
+        """
+        import numpy as np
+
+        if file_format not in ("csv", "parquet", "feather"):
+            raise ValueError(f"Format non supporté: {file_format!r} (csv, parquet ou feather)")
+        rng = np.random.default_rng(seed)
+
+        # Ventes
+        ventes_chunks = (
+            _sample_ventes(rng, min(chunksize, rows - start))
+            for start in range(0, rows, chunksize)
+        )
+        if file_format == "csv":
+            _write_csv_chunks(ventes_chunks, self.data_dir / 'ventes.csv')
+        else:
+            with DatasetWriter(self.data_dir / f'ventes.{file_format}', compression=compression) as writer:
+                for chunk in ventes_chunks:
+                    writer.write(chunk)
+
+        # Clients
+        clients_chunks = (
+            _sample_clients(rng, start + 1, min(chunksize, clients - start))
+            for start in range(0, clients, chunksize)
+        )
+        if file_format == "csv":
+            _write_clients_json_chunks(clients_chunks, self.data_dir / 'clients.json')
+        else:
+            with DatasetWriter(self.data_dir / f'clients.{file_format}', compression=compression) as writer:
+                for chunk in clients_chunks:
+                    writer.write(chunk)
+
+        return True
+
+
+# Valeurs tirées par create_sample_data
+PRODUITS = ['Laptop', 'Mouse', 'Keyboard', 'Monitor', 'Phone']
+VENDEURS = ['Alice', 'Bob', 'Charlie', 'Diana', 'Eve']
+NOMS = ['Martin', 'Dubois', 'Moreau', 'Laurent', 'Bernard']
+PRENOMS = ['Jean', 'Marie', 'Pierre', 'Sophie', 'Nicolas']
+VILLES = ['Paris', 'Lyon', 'Marseille', 'Toulouse', 'Nice']
+# Jours 1 à 28 de chaque mois de 2024, dans l'ordre chronologique
+DATES_2024 = [f"2024-{mois:02d}-{jour:02d}" for mois in range(1, 13) for jour in range(1, 29)]
+
+
+def _categorical(rng, values, n):
+    """Tire n valeurs uniformément parmi `values`, en dtype category."""
+    import pandas as pd
+    return pd.Categorical.from_codes(rng.integers(0, len(values), n), categories=values)
+
+
+def _sample_ventes(rng, n):
+    """Génère un bloc de n ventes (date, produit, quantite, prix_unitaire, vendeur)."""
+    import numpy as np
+    import pandas as pd
+    return pd.DataFrame({
+        'date': _categorical(rng, DATES_2024, n),
+        'produit': _categorical(rng, PRODUITS, n),
+        'quantite': rng.integers(1, 11, n, dtype=np.int16),
+        'prix_unitaire': np.round(rng.uniform(10, 1000, n), 2),
+        'vendeur': _categorical(rng, VENDEURS, n),
+    })
+
+
+def _sample_clients(rng, first_id, n):
+    """Génère un bloc de n clients dont les id commencent à first_id."""
+    import numpy as np
+    import pandas as pd
+    ids = pd.Series(np.arange(first_id, first_id + n, dtype=np.int64))
+    return pd.DataFrame({
+        'id': ids,
+        'nom': _categorical(rng, NOMS, n),
+        'prenom': _categorical(rng, PRENOMS, n),
+        'email': "client" + ids.astype(str) + "@email.com",
+        'age': rng.integers(18, 71, n, dtype=np.int16),
+        'ville': _categorical(rng, VILLES, n),
+    })
+
+
+def _write_csv_chunks(chunks, path):
+    """Écrit les blocs à la suite dans un seul CSV (en-tête sur le premier bloc).
+
+    Utilise le writer CSV de pyarrow s'il est installé (environ 5x plus rapide
+    que DataFrame.to_csv), sinon pandas.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+    except ImportError:
+        pa = None
+
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for i, chunk in enumerate(chunks):
+            if pa is None:
+                chunk.to_csv(f, index=False, header=(i == 0))
+                continue
+            if i == 0:
+                f.write(','.join(chunk.columns) + '\n')
+            f.flush()
+            # Les valeurs générées ne contiennent ni virgule ni guillemet
+            pa_csv.write_csv(
+                pa.Table.from_pandas(chunk, preserve_index=False),
+                f.buffer,
+                write_options=pa_csv.WriteOptions(include_header=False, quoting_style="none"),
+            )
+
+
+def _write_clients_json_chunks(chunks, path):
+    """Écrit {"clients": [...]} bloc par bloc, un client par ligne."""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{\n  "clients": [\n')
+        first = True
+        for chunk in chunks:
+            if chunk.empty:
+                continue
+            records = chunk.to_json(orient='records', lines=True, force_ascii=False).strip().split('\n')
+            f.write(('' if first else ',\n') + ',\n'.join('    ' + r for r in records))
+            first = False
+        f.write('\n  ]\n}\n')
+
+
+# Régions utilisées par la transformation des clients (solution 3.4.1)
+MAPPING_REGION = {
+    'Paris': 'Nord', 'Lyon': 'Nord',
+    'Marseille': 'Sud', 'Nice': 'Sud', 'Toulouse': 'Sud'
+}
+
+# Types explicites des sorties de la phase LOAD pour les formats colonnes.
+# Une liste = catégorie à modalités fixes (même dictionnaire pour tous les blocs)
+VENTES_CLEAN_DTYPES = {
+    'produit': 'category', 'quantite': 'int32', 'prix_unitaire': 'float64',
+    'vendeur': 'category', 'montant_total': 'float64', 'mois': 'int8',
+    'categorie_prix': ['Économique', 'Moyen', 'Premium'],
+}
+CLIENTS_CLEAN_DTYPES = {
+    'id': 'int64', 'nom': 'category', 'prenom': 'category', 'age': 'int16',
+    'ville': 'category', 'tranche_age': ['Jeune', 'Adulte', 'Senior'],
+    'region': sorted(set(MAPPING_REGION.values())),
+}
+
+LOAD_FORMATS = ('csv', 'parquet', 'feather')
+# Dossier des lignes dont la clé de partition manque (convention Hive/Arrow)
+HIVE_NULL_PARTITION = '__HIVE_DEFAULT_PARTITION__'
+
+
+class _CsvFile:
+    """Fichier CSV ouvert en écriture, en-tête sur le premier bloc."""
+
+    def __init__(self, path):
+        self.file = open(path, 'w', encoding='utf-8', newline='')
+        self.header = True
+
+    def write(self, df):
+        df.to_csv(self.file, index=False, header=self.header)
+        self.header = False
+
+    def close(self):
+        self.file.close()
+
+
+class _ArrowFile:
+    """Fichier Parquet (row groups) ou Feather v2 (record batches) ouvert en écriture."""
+
+    def __init__(self, path, file_format, compression):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise ImportError(f"Le format {file_format} nécessite pyarrow (pip install pyarrow)") from e
+        self.path = path
+        self.file_format = file_format
+        self.compression = compression
+        self.schema = None
+        self.writer = None
+
+    def write(self, df):
+        import pyarrow as pa
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self.writer is None:
+            self.schema = table.schema
+            if self.file_format == 'parquet':
+                import pyarrow.parquet as pq
+                self.writer = pq.ParquetWriter(self.path, self.schema, compression=self.compression or 'snappy')
+            else:
+                options = pa.ipc.IpcWriteOptions(compression=self.compression)
+                self.writer = pa.ipc.new_file(str(self.path), self.schema, options=options)
+        elif table.schema != self.schema:
+            table = table.cast(self.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+class DatasetWriter:
+    """Phase LOAD : écrit des blocs successifs de DataFrame dans un même jeu de données.
+
+    file_format : 'csv', 'parquet' ou 'feather' (déduit de l'extension par
+    défaut). compression : 'snappy' (défaut parquet), 'zstd', 'lz4'... pour
+    les formats colonnes. dtypes : types appliqués avant écriture (colonnes
+    absentes ignorées) ; une liste de valeurs donne une catégorie à modalités
+    fixes. Feather n'accepte qu'un dictionnaire par colonne pour tout le
+    fichier : une colonne 'category' sans modalités fixes y est écrite en
+    texte. partition_by : colonne(s) de partitionnement, écrites en
+    sous-dossiers col=valeur/part-0.<format> sous `path` (valeur manquante :
+    __HIVE_DEFAULT_PARTITION__).
+    """
+
+    def __init__(self, path, file_format=None, compression=None, dtypes=None, partition_by=None):
+        self.path = Path(path)
+        self.file_format = file_format or self.path.suffix.lstrip('.') or 'csv'
+        if self.file_format not in LOAD_FORMATS:
+            raise ValueError(f"Format non supporté: {self.file_format!r} ({', '.join(LOAD_FORMATS)})")
+        if compression and self.file_format == 'csv':
+            raise ValueError("La compression n'est proposée que pour parquet et feather")
+        self.compression = compression
+        self.dtypes = dtypes or {}
+        if isinstance(partition_by, str):
+            partition_by = [partition_by]
+        self.partition_by = list(partition_by or [])
+        self.rows = 0
+        self._files = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _file(self, path):
+        if path not in self._files:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if self.file_format == 'csv':
+                self._files[path] = _CsvFile(path)
+            else:
+                self._files[path] = _ArrowFile(path, self.file_format, self.compression)
+        return self._files[path]
+
+    def _dtype(self, dtype):
+        import pandas as pd
+        if isinstance(dtype, (list, tuple)):
+            return pd.CategoricalDtype(list(dtype))
+        if isinstance(dtype, str) and dtype == 'category' and self.file_format == 'feather':
+            # Chaque bloc aurait son propre dictionnaire : refusé par le format IPC
+            return object
+        return dtype
+
+    def write(self, df):
+        import pandas as pd
+        dtypes = {c: self._dtype(t) for c, t in self.dtypes.items() if c in df.columns}
+        if dtypes:
+            df = df.astype(dtypes)
+        if not self.partition_by:
+            self._file(self.path).write(df)
+        else:
+            if not self._files and self.path.is_dir():
+                # Nouvelle écriture : ne pas mélanger avec les partitions d'un run précédent
+                shutil.rmtree(self.path)
+            for key, part in df.groupby(self.partition_by, observed=True, sort=True, dropna=False):
+                key = key if isinstance(key, tuple) else (key,)
+                directory = self.path.joinpath(*(
+                    f"{c}={HIVE_NULL_PARTITION if pd.isna(v) else v}" for c, v in zip(self.partition_by, key)
+                ))
+                self._file(directory / f"part-0.{self.file_format}").write(part.drop(columns=self.partition_by))
+        self.rows += len(df)
+
+    def close(self):
+        for file in self._files.values():
+            file.close()
+        self._files = {}
+
+
+def save_dataframe(df, path, file_format=None, compression=None, dtypes=None, partition_by=None):
+    """Écrit un DataFrame en une fois (CSV, Parquet ou Feather) ; voir DatasetWriter."""
+    with DatasetWriter(path, file_format, compression, dtypes, partition_by) as writer:
+        writer.write(df)
+    return writer.path
+
+
+def _clear_outputs(data_dir, name):
+    """Supprime la sortie `name` d'un run précédent, dans tous les formats et partitionnements.
+
+    Un run qui change de format ou de partition_by ne laisse ainsi pas
+    d'ancien ventes_clean.* à côté du nouveau.
+    """
+    base = Path(data_dir) / name
+    if base.is_dir():
+        shutil.rmtree(base)
+    for file_format in LOAD_FORMATS:
+        base.with_name(f"{name}.{file_format}").unlink(missing_ok=True)
+
+
+def _output_writer(data_dir, name, output_format, compression, partition_by, dtypes):
+    """Writer d'une sortie du pipeline ; partition_by n'est appliqué qu'aux tables ayant cette colonne."""
+    partition = [c for c in ([partition_by] if isinstance(partition_by, str) else partition_by or [])
+                 if c in dtypes]
+    _clear_outputs(data_dir, name)
+    return DatasetWriter(
+        Path(data_dir) / (name if partition else f"{name}.{output_format}"),
+        file_format=output_format,
+        compression=compression,
+        # CSV : types inférés, comme la solution de référence
+        dtypes=None if output_format == 'csv' else dtypes,
+        partition_by=partition,
+    )
+
+
+
+def transform_ventes(df_ventes):
+    """Transformation des ventes de la solution 3.4.1 (date, montant_total, mois, categorie_prix)."""
+    import numpy as np
+    import pandas as pd
+    df_ventes_clean = df_ventes.copy()
+    df_ventes_clean['date'] = pd.to_datetime(df_ventes_clean['date'])
+    quantite = df_ventes_clean['quantite']
+    if quantite.dtype.kind == 'i':
+        # Les types compacts (int8, int16) déborderaient au produit
+        quantite = quantite.astype('int64')
+    df_ventes_clean['montant_total'] = quantite * df_ventes_clean['prix_unitaire']
+    df_ventes_clean['mois'] = df_ventes_clean['date'].dt.month
+    df_ventes_clean['categorie_prix'] = np.where(
+        df_ventes_clean['prix_unitaire'] < 50, 'Économique',
+        np.where(df_ventes_clean['prix_unitaire'] < 200, 'Moyen', 'Premium')
+    )
+    return df_ventes_clean
+
+
+def transform_clients(df_clients):
+    """Transformation des clients de la solution 3.4.1 (nom_complet, tranche_age, region)."""
+    import numpy as np
+    df_clients_clean = df_clients.copy()
+    df_clients_clean['nom_complet'] = df_clients_clean['prenom'] + " " + df_clients_clean['nom']
+    df_clients_clean['tranche_age'] = np.where(
+        df_clients_clean['age'] < 30, 'Jeune',
+        np.where(df_clients_clean['age'] < 50, 'Adulte', 'Senior')
+    )
+    df_clients_clean['region'] = df_clients_clean['ville'].map(MAPPING_REGION)
+    return df_clients_clean
+
+
+def iter_json_records(path, chunksize, key='clients'):
+    """Lit le tableau `key` d'un fichier {"clients": [...]} par blocs de DataFrames.
+
+    Le fichier est décodé objet par objet (json.JSONDecoder.raw_decode) :
+    seul le bloc courant est gardé en mémoire, quel que soit le formatage.
+    """
+    import pandas as pd
+    for records in _iter_json_lists(path, chunksize, key):
+        yield pd.DataFrame(records)
+
+
+def _iter_json_lists(path, chunksize, key):
+    """Comme iter_json_records, mais par listes de dicts bruts."""
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = ''
+        eof = False
+
+        def fill():
+            nonlocal buffer, eof
+            block = f.read(1 << 20)
+            eof = not block
+            buffer += block
+
+        # Se placer juste après le '[' qui suit la clé
+        while True:
+            start = buffer.find(f'"{key}"')
+            bracket = buffer.find('[', start) if start >= 0 else -1
+            if bracket >= 0:
+                buffer = buffer[bracket + 1:]
+                break
+            if eof:
+                raise ValueError(f"Clé '{key}' introuvable dans {path}")
+            fill()
+
+        separators = re.compile(r'[\s,]*')
+        records = []
+        pos = 0
+        while True:
+            pos = separators.match(buffer, pos).end()
+            if buffer.startswith(']', pos):
+                break
+            try:
+                record, pos = decoder.raw_decode(buffer, pos)
+            except ValueError:
+                if eof:
+                    raise
+                # Objet coupé en fin de buffer : compacter puis relire
+                buffer, pos = buffer[pos:], 0
+                fill()
+                continue
+            records.append(record)
+            if len(records) == chunksize:
+                yield records
+                records = []
+        if records:
+            yield records
+
+
+# Schéma de types compacts persisté à côté des données (ventes.csv -> ventes.schema.json)
+SCHEMA_SUFFIX = '.schema.json'
+
+
+def schema_path(path):
+    path = Path(path)
+    return path.with_name(path.stem + SCHEMA_SUFFIX)
+
+
+def _smallest_int(lo, hi):
+    """Plus petit entier signé contenant [lo, hi] (signé : pas de surprise aux soustractions)."""
+    import numpy as np
+    for name in ('int8', 'int16', 'int32'):
+        info = np.iinfo(name)
+        if info.min <= lo and hi <= info.max:
+            return name
+    return 'int64'
+
+
+def _float32_exact(values):
+    """Vrai si toutes les valeurs survivent à un aller-retour float32."""
+    import numpy as np
+    values = values[~np.isnan(values)]
+    with np.errstate(over='ignore'):
+        return bool(np.array_equal(values.astype(np.float32).astype(np.float64), values))
+
+
+def _looks_like_dates(series):
+    import pandas as pd
+    values = series.dropna()
+    if values.empty:
+        return False
+    first = values.iloc[0]
+    if not isinstance(first, str) or pd.isna(pd.to_datetime(first, errors='coerce')):
+        return False
+    parsed = pd.to_datetime(values, errors='coerce', format='ISO8601')
+    return bool(parsed.notna().all())
+
+
+def _column_kind(series):
+    import pandas as pd
+    if pd.api.types.is_bool_dtype(series):
+        return 'autre'
+    if pd.api.types.is_integer_dtype(series):
+        return 'int'
+    if pd.api.types.is_float_dtype(series):
+        return 'float'
+    if pd.api.types.is_string_dtype(series):
+        return 'texte'
+    return 'autre'
+
+
+def _update_column_stats(stats, series, max_categories):
+    """Cumule les statistiques d'un bloc de colonne (plage, exactitude float32, valeurs, dates)."""
+    import numpy as np
+    stats['lignes'] += len(series)
+    stats['non_nuls'] += int(series.notna().sum())
+    stats['octets_avant'] += int(series.memory_usage(deep=True, index=False))
+    kind = _column_kind(series)
+
+    previous = stats['type']
+    if previous is None:
+        stats['type'] = kind
+    elif previous != kind:
+        # Un bloc sans décimales après un bloc qui en a (ou l'inverse) : on passe en float
+        if {previous, kind} == {'int', 'float'}:
+            if previous == 'int' and stats['min'] is not None:
+                stats['float32'] = max(abs(stats['min']), abs(stats['max'])) <= 2 ** 24
+            stats['type'] = 'float'
+        else:
+            stats['type'] = 'autre'
+
+    if stats['type'] in ('int', 'float') and series.notna().any():
+        lo, hi = series.min(), series.max()
+        stats['min'] = lo if stats['min'] is None else min(stats['min'], lo)
+        stats['max'] = hi if stats['max'] is None else max(stats['max'], hi)
+    if stats['type'] == 'float' and stats['float32']:
+        stats['float32'] = _float32_exact(series.to_numpy(dtype=np.float64))
+    if stats['type'] == 'texte':
+        if stats['valeurs'] is not None:
+            stats['valeurs'].update(series.dropna().unique().tolist())
+            if len(stats['valeurs']) > max_categories:
+                stats['valeurs'] = None
+        if stats['dates']:
+            stats['dates'] = _looks_like_dates(series)
+
+
+def _column_schema(stats, category_ratio):
+    """Choisit le type compact d'une colonne et calcule sa taille en mémoire une fois convertie."""
+    import numpy as np
+    import pandas as pd
+    n = stats['lignes']
+    kind = stats['type']
+    if kind == 'int' and stats['min'] is not None:
+        dtype = _smallest_int(int(stats['min']), int(stats['max']))
+        return {'dtype': dtype}, n * np.dtype(dtype).itemsize
+    if kind == 'float':
+        dtype = 'float32' if stats['float32'] else 'float64'
+        return {'dtype': dtype}, n * np.dtype(dtype).itemsize
+    if kind == 'texte' and stats['dates']:
+        return {'dtype': 'datetime'}, n * 8
+    if kind == 'texte' and stats['valeurs'] is not None \
+            and len(stats['valeurs']) <= category_ratio * max(stats['non_nuls'], 1):
+        categories = sorted(stats['valeurs'])
+        codes = pd.Categorical([], categories=categories).codes
+        size = n * codes.dtype.itemsize
+        size += int(pd.Index(categories, dtype=object).memory_usage(deep=True))
+        return {'dtype': 'category', 'categories': categories}, size
+    return None, stats['octets_avant']
+
+
+def infer_csv_schema(path, chunksize=100_000, category_ratio=0.5, max_categories=10_000):
+    """Infère un schéma de types compacts pour un CSV, en une passe par blocs.
+
+    Entiers réduits au plus petit type signé, floats en float32 quand c'est
+    sans perte, textes ISO 8601 en dates, textes peu variés (au plus
+    category_ratio valeurs distinctes par ligne) en catégories. Le schéma
+    contient aussi l'empreinte du fichier source et, par colonne, les octets
+    en mémoire avant / après.
+    """
+    import pandas as pd
+    path = Path(path)
+    stats = {}
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        for column in chunk.columns:
+            column_stats = stats.setdefault(column, {
+                'type': None, 'lignes': 0, 'non_nuls': 0, 'octets_avant': 0,
+                'min': None, 'max': None, 'float32': True, 'valeurs': set(), 'dates': True,
+            })
+            _update_column_stats(column_stats, chunk[column], max_categories)
+
+    colonnes = {}
+    rapport = {}
+    for column, column_stats in stats.items():
+        spec, octets_apres = _column_schema(column_stats, category_ratio)
+        if spec is not None:
+            colonnes[column] = spec
+        rapport[column] = {
+            'octets_avant': column_stats['octets_avant'],
+            'octets_apres': octets_apres,
+            'octets_economises': column_stats['octets_avant'] - octets_apres,
         }
-        
-        sales_df = pd.DataFrame(sales_data)
-        sales_df.to_csv(self.data_dir / 'ventes.csv', index=False)
-        
-        # JSON des clients
-        clients_data = {
-            'clients': [
-                {
-                    'id': i,
-                    'nom': random.choice(['Martin', 'Dubois', 'Moreau', 'Laurent', 'Bernard']),
-                    'prenom': random.choice(['Jean', 'Marie', 'Pierre', 'Sophie', 'Nicolas']),
-                    'email': f"client{i}@email.com",
-                    'age': random.randint(18, 70),
-                    'ville': random.choice(['Paris', 'Lyon', 'Marseille', 'Toulouse', 'Nice'])
-                }
-                for i in range(1, 51)
-            ]
+    stat = path.stat()
+    return {
+        'source': {'fichier': path.name, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns},
+        'colonnes': colonnes,
+        'rapport': rapport,
+    }
+
+
+def load_csv_schema(path, chunksize=100_000, refresh=False):
+    """Schéma persisté de `path`, réinféré (et réécrit) si le fichier a changé."""
+    path = Path(path)
+    target = schema_path(path)
+    stat = path.stat()
+    if not refresh:
+        try:
+            with open(target, 'r', encoding='utf-8') as f:
+                schema = json.load(f)
+            source = schema['source']
+            if source['size'] == stat.st_size and source['mtime_ns'] == stat.st_mtime_ns:
+                return schema
+        except (OSError, ValueError, KeyError):
+            pass
+    schema = infer_csv_schema(path, chunksize)
+    with open(target, 'w', encoding='utf-8') as f:
+        json.dump(schema, f, ensure_ascii=False, indent=2)
+    return schema
+
+
+def _read_csv_kwargs(schema):
+    import pandas as pd
+    dtype = {}
+    parse_dates = []
+    for column, spec in schema['colonnes'].items():
+        if spec['dtype'] == 'datetime':
+            parse_dates.append(column)
+        elif spec['dtype'] == 'category':
+            dtype[column] = pd.CategoricalDtype(spec['categories'])
+        else:
+            dtype[column] = spec['dtype']
+    return {'dtype': dtype, 'parse_dates': parse_dates}
+
+
+def read_csv_compact(path, chunksize=None, schema=None, **kwargs):
+    """pd.read_csv avec les types compacts du schéma persisté (inféré au besoin)."""
+    import pandas as pd
+    schema = schema or load_csv_schema(path)
+    return pd.read_csv(path, chunksize=chunksize, **_read_csv_kwargs(schema), **kwargs)
+
+
+def dtype_report(schema):
+    """DataFrame des octets économisés par colonne, avec une ligne TOTAL."""
+    import pandas as pd
+    rows = []
+    for column, sizes in schema['rapport'].items():
+        spec = schema['colonnes'].get(column)
+        rows.append({'colonne': column, 'type': spec['dtype'] if spec else 'inchangé', **sizes})
+    report = pd.DataFrame(rows)
+    total = report[['octets_avant', 'octets_apres', 'octets_economises']].sum()
+    report.loc[len(report)] = {'colonne': 'TOTAL', 'type': '', **total.to_dict()}
+    return report
+
+
+def _reset_peak_rss():
+    """Remet à zéro le pic RSS du processus (Linux ≥ 4.0), sinon ne fait rien."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def _peak_rss():
+    """Pic de mémoire résidente du processus en octets (None si indisponible)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss est en kilo-octets sous Linux, en octets sous macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _cpu_seconds():
+    """Temps CPU (user + système) du processus et de ses enfants terminés."""
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+class _StageRun:
+    """Compteurs d'une exécution d'étape, renseignés dans le bloc `with`."""
+
+    def __init__(self, rows_in):
+        self.rows_in = rows_in
+        self.rows_out = rows_in
+
+
+class ETLMetrics:
+    """Instrumentation des étapes Extract / Transform / Load.
+
+    Chaque étape mesure le temps réel, le temps CPU (workers compris une fois
+    le pool fermé), le pic RSS du processus et les lignes en entrée / sortie.
+    trace_memory=True ajoute le pic des allocations Python (tracemalloc), au
+    prix d'un fort ralentissement des étapes qui allouent beaucoup. Une
+    étape rouverte sous le même nom (un bloc de plus en streaming) cumule ses
+    mesures. Les étapes ne doivent pas être imbriquées.
+
+        metrics = ETLMetrics(trace_memory=True)
+        pipeline_etl_streaming(metrics=metrics)
+        metrics.export_jsonl('data_etl/etl_metrics.jsonl', pipeline='streaming')
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stages = {}
+        self._tracing = False
+
+    def _record(self, name):
+        if name not in self.stages:
+            self.stages[name] = {
+                'etape': name,
+                'appels': 0,
+                'duree_s': 0.0,
+                'cpu_s': 0.0,
+                'lignes_entree': 0,
+                'lignes_sortie': 0,
+                'pic_tracemalloc_octets': None,
+                'pic_rss_octets': None,
+            }
+        return self.stages[name]
+
+    @contextmanager
+    def stage(self, name, rows_in=0):
+        """Mesure le bloc `with`; fixer `run.rows_out` si la sortie diffère de l'entrée."""
+        import time
+        import tracemalloc
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            mem_start = tracemalloc.get_traced_memory()[0]
+        _reset_peak_rss()
+        run = _StageRun(rows_in)
+        wall_start = time.perf_counter()
+        cpu_start = _cpu_seconds()
+        try:
+            yield run
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = _cpu_seconds() - cpu_start
+            record = self._record(name)
+            record['appels'] += 1
+            record['duree_s'] += wall
+            record['cpu_s'] += cpu
+            record['lignes_entree'] += run.rows_in
+            record['lignes_sortie'] += run.rows_out
+            if tracing:
+                peak = tracemalloc.get_traced_memory()[1] - mem_start
+                record['pic_tracemalloc_octets'] = max(record['pic_tracemalloc_octets'] or 0, peak)
+            rss = _peak_rss()
+            if rss is not None:
+                record['pic_rss_octets'] = max(record['pic_rss_octets'] or 0, rss)
+
+    def iter_stage(self, name, iterable):
+        """Itère sur des blocs DataFrame en comptant chaque lecture dans l'étape `name`."""
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name) as run:
+                chunk = next(iterator, None)
+                if chunk is not None:
+                    run.rows_in = run.rows_out = len(chunk)
+            if chunk is None:
+                return
+            yield chunk
+
+    def stop(self):
+        """Arrête tracemalloc s'il a été démarré par cette instance."""
+        import tracemalloc
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+    def records(self):
+        """Liste des étapes, dans l'ordre d'apparition, avec le débit en lignes/s."""
+        records = []
+        for record in self.stages.values():
+            record = dict(record)
+            rows = record['lignes_sortie'] or record['lignes_entree']
+            record['duree_s'] = round(record['duree_s'], 6)
+            record['cpu_s'] = round(record['cpu_s'], 6)
+            record['lignes_par_s'] = round(rows / record['duree_s'], 1) if record['duree_s'] else None
+            records.append(record)
+        return records
+
+    def to_dataframe(self):
+        import pandas as pd
+        return pd.DataFrame(self.records())
+
+    def export_jsonl(self, path, **context):
+        """Ajoute une ligne JSON par étape (avec horodatage et `context`) à `path`."""
+        horodatage = datetime.now().isoformat()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            for record in self.records():
+                line = {'horodatage': horodatage, **context, **record}
+                f.write(json.dumps(line, ensure_ascii=False) + '\n')
+        return path
+
+    def summary(self):
+        """Affiche un tableau récapitulatif des étapes."""
+        print(f"{'Étape':<20}{'Durée (s)':>11}{'CPU (s)':>10}{'Lignes':>12}{'Lignes/s':>13}{'Pic RSS (Mo)':>14}")
+        for r in self.records():
+            rss = f"{r['pic_rss_octets'] / 2**20:.1f}" if r['pic_rss_octets'] else '-'
+            debit = f"{r['lignes_par_s']:.0f}" if r['lignes_par_s'] else '-'
+            print(f"{r['etape']:<20}{r['duree_s']:>11.3f}{r['cpu_s']:>10.3f}"
+                  f"{r['lignes_sortie']:>12}{debit:>13}{rss:>14}")
+
+
+def pipeline_etl_streaming(data_dir='data_etl', chunksize=100_000, output_format='csv',
+                           compression=None, partition_by=None, metrics=None, compact_dtypes=False):
+    """Pipeline ETL 3.4.1 en flux, à mémoire constante.
+
+    ventes.csv est lu par blocs (pd.read_csv(chunksize=...)) et clients.json
+    objet par objet ; chaque bloc est transformé comme dans la solution de
+    référence puis ajouté à ventes_clean / clients_clean (output_format :
+    csv, parquet ou feather ; partition_by : 'mois' ou 'region'). Le rapport
+    (total, nombre, moyenne) est calculé à partir d'agrégats cumulés.
+    Les mesures par étape sont ajoutées à `metrics` (un ETLMetrics).
+    compact_dtypes=True lit ventes.csv avec les types compacts de
+    ventes.schema.json (inféré au premier run, voir infer_csv_schema).
+    """
+    import time
+    import pandas as pd
+    start_time = time.time()
+    data_dir = Path(data_dir)
+    metrics = metrics or ETLMetrics()
+    schema = None
+    if compact_dtypes:
+        with metrics.stage('schema_ventes'):
+            schema = load_csv_schema(data_dir / 'ventes.csv', chunksize)
+    print("🏭 DÉMARRAGE PIPELINE ETL (streaming)")
+    print("="*30)
+
+    # 📥 EXTRACT → 🔄 TRANSFORM → 💾 LOAD, bloc par bloc
+    print(f"🔄 Ventes par blocs de {chunksize} lignes...")
+    ventes_lues = 0
+    nb_transactions = 0
+    montants_blocs = []
+    nb_blocs = 0
+    with _output_writer(data_dir, 'ventes_clean', output_format, compression,
+                        partition_by, VENTES_CLEAN_DTYPES) as out:
+        if schema:
+            reader = read_csv_compact(data_dir / 'ventes.csv', chunksize, schema)
+        else:
+            reader = pd.read_csv(data_dir / 'ventes.csv', chunksize=chunksize)
+        for chunk in metrics.iter_stage('extract_ventes', reader):
+            with metrics.stage('transform_ventes', len(chunk)) as run:
+                chunk_clean = transform_ventes(chunk)
+                run.rows_out = len(chunk_clean)
+            with metrics.stage('load_ventes', len(chunk_clean)):
+                out.write(chunk_clean)
+            ventes_lues += len(chunk)
+            nb_transactions += len(chunk_clean)
+            # Somme compensée : fsum par bloc puis sur les totaux des blocs ; chaque
+            # total de bloc est arrondi, le résultat peut donc varier au dernier
+            # chiffre selon chunksize
+            montants_blocs.append(math.fsum(chunk_clean['montant_total']))
+            nb_blocs += 1
+
+    print(f"🔄 Clients par blocs de {chunksize} lignes...")
+    clients_lus = 0
+    clients_transformes = 0
+    with _output_writer(data_dir, 'clients_clean', output_format, compression,
+                        partition_by, CLIENTS_CLEAN_DTYPES) as out:
+        reader = iter_json_records(data_dir / 'clients.json', chunksize)
+        for chunk in metrics.iter_stage('extract_clients', reader):
+            with metrics.stage('transform_clients', len(chunk)) as run:
+                chunk_clean = transform_clients(chunk)
+                run.rows_out = len(chunk_clean)
+            with metrics.stage('load_clients', len(chunk_clean)):
+                out.write(chunk_clean)
+            clients_lus += len(chunk)
+            clients_transformes += len(chunk_clean)
+
+    print("💾 Rapport...")
+    with metrics.stage('load_rapport'):
+        total_ventes = math.fsum(montants_blocs)
+        rapport_ventes = {
+            'total_ventes': total_ventes,
+            'nb_transactions': nb_transactions,
+            # None plutôt que NaN, que json.dump écrirait en JSON invalide
+            'vente_moyenne': total_ventes / nb_transactions if nb_transactions else None,
+            'date_rapport': datetime.now().isoformat()
         }
-        
-        with open(self.data_dir / 'clients.json', 'w', encoding='utf-8') as f:
-            json.dump(clients_data, f, ensure_ascii=False, indent=2)
-        
-        return True
+        with open(data_dir / 'rapport_ventes.json', 'w', encoding='utf-8') as f:
+            json.dump(rapport_ventes, f, ensure_ascii=False, indent=2)
+    metrics.stop()
+
+    # 📊 Métriques
+    duree = time.time() - start_time
+    metriques = {
+        'ventes_lues': ventes_lues,
+        'clients_lus': clients_lus,
+        'ventes_transformees': nb_transactions,
+        'clients_transformes': clients_transformes,
+        'fichiers_crees': 3,
+        'blocs': nb_blocs,
+        'duree': round(duree, 2),
+        'octets_economises': sum(c['octets_economises'] for c in schema['rapport'].values()) if schema else 0,
+        'etapes': metrics.records()
+    }
+
+    print(f"✅ PIPELINE TERMINÉ en {duree:.2f}s")
+    return metriques
+
+
+def _csv_partitions(path, parts):
+    """Découpe un CSV en au plus `parts` plages d'octets alignées sur des débuts de ligne.
+
+    Retourne (colonnes de l'en-tête, [(début, fin), ...]). Suppose qu'aucun
+    champ ne contient de saut de ligne, ce qui est le cas de ventes.csv.
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        header = f.readline()
+        data_start = f.tell()
+        bounds = [data_start]
+        for i in range(1, parts):
+            target = data_start + (size - data_start) * i // parts
+            if target <= bounds[-1]:
+                continue
+            # Avancer jusqu'au début de la ligne suivante
+            f.seek(target - 1)
+            f.readline()
+            if bounds[-1] < f.tell() < size:
+                bounds.append(f.tell())
+        bounds.append(size)
+    names = next(csv.reader([header.decode('utf-8')]))
+    return names, [(a, b) for a, b in zip(bounds[:-1], bounds[1:]) if a < b]
+
+
+def _transform_partition(kind, source, dtype=None, as_csv=True):
+    """Tâche d'un worker : lit/transforme une partition et la formate en CSV sans en-tête.
+
+    Avec as_csv=False, le DataFrame transformé est renvoyé tel quel (formats colonnes).
+    """
+    import io
+    import pandas as pd
+    if kind == 'ventes':
+        path, start, end, names = source
+        with open(path, 'rb') as f:
+            f.seek(start)
+            raw = f.read(end - start)
+        df = pd.read_csv(io.BytesIO(raw), names=names, header=None, dtype=dtype)
+        df_clean = transform_ventes(df)
+        montants = df_clean['montant_total'].to_numpy()
+    else:
+        df = source if dtype is None else source.astype(dtype)
+        df_clean = transform_clients(df)
+        montants = None
+    return {
+        'dtypes': dict(df.dtypes),
+        'columns': list(df_clean.columns),
+        'rows_in': len(df),
+        'rows_out': len(df_clean),
+        'csv': df_clean.to_csv(index=False, header=False) if as_csv else None,
+        'frame': None if as_csv else df_clean,
+        'montants': montants,
+    }
+
+
+def _common_dtypes(dtype_maps):
+    """Types que pandas aurait inférés sur le fichier entier, à partir des types par partition."""
+    import numpy as np
+    from pandas.api.types import is_bool_dtype, is_numeric_dtype
+    common = {}
+    for column in dtype_maps[0]:
+        types = list({d[column] for d in dtype_maps})
+        if len(types) == 1:
+            common[column] = types[0]
+        elif all(is_numeric_dtype(t) and not is_bool_dtype(t) for t in types):
+            common[column] = np.result_type(*types)
+        else:
+            common[column] = object
+    return common
+
+
+def _run_partitions(executor, kind, sources, as_csv=True):
+    """Exécute les partitions dans le pool et renvoie leurs résultats dans l'ordre.
+
+    Une partition dont les types inférés diffèrent de ceux du fichier entier
+    (ex. prix tous entiers dans une partition) est relue avec les types
+    communs, pour produire exactement la même sortie que la version série.
+    """
+    n = len(sources)
+    results = list(executor.map(_transform_partition, [kind] * n, sources, [None] * n, [as_csv] * n))
+    if not results:
+        return results
+    common = _common_dtypes([r['dtypes'] for r in results])
+    retry = [i for i, r in enumerate(results) if r['dtypes'] != common]
+    for i, result in zip(retry, executor.map(_transform_partition, [kind] * len(retry),
+                                             [sources[i] for i in retry], [common] * len(retry),
+                                             [as_csv] * len(retry))):
+        results[i] = result
+    return results
+
+
+def _write_partitions(results, writer):
+    """Fusionne dans l'ordre les résultats des workers dans le writer de sortie."""
+    if not results or results[0]['csv'] is None:
+        for result in results:
+            writer.write(result['frame'])
+        return
+    # CSV déjà formaté par les workers : simple concaténation
+    with open(writer.path, 'w', encoding='utf-8', newline='') as f:
+        f.write(','.join(results[0]['columns']) + '\n')
+        for result in results:
+            f.write(result['csv'])
+
+
+def pipeline_etl_parallel(data_dir='data_etl', workers=None, partitions=None, chunksize=100_000,
+                          output_format='csv', compression=None, partition_by=None, metrics=None):
+    """Pipeline ETL 3.4.1 dont la phase TRANSFORM tourne sur plusieurs cœurs.
+
+    ventes.csv est découpé en plages de lignes (par défaut 4 par worker) lues
+    et transformées dans un ProcessPoolExecutor ; les clients sont envoyés
+    aux workers par blocs de `chunksize`. Les résultats sont fusionnés dans
+    l'ordre : les fichiers produits sont identiques à ceux de la version série.
+    Les options de sortie sont celles de pipeline_etl_streaming. La lecture
+    de ventes.csv ayant lieu dans les workers, elle est mesurée avec la
+    transformation (étape 'extract_transform').
+    """
+    import time
+    from concurrent.futures import ProcessPoolExecutor
+    import numpy as np
+    import pandas as pd
+    start_time = time.time()
+    data_dir = Path(data_dir)
+    metrics = metrics or ETLMetrics()
+    workers = workers or os.cpu_count() or 1
+    partitions = partitions or workers * 4
+    print(f"🏭 DÉMARRAGE PIPELINE ETL ({workers} workers)")
+    print("="*30)
+
+    # 📥 EXTRACT (clients) dans le processus principal
+    clients_chunks = list(metrics.iter_stage(
+        'extract_clients', iter_json_records(data_dir / 'clients.json', chunksize)
+    ))
+
+    with metrics.stage('extract_transform') as run:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # 📥 EXTRACT + 🔄 TRANSFORM dans les workers
+            print("🔄 Phase TRANSFORM (ventes)...")
+            ventes_path = data_dir / 'ventes.csv'
+            as_csv = output_format == 'csv' and not partition_by
+            names, ranges = _csv_partitions(ventes_path, partitions)
+            ventes = _run_partitions(
+                executor, 'ventes', [(str(ventes_path), a, b, names) for a, b in ranges], as_csv
+            )
+
+            print("🔄 Phase TRANSFORM (clients)...")
+            clients = _run_partitions(executor, 'clients', clients_chunks, as_csv)
+        run.rows_in = sum(r['rows_in'] for r in ventes + clients)
+        run.rows_out = sum(r['rows_out'] for r in ventes + clients)
+
+    # 💾 LOAD
+    print("💾 Phase LOAD...")
+    with metrics.stage('load_ventes', sum(r['rows_out'] for r in ventes)):
+        with _output_writer(data_dir, 'ventes_clean', output_format, compression,
+                            partition_by, VENTES_CLEAN_DTYPES) as writer:
+            _write_partitions(ventes, writer)
+    with metrics.stage('load_clients', sum(r['rows_out'] for r in clients)):
+        with _output_writer(data_dir, 'clients_clean', output_format, compression,
+                            partition_by, CLIENTS_CLEAN_DTYPES) as writer:
+            _write_partitions(clients, writer)
+
+    with metrics.stage('load_rapport'):
+        montants = pd.Series(np.concatenate([r['montants'] for r in ventes]) if ventes else [], dtype=float)
+        rapport_ventes = {
+            'total_ventes': float(montants.sum()),
+            'nb_transactions': int(len(montants)),
+            'vente_moyenne': float(montants.mean()) if len(montants) else None,
+            'date_rapport': datetime.now().isoformat()
+        }
+        with open(data_dir / 'rapport_ventes.json', 'w', encoding='utf-8') as f:
+            json.dump(rapport_ventes, f, ensure_ascii=False, indent=2)
+    metrics.stop()
+
+    # 📊 Métriques
+    duree = time.time() - start_time
+    metriques = {
+        'ventes_lues': sum(r['rows_in'] for r in ventes),
+        'clients_lus': sum(r['rows_in'] for r in clients),
+        'ventes_transformees': sum(r['rows_out'] for r in ventes),
+        'clients_transformes': sum(r['rows_out'] for r in clients),
+        'fichiers_crees': 3,
+        'workers': workers,
+        'partitions': len(ventes),
+        'duree': round(duree, 2),
+        'etapes': metrics.records()
+    }
+
+    print(f"✅ PIPELINE TERMINÉ en {duree:.2f}s")
+    return metriques
+
+
+# Manifeste des runs incrémentaux, écrit dans le dossier de données
+MANIFEST_NAME = 'etl_manifest.json'
+# Graine des données d'exemple de load_etl_helper : mêmes fichiers d'une
+# session à l'autre, le pipeline incrémental n'a pas à tout reconstruire
+SAMPLE_SEED = 42
+
+
+def _hash_file(path, hasher=None, start=0, limit=None):
+    """Met à jour (ou crée) un sha256 avec les octets [start, limit) du fichier."""
+    hasher = hasher or hashlib.sha256()
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = None if limit is None else limit - start
+        while remaining is None or remaining > 0:
+            block = f.read(1 << 20 if remaining is None else min(1 << 20, remaining))
+            if not block:
+                break
+            hasher.update(block)
+            if remaining is not None:
+                remaining -= len(block)
+    return hasher
+
+
+def _load_manifest(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _plan_ventes(path, state):
+    """Choisit le mode de traitement de ventes.csv d'après le manifeste.
+
+    Retourne (mode, hasher) : 'complet' (premier run), 'inchangé' (taille et
+    mtime identiques), 'ajout' (l'ancien contenu est un préfixe du fichier :
+    seules les lignes après l'offset sont lues) ou 'réécrit' (contenu
+    modifié ailleurs qu'en fin de fichier : la sortie est reconstruite).
+    `hasher` contient déjà le sha256 du préfixe en mode 'ajout'.
+    """
+    stat = path.stat()
+    if not state:
+        return 'complet', None
+    if stat.st_size == state['size'] and stat.st_mtime_ns == state['mtime_ns']:
+        return 'inchangé', None
+    if stat.st_size >= state['offset']:
+        hasher = _hash_file(path, limit=state['offset'])
+        if hasher.hexdigest() == state['sha256']:
+            return 'ajout', hasher
+    return 'réécrit', None
+
+
+def _is_new_client(record, max_id):
+    client_id = record.get('id')
+    return max_id is None or (isinstance(client_id, (int, float)) and client_id > max_id)
+
+
+def _plan_clients(path, state, chunksize):
+    """Choisit le mode de traitement de clients.json d'après le manifeste.
+
+    Le JSON est toujours réécrit en entier : c'est un 'ajout' si les
+    enregistrements jusqu'au watermark (id max) sont identiques, dans le même
+    ordre, à ceux du run précédent, sinon 'réécrit'. Retourne (mode,
+    empreinte des enregistrements, id max) ; empreinte et id max valent None
+    en mode 'inchangé'.
+    """
+    stat = path.stat()
+    if state and stat.st_size == state['size'] and stat.st_mtime_ns == state['mtime_ns']:
+        return 'inchangé', None, None
+    if state and _hash_file(path).hexdigest() == state['sha256']:
+        return 'inchangé', None, None
+    max_id = state.get('watermark') if state else None
+    anciens = hashlib.sha256()
+    tous = hashlib.sha256()
+    new_max_id = max_id
+    for records in _iter_json_lists(path, chunksize, 'clients'):
+        for record in records:
+            line = json.dumps(record, sort_keys=True, ensure_ascii=False).encode('utf-8') + b'\n'
+            tous.update(line)
+            if not _is_new_client(record, max_id):
+                anciens.update(line)
+            client_id = record.get('id')
+            if isinstance(client_id, (int, float)) and (new_max_id is None or client_id > new_max_id):
+                new_max_id = client_id
+    if not state:
+        mode = 'complet'
+    elif anciens.hexdigest() == state.get('sha256_lignes'):
+        mode = 'ajout'
+    else:
+        mode = 'réécrit'
+    return mode, tous.hexdigest(), new_max_id
+
+
+def _write_manifest(path, manifest):
+    """Écriture atomique : le manifeste valide le run (fichier temporaire + os.replace)."""
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def pipeline_etl_incremental(data_dir='data_etl', chunksize=100_000, full=False, metrics=None):
+    """Pipeline ETL 3.4.1 incrémental et idempotent.
+
+    Un manifeste (data_etl/etl_manifest.json) garde pour chaque entrée son
+    sha256, sa taille, son mtime et un high-watermark : l'offset en octets
+    déjà traité de ventes.csv (une date max écarterait les ventes ajoutées
+    en retard avec une date ancienne) et l'id max de clients.json. Une
+    entrée inchangée n'est pas relue ; si elle n'a reçu que des lignes en
+    fin de fichier, seules celles-ci sont transformées
+    puis ajoutées à ventes_clean.csv / clients_clean.csv, et
+    rapport_ventes.json est mis à jour à partir des totaux cumulés. Une
+    entrée réécrite autrement est retraitée en entier, comme avec full=True.
+
+    Le manifeste sert de point de validation : il est supprimé avant toute
+    écriture des sorties et réécrit atomiquement à la fin. Un run interrompu
+    entre les deux est donc suivi d'une reconstruction complète, jamais de
+    lignes en double. Les mesures par étape sont ajoutées à `metrics` (un
+    ETLMetrics).
+    """
+    import time
+    import pandas as pd
+    start_time = time.time()
+    data_dir = Path(data_dir)
+    manifest_path = data_dir / MANIFEST_NAME
+    ventes_out = data_dir / 'ventes_clean.csv'
+    clients_out = data_dir / 'clients_clean.csv'
+    metrics = metrics or ETLMetrics()
+    manifest = {} if full else _load_manifest(manifest_path)
+    if not (ventes_out.exists() and clients_out.exists()):
+        manifest = {}
+    print("🏭 DÉMARRAGE PIPELINE ETL (incrémental)")
+    print("="*30)
+
+    ventes_path = data_dir / 'ventes.csv'
+    clients_path = data_dir / 'clients.json'
+    state_ventes = manifest.get('ventes', {})
+    state_clients = manifest.get('clients', {})
+    mode_ventes, hasher = _plan_ventes(ventes_path, state_ventes)
+    mode_clients, empreinte_clients, new_max_id = _plan_clients(clients_path, state_clients, chunksize)
+    print(f"🔄 Ventes : {mode_ventes}")
+    print(f"🔄 Clients : {mode_clients}")
+    if mode_ventes != 'inchangé' or mode_clients != 'inchangé':
+        # Sorties bientôt modifiées : plus de manifeste valide jusqu'à la fin du run
+        manifest_path.unlink(missing_ok=True)
+
+    # 🔄 Ventes : seules les lignes nouvelles sont lues et transformées
+    rapport = manifest.get('rapport', {'total_ventes': 0.0, 'nb_transactions': 0})
+    ventes_lues = 0
+    ventes_transformees = 0
+    montants_blocs = []
+    if mode_ventes != 'inchangé':
+        if mode_ventes != 'ajout':
+            rapport = {'total_ventes': 0.0, 'nb_transactions': 0}
+            _clear_outputs(data_dir, 'ventes_clean')
+        with open(ventes_path, 'rb') as f, \
+                open(ventes_out, 'a' if mode_ventes == 'ajout' else 'w', encoding='utf-8', newline='') as out:
+            names = next(csv.reader([f.readline().decode('utf-8')]))
+            if mode_ventes == 'ajout':
+                f.seek(state_ventes['offset'])
+            header = mode_ventes != 'ajout'
+            reader = pd.read_csv(f, names=names, header=None, chunksize=chunksize)
+            for chunk in metrics.iter_stage('extract_ventes', reader):
+                ventes_lues += len(chunk)
+                with metrics.stage('transform_ventes', len(chunk)) as run:
+                    chunk_clean = transform_ventes(chunk)
+                    run.rows_out = len(chunk_clean)
+                if chunk_clean.empty:
+                    continue
+                with metrics.stage('load_ventes', len(chunk_clean)):
+                    chunk_clean.to_csv(out, index=False, header=header)
+                header = False
+                ventes_transformees += len(chunk_clean)
+                montants_blocs.append(math.fsum(chunk_clean['montant_total']))
+                rapport['nb_transactions'] += len(chunk_clean)
+        # Somme compensée des totaux de blocs (arrondis chacun par fsum) : peut
+        # différer au dernier chiffre d'un traitement complet en un seul bloc
+        rapport['total_ventes'] = math.fsum([rapport['total_ventes'], *montants_blocs])
+        if hasher is None:
+            hasher = _hash_file(ventes_path)
+        else:
+            hasher = _hash_file(ventes_path, hasher, start=state_ventes['offset'])
+        stat = ventes_path.stat()
+        manifest['ventes'] = {
+            'sha256': hasher.hexdigest(),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'offset': stat.st_size,
+        }
+
+    # 🔄 Clients : en mode 'ajout', seuls les id au-delà du watermark sont transformés
+    clients_lus = 0
+    clients_transformes = 0
+    if mode_clients != 'inchangé':
+        max_id = state_clients.get('watermark') if mode_clients == 'ajout' else None
+        if mode_clients != 'ajout':
+            _clear_outputs(data_dir, 'clients_clean')
+        stat = clients_path.stat()
+        with open(clients_out, 'a' if mode_clients == 'ajout' else 'w', encoding='utf-8', newline='') as out:
+            header = mode_clients != 'ajout'
+            reader = iter_json_records(clients_path, chunksize)
+            for chunk in metrics.iter_stage('extract_clients', reader):
+                clients_lus += len(chunk)
+                with metrics.stage('transform_clients', len(chunk)) as run:
+                    if max_id is not None:
+                        chunk = chunk[chunk['id'] > max_id]
+                    chunk_clean = transform_clients(chunk)
+                    run.rows_out = len(chunk_clean)
+                if chunk_clean.empty:
+                    continue
+                with metrics.stage('load_clients', len(chunk_clean)):
+                    chunk_clean.to_csv(out, index=False, header=header)
+                header = False
+                clients_transformes += len(chunk_clean)
+        manifest['clients'] = {
+            'sha256': _hash_file(clients_path).hexdigest(),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'watermark': new_max_id,
+            'sha256_lignes': empreinte_clients,
+        }
+
+    # 💾 Rapport fusionné à partir des totaux cumulés
+    if mode_ventes != 'inchangé':
+        nb = rapport['nb_transactions']
+        rapport_ventes = {
+            'total_ventes': rapport['total_ventes'],
+            'nb_transactions': nb,
+            'vente_moyenne': rapport['total_ventes'] / nb if nb else None,
+            'date_rapport': datetime.now().isoformat()
+        }
+        with open(data_dir / 'rapport_ventes.json', 'w', encoding='utf-8') as f:
+            json.dump(rapport_ventes, f, ensure_ascii=False, indent=2)
+    manifest['rapport'] = rapport
+    _write_manifest(manifest_path, manifest)
+    metrics.stop()
+
+    # 📊 Métriques
+    duree = time.time() - start_time
+    metriques = {
+        'ventes_lues': ventes_lues,
+        'clients_lus': clients_lus,
+        'ventes_transformees': ventes_transformees,
+        'clients_transformes': clients_transformes,
+        'mode_ventes': mode_ventes,
+        'mode_clients': mode_clients,
+        'duree': round(duree, 2),
+        'etapes': metrics.records()
+    }
+
+    print(f"✅ PIPELINE TERMINÉ en {duree:.2f}s")
+    return metriques
+
 
 def load_etl_helper():
     """Charge le système d'aide ETL et crée les données d'exemple."""
+    from IPython import get_ipython
     if 'etl_helper' not in get_ipython().user_ns:
         helper = ETLHelper()
-        helper.create_sample_data()
+        # Fichiers existants conservés (redémarrage du noyau) : le manifeste reste valide
+        if (helper.data_dir / 'ventes.csv').exists() and (helper.data_dir / 'clients.json').exists():
+            print("📁 Fichiers d'exemple existants conservés dans data_etl")
+        else:
+            helper.create_sample_data(seed=SAMPLE_SEED)
+            print("📁 Dossier data_etl créé avec fichiers d'exemple")
         get_ipython().user_ns['etl_helper'] = helper
         print("🏭 Système d'aide ETL chargé !")
-        print("📁 Dossier data_etl créé avec fichiers d'exemple")
         print("✨ Prêt pour Extract, Transform, Load !")
     else:
-        print("✅ Le système d'aide ETL est déjà chargé.")
\ No newline at end of file
+        print("✅ Le système d'aide ETL est déjà chargé.")
+
+
+if __name__ == "__main__":
+    # Compatibilité avec exec(open('helpers/etl_helper.py').read()) :
+    # le notebook retrouve pd, np, widgets... dans son espace de noms
+    # (mais pas le __getattr__ paresseux, inutile hors d'un module)
+    del __getattr__
+    import ipywidgets as widgets
+    import pandas as pd
+    import numpy as np
+    from IPython.display import HTML, display
+    from IPython import get_ipython
+    load_etl_helper()
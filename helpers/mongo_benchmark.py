@@ -0,0 +1,188 @@
+"""
+Benchmark des solutions MongoDB (module 6) sur plusieurs backends.
+
+Les solutions 6.1.2 à 6.3.2 de MongoHelper sont exécutées telles quelles,
+puis une charge à l'échelle (insert_many, find filtrés et triés,
+count_documents, update_many, delete_many sur `rows` employés générés avec
+une graine fixe) est chronométrée sur chaque backend :
+- memory : le moteur en mémoire de helpers.mongo_memory, sans serveur ;
+- mongod : un vrai serveur (--mongod-uri, défaut localhost:27017), ignoré
+  s'il ne répond pas.
+
+    python -m helpers.mongo_benchmark --backends memory mongod --rows 1e3 1e4
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+from datetime import datetime, timedelta
+
+from helpers.mongo_helper import MongoHelper, get_client
+from helpers.mongo_memory import MEMORY_URI
+
+BACKENDS = {"memory": MEMORY_URI, "mongod": "mongodb://localhost:27017/"}
+SOLUTIONS = ("6.1.2", "6.2.1", "6.2.2", "6.3.1", "6.3.2")
+ROWS = (1_000, 10_000)
+SEED = 42
+DEPARTEMENTS = ['IT', 'RH', 'Finance', 'Marketing', 'Ventes']
+SKILLS = ['Python', 'MongoDB', 'Docker', 'Excel', 'Analytics', 'Communication', 'Budget']
+
+
+def generate_employes(rows, seed=SEED):
+    """Employés au format de la solution 6.2.1 (skills, date_embauche datetime, actif)."""
+    rng = random.Random(seed)
+    return [{
+        "nom": f"Employé {i}",
+        "departement": rng.choice(DEPARTEMENTS),
+        "salaire": rng.randint(30000, 80000),
+        "skills": rng.sample(SKILLS, rng.randint(1, 3)),
+        "date_embauche": datetime(2015, 1, 1) + timedelta(days=rng.randint(0, 3650)),
+        "actif": rng.random() > 0.1,
+    } for i in range(rows)]
+
+
+# Charge à l'échelle, dans l'ordre : chaque étape renvoie le nombre de documents traités
+WORKLOAD = [
+    ("insert_many", lambda c, docs: len(c.insert_many(docs).inserted_ids)),
+    ("find_departement", lambda c, docs: len(list(c.find({"departement": "IT"})))),
+    ("find_salaire_gt", lambda c, docs: len(list(c.find({"salaire": {"$gt": 60000}})))),
+    ("find_tri_limit", lambda c, docs: len(list(c.find({"actif": True}).sort("salaire", -1).limit(100)))),
+    ("count_documents", lambda c, docs: c.count_documents({"departement": "Finance"})),
+    ("update_many", lambda c, docs: c.update_many({"departement": "IT"},
+                                                  {"$inc": {"salaire": 2000}}).modified_count),
+    ("delete_many", lambda c, docs: c.delete_many({"actif": False}).deleted_count),
+]
+
+
+def _timed(function):
+    import time
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def run_solutions(helper, db):
+    """Exécute les solutions 6.x dans l'ordre du notebook ; renvoie {étape: durée}."""
+    namespace = {"client": db.client, "db": db, "datetime": datetime}
+    timings = {}
+    for step in SOLUTIONS:
+        code = compile(helper.helps[step]["solution"], f"<solution {step}>", "exec")
+        with contextlib.redirect_stdout(io.StringIO()):
+            timings[f"solution_{step}"], _ = _timed(lambda: exec(code, namespace))
+    return timings
+
+
+def connect(uri):
+    """Client partagé de l'URI, ou None si le serveur ne répond pas."""
+    kwargs = {} if uri.startswith(MEMORY_URI) else {"serverSelectionTimeoutMS": 2000}
+    client = get_client(uri, **kwargs)
+    try:
+        client.admin.command("ping")
+    except Exception as e:
+        print(f"⚠️ {uri} injoignable ({type(e).__name__}), backend ignoré")
+        return None
+    return client
+
+
+def run_backend(backend, uri, rows_list=ROWS, repeat=3):
+    """Mesure solutions et charge sur un backend ; renvoie une liste de résultats."""
+    client = connect(uri)
+    if client is None:
+        return []
+    helper = MongoHelper()
+    db_name = f"bench_{os.getpid()}"
+    results = []
+    try:
+        for rows in rows_list:
+            employes = generate_employes(rows)
+            timings = {}
+            counts = {}
+            for _ in range(repeat):
+                client.drop_database(db_name)
+                db = client[db_name]
+                for name, duree in run_solutions(helper, db).items():
+                    timings.setdefault(name, []).append(duree)
+                    counts[name] = None
+                db.drop_collection("employes")
+                collection = db["employes"]
+                docs = [dict(doc) for doc in employes]  # insert_many ajoute _id aux documents
+                for name, step in WORKLOAD:
+                    duree, counts[name] = _timed(lambda: step(collection, docs))
+                    timings.setdefault(name, []).append(duree)
+            for name, durees in timings.items():
+                mediane = statistics.median(durees)
+                results.append({
+                    "backend": backend,
+                    "echelle": rows,
+                    "etape": name,
+                    "repetitions": len(durees),
+                    "duree_mediane_s": round(mediane, 6),
+                    "documents": counts[name],
+                    "docs_par_s": round(counts[name] / mediane, 1) if counts[name] and mediane else None,
+                })
+    finally:
+        client.drop_database(db_name)
+    return results
+
+
+def environment():
+    try:
+        from importlib.metadata import version
+        pymongo_version = version("pymongo")
+    except Exception:
+        pymongo_version = None
+    return {
+        "python": platform.python_version(),
+        "pymongo": pymongo_version,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def run_benchmark(backends=BACKENDS, rows_list=ROWS, repeat=3):
+    results = []
+    for backend, uri in backends.items():
+        print(f"⏱️ Backend {backend} ({uri})...")
+        results.extend(run_backend(backend, uri, rows_list, repeat))
+    return {'date': datetime.now().isoformat(), 'environnement': environment(), 'resultats': results}
+
+
+def print_report(report):
+    print(f"{'Backend':<8}{'Échelle':>9} {'Étape':<20}{'Médiane (s)':>13}{'Docs/s':>13}")
+    for r in report['resultats']:
+        debit = f"{r['docs_par_s']:.0f}" if r['docs_par_s'] else '-'
+        print(f"{r['backend']:<8}{r['echelle']:>9,} {r['etape']:<20}{r['duree_mediane_s']:>13.4f}{debit:>13}")
+
+
+def _scale(value):
+    return int(float(value))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark des solutions MongoDB sur plusieurs backends")
+    parser.add_argument('--backends', nargs='+', choices=list(BACKENDS), default=list(BACKENDS))
+    parser.add_argument('--mongod-uri', default=BACKENDS["mongod"], help="URI du backend mongod")
+    parser.add_argument('--rows', nargs='+', type=_scale, default=list(ROWS),
+                        help="nombres d'employés de la charge (ex. 1e3 1e4)")
+    parser.add_argument('--repeat', type=int, default=3, help="répétitions par échelle")
+    parser.add_argument('--output', help="fichier JSON lines où ajouter les résultats")
+    args = parser.parse_args(argv)
+
+    uris = dict(BACKENDS, mongod=args.mongod_uri)
+    report = run_benchmark({name: uris[name] for name in args.backends}, args.rows, args.repeat)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'a', encoding='utf-8') as f:
+            for result in report['resultats']:
+                f.write(json.dumps({'date': report['date'], **report['environnement'], **result}) + '\n')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
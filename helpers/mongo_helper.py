@@ -1,13 +1,26 @@
-import subprocess
-import sys
-import ipywidgets as widgets
-import pandas as pd
-import numpy as np
+import atexit
+import importlib.util
 import json
+import os
 import random
+import sys
+import threading
+import time
 from datetime import datetime, timedelta
-from IPython.display import HTML, display
-from IPython import get_ipython
+
+from helpers._lazy import lazy_getattr
+from helpers.mongo_memory import MEMORY_URI
+
+# pandas, numpy, ipywidgets, pymongo et IPython ne sont importés qu'au premier usage
+__getattr__ = lazy_getattr(__name__, {
+    "pd": "pandas",
+    "np": "numpy",
+    "widgets": "ipywidgets",
+    "pymongo": "pymongo",
+    "HTML": "IPython.display:HTML",
+    "display": "IPython.display:display",
+    "get_ipython": "IPython:get_ipython",
+})
 
 def install_mongo_packages():
     """Installe les packages nécessaires pour le notebook MongoDB."""
@@ -21,15 +34,315 @@ def install_mongo_packages():
     print("🚀 Démarrage de l'installation des packages MongoDB...")
     print("Cette opération peut prendre quelques instants.")
     
-    for package in packages:
-        try:
-            subprocess.check_call([sys.executable, "-m", "pip", "install", package, "--quiet"])
-            print(f"✅ {package} installé.")
-        except subprocess.CalledProcessError:
-            print(f"❌ Erreur lors de l'installation de {package}.")
+    from helpers.deps_helper import ensure_packages
+    ensure_packages(packages)
             
     print("\\n✨ Installation terminée !")
 
+
+# MongoDB local des exercices (module 6) ; MONGO_URI=memory:// bascule tout le
+# processus sur le moteur en mémoire de mongo_memory.py (tests et benchmarks hors ligne)
+DEFAULT_URI = os.environ.get("MONGO_URI", "mongodb://localhost:27017/")
+# Taille des pools de connexions des clients partagés (par serveur)
+MAX_POOL_SIZE = 50
+MIN_POOL_SIZE = 0
+
+# Opérations par bulk_write de bulk_upsert, et lots écrits en parallèle
+BULK_BATCH_SIZE = 1000
+BULK_WORKERS = 4
+
+# Documents examinés par document renvoyé au-delà desquels une requête est signalée
+EXAMINED_RATIO_LIMIT = 10
+# Opérateurs de filtre traités comme des égalités (les autres sont des plages)
+_EQUALITY_OPERATORS = {"$eq", "$in"}
+
+# Documents par lot renvoyé par le serveur pour les curseurs d'agrégation
+AGG_BATCH_SIZE = 1000
+# Fonctions d'agrégation pandas (agg) et leur équivalent $group
+_GROUP_OPERATORS = {
+    "mean": "$avg",
+    "sum": "$sum",
+    "min": "$min",
+    "max": "$max",
+    "std": "$stdDevSamp",
+    "first": "$first",
+    "last": "$last",
+}
+
+# Registre des MongoClient du processus : un client (et ses pools) par
+# configuration, créé au premier usage et fermé par close_clients()
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _pool_listener():
+    """PoolStats (écouteur CMAP de pymongo), défini au premier usage pour ne pas importer pymongo."""
+    from pymongo import monitoring
+
+    class PoolStats(monitoring.ConnectionPoolListener):
+        """Compteurs des pools d'un client, tenus à jour par les événements CMAP."""
+
+        def __init__(self):
+            self._lock = threading.Lock()
+            self.counts = dict.fromkeys([
+                "pools_crees", "pools_vides", "connexions_creees", "connexions_fermees",
+                "connexions_ouvertes", "empruntees", "en_attente", "attente_max",
+                "emprunts", "echecs_emprunt", "attente_totale_ms",
+            ], 0)
+
+        def _add(self, **deltas):
+            with self._lock:
+                for name, delta in deltas.items():
+                    self.counts[name] += delta
+                self.counts["attente_max"] = max(self.counts["attente_max"], self.counts["en_attente"])
+
+        def snapshot(self):
+            with self._lock:
+                return dict(self.counts, attente_totale_ms=round(self.counts["attente_totale_ms"], 3))
+
+        def pool_created(self, event):
+            self._add(pools_crees=1)
+
+        def pool_ready(self, event):
+            pass
+
+        def pool_cleared(self, event):
+            self._add(pools_vides=1)
+
+        def pool_closed(self, event):
+            pass
+
+        def connection_created(self, event):
+            self._add(connexions_creees=1, connexions_ouvertes=1)
+
+        def connection_ready(self, event):
+            pass
+
+        def connection_closed(self, event):
+            self._add(connexions_fermees=1, connexions_ouvertes=-1)
+
+        def connection_check_out_started(self, event):
+            self._add(en_attente=1)
+
+        def connection_check_out_failed(self, event):
+            self._add(en_attente=-1, echecs_emprunt=1)
+
+        def connection_checked_out(self, event):
+            # duration : temps d'attente du pool (pymongo >= 4.7)
+            duration = getattr(event, "duration", None) or 0
+            self._add(en_attente=-1, empruntees=1, emprunts=1, attente_totale_ms=duration * 1000)
+
+        def connection_checked_in(self, event):
+            self._add(empruntees=-1)
+
+    return PoolStats()
+
+
+def get_client(uri=DEFAULT_URI, max_pool_size=MAX_POOL_SIZE, min_pool_size=MIN_POOL_SIZE, **kwargs):
+    """MongoClient partagé par tout le processus pour cette URI et cette configuration.
+
+    Créé au premier appel (la découverte des serveurs n'a lieu qu'une
+    fois), puis réutilisé : ne pas le fermer soi-même, voir close_clients().
+    Les kwargs (hashables) sont passés à MongoClient. Une URI memory://
+    donne un MemoryClient (helpers.mongo_memory), sans serveur ni pool.
+    """
+    key = (uri, max_pool_size, min_pool_size, tuple(sorted(kwargs.items())))
+    with _clients_lock:
+        entry = _clients.get(key)
+        if entry is None and uri.startswith(MEMORY_URI):
+            from helpers.mongo_memory import MemoryClient
+            entry = _clients[key] = {"client": MemoryClient(uri), "stats": None, "cree_le": time.time()}
+        if entry is None:
+            from pymongo import MongoClient
+            stats = _pool_listener()
+            client = MongoClient(uri, maxPoolSize=max_pool_size, minPoolSize=min_pool_size,
+                                 event_listeners=[stats], **kwargs)
+            entry = _clients[key] = {"client": client, "stats": stats, "cree_le": time.time()}
+        return entry["client"]
+
+
+def pool_stats():
+    """Statistiques des pools de chaque client partagé (DataFrame, une ligne par client)."""
+    import pandas as pd
+    with _clients_lock:
+        entries = list(_clients.items())
+    return pd.DataFrame([{
+        "uri": uri, "max_pool_size": max_pool_size, "min_pool_size": min_pool_size,
+        **entry["stats"].snapshot(),
+    } for (uri, max_pool_size, min_pool_size, _), entry in entries if entry["stats"] is not None])
+
+
+def close_clients():
+    """Ferme tous les clients partagés (pools et threads de surveillance) ; retourne leur nombre."""
+    with _clients_lock:
+        entries = list(_clients.values())
+        _clients.clear()
+    for entry in entries:
+        entry["client"].close()
+    return len(entries)
+
+
+atexit.register(close_clients)
+
+
+def _documents(docs):
+    """Documents d'un itérable de dicts, d'un DataFrame ou d'un itérable de DataFrames (NaN -> None)."""
+    # Sans pandas chargé, aucun élément ne peut être un DataFrame
+    pd = sys.modules.get("pandas")
+    if pd is not None and isinstance(docs, pd.DataFrame):
+        docs = [docs]
+    for item in docs:
+        if pd is not None and isinstance(item, pd.DataFrame):
+            yield from item.astype(object).where(item.notna(), None).to_dict("records")
+        else:
+            yield item
+
+
+def _plan_stages(node):
+    """Étapes du plan gagnant, de la racine aux feuilles (SBE : sous-clé queryPlan)."""
+    node = node.get("queryPlan", node)
+    stages = [node]
+    for child in node.get("inputStages", []) + ([node["inputStage"]] if "inputStage" in node else []):
+        stages += _plan_stages(child)
+    return stages
+
+
+def _explain_summary(explain):
+    """Résumé d'un explain("executionStats") : étapes, index, compteurs et problèmes."""
+    stages = _plan_stages(explain["queryPlanner"]["winningPlan"])
+    stats = explain["executionStats"]
+    returned = stats["nReturned"]
+    examined = stats["totalDocsExamined"]
+    ratio = examined / max(returned, 1)
+    names = [stage["stage"] for stage in stages]
+    issues = []
+    if "COLLSCAN" in names:
+        issues.append("COLLSCAN (parcours complet de la collection)")
+    if "SORT" in names:
+        issues.append("SORT en mémoire")
+    if ratio > EXAMINED_RATIO_LIMIT:
+        issues.append(f"{examined} documents examinés pour {returned} renvoyés (x{ratio:.0f})")
+    return {
+        "etapes": " > ".join(names),
+        "index": ", ".join(stage["indexName"] for stage in stages if "indexName" in stage) or None,
+        "n_renvoyes": returned,
+        "docs_examines": examined,
+        "cles_examinees": stats["totalKeysExamined"],
+        "ratio_examines": round(ratio, 1),
+        "duree_ms": stats["executionTimeMillis"],
+        "problemes": issues,
+    }
+
+
+def _filter_fields(query):
+    """Champs d'un filtre répartis en égalités, plages et constantes booléennes ($and compris)."""
+    equal, ranges, flags = [], [], {}
+    for field, condition in query.items():
+        if field == "$and":
+            for part in condition:
+                sub_equal, sub_ranges, sub_flags = _filter_fields(part)
+                equal += [f for f in sub_equal if f not in equal]
+                ranges += [f for f in sub_ranges if f not in ranges]
+                flags.update(sub_flags)
+        elif field.startswith("$"):
+            continue  # $or, $expr... : pas d'index unique évident
+        elif isinstance(condition, bool):
+            flags[field] = condition
+        elif not isinstance(condition, dict) or set(condition) <= _EQUALITY_OPERATORS:
+            equal.append(field)
+        elif field not in ranges:
+            ranges.append(field)
+    return equal, ranges, flags
+
+
+def _index_candidate(query, sort=None):
+    """Index proposé (règle ESR : égalités, tri, puis une plage) et filtre partiel éventuel.
+
+    Une égalité sur un booléen (actif: True) devient un filtre partiel :
+    l'index ne contient que les documents concernés. Retourne
+    (clés [(champ, sens)], partialFilterExpression ou None).
+    """
+    equal, ranges, flags = _filter_fields(query)
+    keys = [(field, 1) for field in equal]
+    for field, direction in sort or []:
+        if field not in dict(keys):
+            keys.append((field, direction))
+    if ranges and ranges[0] not in dict(keys):
+        keys.append((ranges[0], 1))
+    if not keys:
+        # Seulement des booléens : index simple, un filtre partiel ne laisserait aucune clé
+        return [(field, 1) for field in flags], None
+    return keys, flags or None
+
+
+def _index_label(keys, partial):
+    label = "{" + ", ".join(f"{field}: {direction}" for field, direction in keys) + "}"
+    if partial:
+        label += " partiel " + json.dumps(partial)
+    return label
+
+
+def _metric_list(metrics):
+    """{'salaire': ['mean', 'count'], 'age': 'mean'} -> [('salaire', 'mean'), ('salaire', 'count'), ('age', 'mean')]."""
+    pairs = []
+    for field, functions in metrics.items():
+        for function in [functions] if isinstance(functions, str) else functions:
+            if function not in _GROUP_OPERATORS and function not in ("count", "nunique"):
+                raise ValueError(f"Agrégation inconnue: {function!r} "
+                                 f"({', '.join([*_GROUP_OPERATORS, 'count', 'nunique'])})")
+            pairs.append((field, function))
+    return pairs
+
+
+def group_pipeline(by, metrics, match=None, sort=True, order=None, dropna=True):
+    """Pipeline $match / $group / $project équivalent à df.groupby(by).agg(metrics).
+
+    Les résultats sont des documents plats {by..., '<champ>_<fonction>': valeur}.
+    count et nunique ignorent les valeurs nulles ou absentes, comme pandas ;
+    avec dropna=True (défaut de groupby) les documents dont une clé est
+    nulle ou absente sont écartés. first / last prennent la valeur du
+    premier / dernier document du groupe, null compris (pandas saute les
+    NaN), dans l'ordre `order` ([(champ, 1 | -1)...], trié avant $group) :
+    sans order, l'ordre d'entrée du serveur n'est pas garanti. Seuls les
+    champs utilisés remontent du serveur.
+    """
+    keys = [by] if isinstance(by, str) else list(by)
+    group = {"_id": f"${keys[0]}" if len(keys) == 1 else {k: f"${k}" for k in keys}}
+    project = {"_id": 0}
+    project.update({k: "$_id" if len(keys) == 1 else f"$_id.{k}" for k in keys})
+    for field, function in _metric_list(metrics):
+        name = f"{field}_{function}"
+        if function == "count":
+            group[name] = {"$sum": {"$cond": [{"$eq": [{"$ifNull": [f"${field}", None]}, None]}, 0, 1]}}
+            project[name] = 1
+        elif function == "nunique":
+            group[name] = {"$addToSet": f"${field}"}
+            project[name] = {"$size": {"$filter": {"input": f"${name}", "cond": {"$ne": ["$$this", None]}}}}
+        else:
+            group[name] = {_GROUP_OPERATORS[function]: f"${field}"}
+            project[name] = 1
+    if dropna:
+        not_null = {k: {"$ne": None} for k in keys}
+        match = {"$and": [match, not_null]} if match else not_null
+    pipeline = [{"$match": match}] if match else []
+    if order:
+        pipeline.append({"$sort": dict(order)})
+    pipeline += [{"$group": group}, {"$project": project}]
+    if sort:
+        pipeline.append({"$sort": {k: 1 for k in keys}})
+    return pipeline
+
+
+def _dataframe_chunks(documents, chunksize):
+    import itertools
+    import pandas as pd
+    while True:
+        chunk = list(itertools.islice(documents, chunksize))
+        if not chunk:
+            return
+        yield pd.DataFrame.from_records(chunk)
+
+
 class MongoHelper:
     def __init__(self):
         self.success_style = """
@@ -38,12 +351,13 @@ class MongoHelper:
         </div>
         """
         
-        # Vérifier si PyMongo est disponible
-        try:
-            import pymongo
-            self.pymongo_available = True
-        except ImportError:
-            self.pymongo_available = False
+        # Vérifier si PyMongo est disponible (sans l'importer)
+        self.pymongo_available = importlib.util.find_spec("pymongo") is not None
+        # Client partagé utilisé par le helper (voir get_client)
+        self.uri = DEFAULT_URI
+        self.max_pool_size = MAX_POOL_SIZE
+        self.min_pool_size = MIN_POOL_SIZE
+        self.db_name = "entreprise_db"
         
         # Base de données des aides cachées
         self.helps = {
@@ -191,6 +505,7 @@ print(f"👥 {actifs} employés actifs restants")""",
             print(f"❌ Aide non trouvée pour l'étape {step}")
             return
             
+        from IPython.display import HTML, display
         help_data = self.helps[step]
         
         # Conseil caché
@@ -222,6 +537,7 @@ print(f"👥 {actifs} employés actifs restants")""",
         display(HTML(html_solution))
     
     def solution(self, code, explanation=""):
+        from IPython.display import HTML, display
         html = f"""
         <details style="margin: 10px 0; border: 1px solid #ddd; border-radius: 5px; padding: 5px;">
             <summary style="cursor: pointer; background: #e8f5e8; padding: 10px; border-radius: 3px; font-weight: bold;">
@@ -236,6 +552,7 @@ print(f"👥 {actifs} employés actifs restants")""",
         display(HTML(html))
     
     def hint(self, text):
+        from IPython.display import HTML, display
         html = f"""
         <details style="margin: 10px 0; border: 1px solid #ddd; border-radius: 5px; padding: 5px;">
             <summary style="cursor: pointer; background: #e8f5e8; padding: 10px; border-radius: 3px; font-weight: bold;">
@@ -249,17 +566,284 @@ print(f"👥 {actifs} employés actifs restants")""",
         display(HTML(html))
     
     def success(self, message):
+        from IPython.display import HTML, display
         html = self.success_style.format(message=message)
         display(HTML(html))
     
+    def get_client(self):
+        """MongoClient partagé du helper, créé au premier appel puis réutilisé."""
+        return get_client(self.uri, self.max_pool_size, self.min_pool_size)
+
+    def pool_stats(self):
+        """Connexions créées, empruntées et en attente des clients partagés (voir pool_stats)."""
+        return pool_stats()
+
+    def close(self):
+        """Ferme les clients partagés ; le prochain appel à get_client en recrée un."""
+        return close_clients()
+
+    def bulk_upsert(self, collection, docs, key="_id", batch_size=BULK_BATCH_SIZE, workers=BULK_WORKERS,
+                    ensure_index=False, verbose=True):
+        """Écrit un flux de documents par bulk_write non ordonnés, plusieurs lots en parallèle.
+
+        collection : nom (dans self.db_name) ou objet Collection. docs : dicts,
+        DataFrame ou itérable de DataFrames (pd.read_csv(..., chunksize=...)),
+        consommé au fil de l'eau : au plus 2 * workers lots en mémoire.
+        Chaque document portant le(s) champ(s) `key` remplace celui de même
+        clé (upsert) ; les autres, ou tous avec key=None, sont insérés. Avec
+        une clé autre que _id, le _id du document est ignoré (il est immuable
+        côté serveur : le document remplacé garde le sien) et chaque upsert
+        cherche la clé : ensure_index=True crée l'index unique sur `key` dans
+        la collection (changement de schéma permanent) pour éviter un
+        parcours complet par document. Retourne un rapport (documents,
+        insérés, upserts, modifiés, erreurs, docs/s).
+        """
+        import itertools
+        from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+        if isinstance(collection, str):
+            collection = self.get_client()[self.db_name][collection]
+        if type(collection).__name__ == "MemoryCollection":
+            # Moteur en mémoire : ses propres opérations, pymongo n'est pas requis
+            from helpers.mongo_memory import BulkWriteError, InsertOne, ReplaceOne
+        else:
+            from pymongo import InsertOne, ReplaceOne
+            from pymongo.errors import BulkWriteError
+        keys = (key,) if isinstance(key, str) else tuple(key or ())
+        if ensure_index and keys and keys != ("_id",):
+            collection.create_index([(k, 1) for k in keys], unique=True)
+
+        def operation(doc):
+            if keys and all(k in doc for k in keys):
+                if "_id" not in keys:
+                    doc = {k: v for k, v in doc.items() if k != "_id"}
+                return ReplaceOne({k: doc[k] for k in keys}, doc, upsert=True)
+            return InsertOne(doc)
+
+        def write(batch):
+            try:
+                return collection.bulk_write(batch, ordered=False).bulk_api_result
+            except BulkWriteError as e:
+                # Non ordonné : le reste du lot est écrit malgré les erreurs
+                return e.details
+
+        totals = dict.fromkeys(["nInserted", "nUpserted", "nMatched", "nModified"], 0)
+        errors = 0
+
+        def collect(futures):
+            nonlocal errors
+            for future in futures:
+                result = future.result()
+                for name in totals:
+                    totals[name] += result.get(name, 0)
+                errors += len(result.get("writeErrors", []))
+
+        start = time.perf_counter()
+        documents = _documents(docs)
+        count = batches = 0
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bulk_upsert") as pool:
+            pending = set()
+            while True:
+                batch = [operation(doc) for doc in itertools.islice(documents, batch_size)]
+                if not batch:
+                    break
+                count += len(batch)
+                batches += 1
+                pending.add(pool.submit(write, batch))
+                if len(pending) >= 2 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+            collect(pending)
+
+        duree = time.perf_counter() - start
+        report = {
+            "collection": collection.name,
+            "documents": count,
+            "lots": batches,
+            "inseres": totals["nInserted"],
+            "upserts": totals["nUpserted"],
+            "remplaces": totals["nMatched"],
+            "modifies": totals["nModified"],
+            "erreurs": errors,
+            "duree_s": round(duree, 3),
+            "docs_par_s": round(count / duree) if duree else None,
+        }
+        if verbose:
+            print(f"📥 {count} documents écrits dans '{collection.name}' en {duree:.2f}s "
+                  f"({report['docs_par_s']} docs/s, {errors} erreurs)")
+        return report
+
+    def load_etl_outputs(self, data_dir="data_etl", chunksize=100_000, if_exists="replace",
+                         workers=BULK_WORKERS):
+        """Charge ventes_clean.csv et clients_clean.csv (module 3) dans les collections ventes et clients.
+
+        Les clients sont upsertés sur `id` (index unique créé sur clients.id) ;
+        les ventes, sans clé naturelle, sont insérées. if_exists="replace"
+        vide d'abord les collections.
+        """
+        import pandas as pd
+        if if_exists not in ("append", "replace"):
+            raise ValueError(f"if_exists invalide: {if_exists!r} (append ou replace)")
+        db = self.get_client()[self.db_name]
+        reports = []
+        for name, collection, key in (("ventes_clean.csv", "ventes", None), ("clients_clean.csv", "clients", "id")):
+            if if_exists == "replace":
+                db.drop_collection(collection)
+            chunks = pd.read_csv(os.path.join(data_dir, name), chunksize=chunksize)
+            reports.append(self.bulk_upsert(db[collection], chunks, key=key, workers=workers,
+                                            ensure_index=key is not None))
+        return reports
+
+    def _workload(self, queries):
+        """Requêtes normalisées en (filtre, tri) : filtre seul ou couple (filtre, [(champ, sens)])."""
+        return [(q, None) if isinstance(q, dict) else (q[0], list(q[1]) if q[1] else None) for q in queries]
+
+    def explain(self, query, sort=None, collection="employes"):
+        """explain("executionStats") d'un find : étapes, index, documents examinés / renvoyés, problèmes.
+
+        Signale les COLLSCAN, les tris en mémoire et les requêtes qui
+        examinent plus de EXAMINED_RATIO_LIMIT documents par document renvoyé.
+        """
+        db = self.get_client()[self.db_name]
+        command = {"find": collection, "filter": query}
+        if sort:
+            command["sort"] = dict(sort)
+        explain = db.command({"explain": command, "verbosity": "executionStats"})
+        return {"requete": json.dumps(query, default=str), **_explain_summary(explain)}
+
+    def advise_indexes(self, queries, collection="employes", repeat=5, apply=False, sample=None):
+        """Conseille des index pour une charge de requêtes find et mesure leur effet.
+
+        Chaque requête (filtre, ou couple (filtre, tri)) passe par explain ;
+        en cas de problème, un index composé est proposé (égalités, tri,
+        puis plage) avec un filtre partiel pour les booléens. Explain et
+        chronométrages, avant / après création de tous les index proposés,
+        ont lieu sur une copie jetable de la collection ($out) portant ses
+        index existants, au nom unique (_advisor_<collection>_<uuid>) : deux
+        conseillers simultanés ne se gênent pas. sample=N ne copie que N
+        documents tirés au hasard ($sample), pour les grosses collections :
+        les mesures portent alors sur cet échantillon. apply=True crée
+        ensuite sur la vraie collection les index qui accélèrent au moins
+        une requête de 10 %. Retourne un DataFrame.
+        """
+        import statistics
+        import uuid
+        import pandas as pd
+        db = self.get_client()[self.db_name]
+        workload = self._workload(queries)
+        index_information = db[collection].index_information()
+        existing = {(tuple(info["key"]), json.dumps(info.get("partialFilterExpression"), sort_keys=True))
+                    for info in index_information.values()}
+
+        def timed(coll, query, sort):
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                cursor = coll.find(query)
+                if sort:
+                    cursor = cursor.sort(sort)
+                list(cursor)
+                timings.append(time.perf_counter() - start)
+            return statistics.median(timings)
+
+        scratch_name = f"_advisor_{collection}_{uuid.uuid4().hex[:12]}"
+        scratch = db[scratch_name]
+        source = [{"$sample": {"size": sample}}] if sample else [{"$match": {}}]
+        db[collection].aggregate(source + [{"$out": scratch_name}])
+        try:
+            # $out ne copie pas les index : la copie reçoit ceux de la collection
+            # (sans TTL, qui supprimerait des documents pendant les mesures)
+            for name, info in index_information.items():
+                if name != "_id_":
+                    options = {k: v for k, v in info.items() if k not in ("key", "v", "ns", "expireAfterSeconds")}
+                    scratch.create_index(info["key"], name=name, **options)
+            proposals = []
+            for query, sort in workload:
+                summary = self.explain(query, sort, scratch_name)
+                index = None
+                if summary["problemes"]:
+                    keys, partial = _index_candidate(query, sort)
+                    if keys and (tuple(keys), json.dumps(partial, sort_keys=True)) not in existing:
+                        index = (keys, partial)
+                proposals.append({"query": query, "sort": sort, "avant": summary, "index": index,
+                                  "avant_s": timed(scratch, query, sort)})
+            indexes = {_index_label(*p["index"]): p["index"] for p in proposals if p["index"]}
+            for keys, partial in indexes.values():
+                options = {"partialFilterExpression": partial} if partial else {}
+                scratch.create_index(keys, **options)
+            for p in proposals:
+                p["apres_s"] = timed(scratch, p["query"], p["sort"])
+                p["apres"] = self.explain(p["query"], p["sort"], scratch_name)
+        finally:
+            db.drop_collection(scratch_name)
+
+        if apply:
+            gains = {_index_label(*p["index"]): p["index"] for p in proposals
+                     if p["index"] and p["apres_s"] and p["avant_s"] / p["apres_s"] >= 1.1}
+            for keys, partial in gains.values():
+                options = {"partialFilterExpression": partial} if partial else {}
+                db[collection].create_index(keys, **options)
+            if gains:
+                print(f"✅ {len(gains)} index créés sur {self.db_name}.{collection}")
+
+        return pd.DataFrame([{
+            "requete": p["avant"]["requete"] + (f" tri {json.dumps(dict(p['sort']))}" if p["sort"] else ""),
+            "problemes": "; ".join(p["avant"]["problemes"]) or "aucun",
+            "index_propose": _index_label(*p["index"]) if p["index"] else None,
+            "docs_examines_avant": p["avant"]["docs_examines"],
+            "docs_examines_apres": p["apres"]["docs_examines"],
+            "avant_ms": round(p["avant_s"] * 1000, 3),
+            "apres_ms": round(p["apres_s"] * 1000, 3),
+            "acceleration": round(p["avant_s"] / p["apres_s"], 1) if p["apres_s"] else None,
+            "plan_apres": p["apres"]["etapes"],
+        } for p in proposals])
+
+    def aggregate_stream(self, pipeline, collection="employes", batch_size=AGG_BATCH_SIZE, allow_disk_use=True):
+        """Documents d'un pipeline d'agrégation, lus lot par lot (batch_size) au fil de l'itération.
+
+        allowDiskUse laisse $group et $sort déborder sur disque au-delà de
+        la limite mémoire du serveur (100 Mo par étape) au lieu d'échouer.
+        """
+        db = self.get_client()[self.db_name]
+        with db[collection].aggregate(pipeline, allowDiskUse=allow_disk_use, batchSize=batch_size) as cursor:
+            yield from cursor
+
+    def aggregate_dataframe(self, pipeline, collection="employes", chunksize=None, batch_size=AGG_BATCH_SIZE):
+        """Résultat d'un pipeline en DataFrame, ou générateur de DataFrames de `chunksize` lignes.
+
+        Avec chunksize, seul un bloc de documents est en mémoire côté client.
+        """
+        import pandas as pd
+        documents = self.aggregate_stream(pipeline, collection, batch_size)
+        if chunksize is None:
+            return pd.DataFrame.from_records(list(documents))
+        return _dataframe_chunks(documents, chunksize)
+
+    def department_stats(self, metrics=None, match=None, collection="employes", by="departement"):
+        """Statistiques par département calculées par le serveur (équivalent Mongo de l'étape 2.3.1).
+
+        metrics suit la syntaxe de DataFrame.agg (défaut : salaire mean / min
+        / max / count) ; match filtre avant le groupement, par exemple
+        {"actif": True}. Retourne un DataFrame indexé par département, aux
+        colonnes (champ, fonction) comme groupby().agg(), arrondi à 2 décimales.
+        """
+        import pandas as pd
+        metrics = metrics or {"salaire": ["mean", "min", "max", "count"]}
+        pairs = _metric_list(metrics)
+        df = self.aggregate_dataframe(group_pipeline(by, metrics, match), collection)
+        columns = pd.MultiIndex.from_tuples(pairs)
+        if df.empty:
+            return pd.DataFrame(columns=columns, index=pd.Index([], name=by))
+        stats = df.set_index(by)[[f"{field}_{function}" for field, function in pairs]]
+        stats.columns = columns
+        return stats.round(2)
+
     def check_mongo_connection(self):
         """Vérifie la connexion à MongoDB"""
-        if not self.pymongo_available:
+        if not self.pymongo_available and not self.uri.startswith(MEMORY_URI):
             return False, "PyMongo n'est pas installé"
         
         try:
-            from pymongo import MongoClient
-            client = MongoClient()
+            client = self.get_client()
             client.admin.command('ping')
             return True, "Connexion réussie"
         except Exception as e:
@@ -267,6 +851,8 @@ print(f"👥 {actifs} employés actifs restants")""",
     
     def check_connection_button(self):
         """Bouton pour vérifier la connexion MongoDB"""
+        import ipywidgets as widgets
+        from IPython.display import display
         output = widgets.Output()
         button = widgets.Button(
             description="🔗 Vérifier MongoDB",
@@ -321,6 +907,7 @@ print(f"👥 {actifs} employés actifs restants")""",
 
 def load_mongo_helper():
     """Charge le système d'aide MongoDB."""
+    from IPython import get_ipython
     if 'mongo_helper' not in get_ipython().user_ns:
         helper = MongoHelper()
         get_ipython().user_ns['mongo_helper'] = helper
@@ -333,4 +920,17 @@ def load_mongo_helper():
         else:
             print("⚠️  PyMongo non installé - certaines fonctionnalités seront limitées")
     else:
-        print("✅ Le système d'aide MongoDB est déjà chargé.")
\ No newline at end of file
+        print("✅ Le système d'aide MongoDB est déjà chargé.")
+
+
+if __name__ == "__main__":
+    # Compatibilité avec exec(open('helpers/mongo_helper.py').read()) :
+    # le notebook retrouve pd, np, widgets... dans son espace de noms
+    # (mais pas le __getattr__ paresseux, inutile hors d'un module)
+    del __getattr__
+    import ipywidgets as widgets
+    import pandas as pd
+    import numpy as np
+    from IPython.display import HTML, display
+    from IPython import get_ipython
+    load_mongo_helper()
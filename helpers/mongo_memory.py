@@ -0,0 +1,1098 @@
+"""
+Moteur MongoDB en mémoire pour tester et mesurer les exercices du module 6 hors ligne.
+
+MemoryClient reproduit le sous-ensemble de pymongo utilisé par les
+solutions 6.x et par MongoHelper : client[base][collection], insert_one /
+insert_many, find (filtre, projection, sort / skip / limit), find_one,
+update_one / update_many / replace_one (upsert compris), delete_one /
+delete_many, bulk_write, count_documents, distinct, create_index,
+aggregate ($match, $group, $project, $addFields / $set, $unset, $unwind,
+$sort, $skip, $limit, $sample, $count, $out) et db.command : ping et explain d'un
+find.
+
+Les documents sont copiés à l'écriture et à la lecture ; l'égalité suit
+BSON (True ne vaut pas 1, l'ordre des clés d'un sous-document compte) et
+_id est stocké en premier champ. Un _id en double lève DuplicateKeyError
+(BulkWriteError pour insert_many / bulk_write), comme pymongo. Sans
+pymongo installé, ces exceptions et les opérations InsertOne, ReplaceOne...
+de bulk_write sont fournies par ce module.
+
+Limites connues :
+- les index sont enregistrés (index_information) mais jamais utilisés ni
+  appliqués : toute recherche est un parcours complet (explain renvoie un
+  COLLSCAN) et seule l'unicité de _id est contrôlée ;
+- pas de transactions, de collations, de $lookup ni d'opérateurs de
+  requête géographiques ou textuels ; un chemin pointé ne traverse pas un
+  tableau de sous-documents ('skills.nom').
+
+Sélection par URI dans mongo_helper : get_client("memory://") ou
+MONGO_URI=memory:// pour tout le processus.
+"""
+
+import contextlib
+import copy
+import itertools
+import math
+import random
+import re
+import statistics
+import threading
+import time
+from datetime import datetime
+
+MEMORY_URI = "memory://"
+
+_MISSING = object()
+
+
+def _object_id():
+    try:
+        from bson import ObjectId
+    except ImportError:  # pymongo absent : identifiants entiers croissants
+        return next(_counter)
+    return ObjectId()
+
+
+_counter = itertools.count(1)
+
+
+def _get_path(doc, path):
+    """Valeur d'un chemin pointé ('adresse.ville', 'skills.0') ou _MISSING."""
+    value = doc
+    for part in path.split("."):
+        if isinstance(value, dict) and part in value:
+            value = value[part]
+        elif isinstance(value, list) and part.isdigit() and int(part) < len(value):
+            value = value[int(part)]
+        else:
+            return _MISSING
+    return value
+
+
+def _set_path(doc, path, value):
+    """Écrit un chemin pointé ; un indice au-delà d'un tableau le complète par des null."""
+    *parents, last = path.split(".")
+    for i, part in enumerate(parents):
+        if isinstance(doc, list):
+            index = _array_index(doc, part, path)
+            if doc[index] is None:
+                doc[index] = {}
+            doc = doc[index]
+        elif isinstance(doc, dict):
+            doc = doc.setdefault(part, {})
+        else:
+            raise ValueError(f"Impossible de créer {path!r} : {'.'.join(parents[:i])!r} n'est pas un objet")
+    if isinstance(doc, list):
+        doc[_array_index(doc, last, path)] = value
+    elif isinstance(doc, dict):
+        doc[last] = value
+    else:
+        raise ValueError(f"Impossible de créer {path!r} : {'.'.join(parents)!r} n'est pas un objet")
+
+
+def _array_index(array, part, path):
+    if not part.isdigit():
+        raise ValueError(f"Impossible de créer {path!r} : {part!r} n'est pas un indice de tableau")
+    index = int(part)
+    array.extend([None] * (index + 1 - len(array)))
+    return index
+
+
+def _unset_path(doc, path):
+    """Supprime un chemin pointé ; un élément de tableau devient null, comme avec $unset."""
+    *parents, last = path.split(".")
+    for part in parents:
+        doc = _get_path(doc, part)
+        if not isinstance(doc, (dict, list)):
+            return
+    if isinstance(doc, dict):
+        doc.pop(last, None)
+    elif last.isdigit() and int(last) < len(doc):
+        doc[int(last)] = None
+
+
+def _same(a, b):
+    """Égalité BSON : booléens distincts des nombres, ordre des clés des sous-documents compris."""
+    if isinstance(a, bool) or isinstance(b, bool):
+        return isinstance(a, bool) and isinstance(b, bool) and a == b
+    if isinstance(a, dict) and isinstance(b, dict):
+        return list(a) == list(b) and all(_same(a[k], b[k]) for k in a)
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(_same(x, y) for x, y in zip(a, b))
+    if isinstance(a, (dict, list)) or isinstance(b, (dict, list)):
+        return False
+    return a == b
+
+
+def _equals(value, operand):
+    if value is _MISSING:
+        return operand is None
+    if _same(value, operand):
+        return True
+    return isinstance(value, list) and any(_same(item, operand) for item in value)
+
+
+def _compare(value, operand, test):
+    """Comparaison d'ordre ; un tableau correspond si l'un de ses éléments correspond."""
+    for item in value if isinstance(value, list) else [value]:
+        if item is _MISSING or item is None or isinstance(item, bool) != isinstance(operand, bool):
+            continue
+        try:
+            if test(item, operand):
+                return True
+        except TypeError:  # types incomparables : pas de correspondance, comme en BSON
+            continue
+    return False
+
+
+def _match_condition(value, condition):
+    if not (isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition)):
+        if isinstance(condition, re.Pattern):
+            return isinstance(value, str) and condition.search(value) is not None
+        return _equals(value, condition)
+    for operator, operand in condition.items():
+        if operator == "$eq":
+            ok = _equals(value, operand)
+        elif operator == "$ne":
+            ok = not _equals(value, operand)
+        elif operator == "$gt":
+            ok = _compare(value, operand, lambda a, b: a > b)
+        elif operator == "$gte":
+            ok = _compare(value, operand, lambda a, b: a >= b)
+        elif operator == "$lt":
+            ok = _compare(value, operand, lambda a, b: a < b)
+        elif operator == "$lte":
+            ok = _compare(value, operand, lambda a, b: a <= b)
+        elif operator == "$in":
+            ok = any(_equals(value, item) for item in operand)
+        elif operator == "$nin":
+            ok = not any(_equals(value, item) for item in operand)
+        elif operator == "$exists":
+            ok = (value is not _MISSING) == bool(operand)
+        elif operator == "$not":
+            ok = not _match_condition(value, operand)
+        elif operator == "$size":
+            ok = isinstance(value, list) and len(value) == operand
+        elif operator == "$all":
+            ok = isinstance(value, list) and all(any(_same(x, item) for x in value) for item in operand)
+        elif operator == "$regex":
+            flags = re.IGNORECASE if "i" in condition.get("$options", "") else 0
+            ok = isinstance(value, str) and re.search(operand, value, flags) is not None
+        elif operator == "$options":
+            ok = True
+        elif operator == "$elemMatch":
+            ok = isinstance(value, list) and any(
+                _match(item, operand) if isinstance(item, dict) else _match_condition(item, operand)
+                for item in value
+            )
+        else:
+            raise NotImplementedError(f"Opérateur de requête non pris en charge en mémoire: {operator}")
+        if not ok:
+            return False
+    return True
+
+
+def _match(doc, query):
+    """Vrai si le document satisfait le filtre MongoDB."""
+    for key, condition in (query or {}).items():
+        if key == "$and":
+            ok = all(_match(doc, part) for part in condition)
+        elif key == "$or":
+            ok = any(_match(doc, part) for part in condition)
+        elif key == "$nor":
+            ok = not any(_match(doc, part) for part in condition)
+        elif key.startswith("$"):
+            raise NotImplementedError(f"Opérateur de requête non pris en charge en mémoire: {key}")
+        else:
+            ok = _match_condition(_get_path(doc, key), condition)
+        if not ok:
+            return False
+    return True
+
+
+def _apply_update(doc, update):
+    """Applique un document de mise à jour ($set, $inc, $push...) en place."""
+    for operator, fields in update.items():
+        for path, operand in fields.items():
+            current = _get_path(doc, path)
+            if operator == "$set":
+                _set_path(doc, path, copy.deepcopy(operand))
+            elif operator == "$unset":
+                _unset_path(doc, path)
+            elif operator == "$inc":
+                _set_path(doc, path, (0 if current is _MISSING else current) + operand)
+            elif operator == "$mul":
+                _set_path(doc, path, (0 if current is _MISSING else current) * operand)
+            elif operator in ("$min", "$max"):
+                better = min if operator == "$min" else max
+                _set_path(doc, path, operand if current is _MISSING else better(current, operand))
+            elif operator in ("$push", "$addToSet"):
+                items = operand["$each"] if isinstance(operand, dict) and "$each" in operand else [operand]
+                array = [] if current is _MISSING else current
+                if not isinstance(array, list):
+                    raise ValueError(f"{operator} sur un champ qui n'est pas un tableau: {path}")
+                for item in copy.deepcopy(items):
+                    if operator == "$push" or not any(_same(item, x) for x in array):
+                        array.append(item)
+                _set_path(doc, path, array)
+            elif operator == "$pull":
+                if isinstance(current, list):
+                    _set_path(doc, path, [item for item in current if not (
+                        _match(item, operand) if isinstance(operand, dict) and isinstance(item, dict)
+                        else _match_condition(item, operand)
+                    )])
+            else:
+                raise NotImplementedError(f"Opérateur de mise à jour non pris en charge en mémoire: {operator}")
+
+
+def _upsert_seed(query):
+    """Document de départ d'un upsert : les égalités simples du filtre."""
+    seed = {}
+    for key, condition in query.items():
+        if key.startswith("$"):
+            continue
+        if isinstance(condition, dict) and set(condition) == {"$eq"}:
+            condition = condition["$eq"]
+        if not (isinstance(condition, dict) and any(k.startswith("$") for k in condition)):
+            _set_path(seed, key, copy.deepcopy(condition))
+    return seed
+
+
+def _project(doc, projection):
+    """Projection de find() ; `doc` doit être une copie, les exclusions la modifient en place."""
+    if not projection:
+        return doc
+    if isinstance(projection, (list, tuple)):
+        projection = dict.fromkeys(projection, 1)
+    include_id = projection.get("_id", 1)
+    fields = {k: v for k, v in projection.items() if k != "_id"}
+    if fields and all(fields.values()):
+        # Champs dans l'ordre du document, _id en tête comme le renvoie MongoDB
+        order = {name: i for i, name in enumerate(doc)}
+        result = {"_id": doc["_id"]} if include_id and "_id" in doc else {}
+        for path in sorted(fields, key=lambda p: order.get(p.split(".")[0], len(order))):
+            value = _get_path(doc, path)
+            if value is not _MISSING:
+                _set_path(result, path, value)
+        return result
+    result = doc
+    for path in fields:
+        _unset_path(result, path)
+    if not include_id:
+        result.pop("_id", None)
+    return result
+
+
+# Ordre de comparaison des types BSON (null < nombres < textes < objets < tableaux < ...)
+def _sort_key(value):
+    if value is _MISSING or value is None:
+        return (0, 0)
+    if isinstance(value, bool):
+        return (8, value)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    if isinstance(value, str):
+        return (2, value)
+    if isinstance(value, dict):
+        return (3, str(value))
+    if isinstance(value, list):
+        return (4, str(value))
+    if isinstance(value, datetime):
+        return (9, value)
+    return (7, str(value))
+
+
+# --- Agrégation : expressions, accumulateurs et étapes ---
+
+def _truthy(value):
+    """Vérité d'une expression : null, absent, false et 0 sont faux (pas "" ni [])."""
+    if value is _MISSING or value is None or value is False:
+        return False
+    return not (_is_number(value) and value == 0)
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_null(value):
+    return value is _MISSING or value is None
+
+
+def _expr_compare(a, b):
+    """-1 / 0 / 1 selon l'ordre BSON ; absent < null < reste."""
+    if a is _MISSING or b is _MISSING:
+        return (a is not _MISSING) - (b is not _MISSING)
+    if _same(a, b):
+        return 0
+    return -1 if _sort_key(a) < _sort_key(b) else 1
+
+
+_EXPR_COMPARISONS = {
+    "$eq": lambda order: order == 0,
+    "$ne": lambda order: order != 0,
+    "$gt": lambda order: order > 0,
+    "$gte": lambda order: order >= 0,
+    "$lt": lambda order: order < 0,
+    "$lte": lambda order: order <= 0,
+}
+
+
+def _evaluate(expr, doc, variables=None):
+    """Valeur d'une expression ('$champ', '$$variable', littéral, {'$opérateur': ...}) ou _MISSING."""
+    if isinstance(expr, str) and expr.startswith("$$"):
+        name, _, path = expr[2:].partition(".")
+        value = doc if name in ("ROOT", "CURRENT") else (variables or {}).get(name, _MISSING)
+        return _get_path(value, path) if path and value is not _MISSING else value
+    if isinstance(expr, str) and expr.startswith("$"):
+        return _get_path(doc, expr[1:])
+    if isinstance(expr, list):
+        return [None if v is _MISSING else v for v in (_evaluate(item, doc, variables) for item in expr)]
+    if isinstance(expr, dict):
+        if len(expr) == 1 and next(iter(expr)).startswith("$"):
+            operator, operand = next(iter(expr.items()))
+            return _operator(operator, operand, doc, variables)
+        result = {}
+        for key, value in expr.items():
+            value = _evaluate(value, doc, variables)
+            if value is not _MISSING:
+                result[key] = value
+        return result
+    return expr
+
+
+def _operator(operator, operand, doc, variables):
+    if operator == "$literal":
+        return operand
+    if operator == "$cond":
+        if isinstance(operand, dict):
+            operand = [operand["if"], operand["then"], operand["else"]]
+        test, then, otherwise = operand
+        return _evaluate(then if _truthy(_evaluate(test, doc, variables)) else otherwise, doc, variables)
+    if operator == "$filter":
+        items = _evaluate(operand["input"], doc, variables)
+        if _is_null(items):
+            return None
+        name = operand.get("as", "this")
+        return [item for item in items
+                if _truthy(_evaluate(operand["cond"], doc, {**(variables or {}), name: item}))]
+    args = [_evaluate(arg, doc, variables) for arg in (operand if isinstance(operand, list) else [operand])]
+    if operator in _EXPR_COMPARISONS:
+        return _EXPR_COMPARISONS[operator](_expr_compare(*args))
+    if operator == "$ifNull":
+        return next((arg for arg in args[:-1] if not _is_null(arg)), args[-1])
+    if operator == "$and":
+        return all(_truthy(arg) for arg in args)
+    if operator == "$or":
+        return any(_truthy(arg) for arg in args)
+    if operator == "$not":
+        return not _truthy(args[0])
+    if operator == "$in":
+        value, array = args
+        return any(_same(value, item) for item in array)
+    if operator == "$size":
+        if not isinstance(args[0], list):
+            raise ValueError(f"$size attend un tableau, reçu {args[0]!r}")
+        return len(args[0])
+    if operator in ("$sum", "$avg", "$min", "$max"):
+        values = args[0] if len(args) == 1 and isinstance(args[0], list) else args
+        return _accumulate(operator, values)
+    if operator in ("$add", "$subtract", "$multiply", "$divide", "$mod"):
+        if any(_is_null(arg) for arg in args):
+            return None
+        if operator == "$add":
+            return sum(args)
+        if operator == "$multiply":
+            return math.prod(args)
+        a, b = args
+        return {"$subtract": lambda: a - b, "$divide": lambda: a / b, "$mod": lambda: math.fmod(a, b)}[operator]()
+    if operator == "$round":
+        value, places = (args + [0])[:2]
+        return None if _is_null(value) else round(value, places)
+    if operator == "$concat":
+        return None if any(_is_null(arg) for arg in args) else "".join(args)
+    if operator in ("$toLower", "$toUpper"):
+        text = "" if _is_null(args[0]) else str(args[0])
+        return text.lower() if operator == "$toLower" else text.upper()
+    if operator in ("$year", "$month", "$dayOfMonth"):
+        attribute = {"$year": "year", "$month": "month", "$dayOfMonth": "day"}[operator]
+        return None if _is_null(args[0]) else getattr(args[0], attribute)
+    raise NotImplementedError(f"Opérateur d'expression non pris en charge en mémoire: {operator}")
+
+
+def _accumulate(operator, values):
+    """Accumulateur de $group sur les valeurs d'un groupe, dans l'ordre d'entrée."""
+    present = [v for v in values if v is not _MISSING]
+    if operator == "$sum":
+        return sum(v for v in present if _is_number(v))
+    if operator == "$avg":
+        numbers = [v for v in present if _is_number(v)]
+        return sum(numbers) / len(numbers) if numbers else None
+    if operator in ("$min", "$max"):
+        candidates = [v for v in present if v is not None]
+        if not candidates:
+            return None
+        return (min if operator == "$min" else max)(candidates, key=_sort_key)
+    if operator in ("$stdDevSamp", "$stdDevPop"):
+        numbers = [v for v in present if _is_number(v)]
+        if operator == "$stdDevSamp":
+            return statistics.stdev(numbers) if len(numbers) > 1 else None
+        return statistics.pstdev(numbers) if numbers else None
+    if operator in ("$first", "$last"):
+        value = values[0 if operator == "$first" else -1] if values else None
+        return None if value is _MISSING else value
+    if operator == "$push":
+        return present
+    if operator == "$addToSet":
+        unique = []
+        for value in present:
+            if not any(_same(value, u) for u in unique):
+                unique.append(value)
+        return unique
+    raise NotImplementedError(f"Accumulateur non pris en charge en mémoire: {operator}")
+
+
+def _group_marker(value):
+    """Clé hachable d'un _id de groupe : 1 et 1.0 se confondent, True et 1 non."""
+    if isinstance(value, bool):
+        return ("bool", value)
+    if _is_number(value):
+        return ("number", float(value))
+    if isinstance(value, dict):
+        return ("object", tuple((k, _group_marker(v)) for k, v in value.items()))
+    if isinstance(value, list):
+        return ("array", tuple(_group_marker(v) for v in value))
+    return (type(value).__name__, value)
+
+
+def _group(docs, spec):
+    groups = {}
+    for doc in docs:
+        key = _evaluate(spec["_id"], doc)
+        key = None if key is _MISSING else key
+        groups.setdefault(_group_marker(key), (key, []))[1].append(doc)
+    results = []
+    for key, members in groups.values():
+        result = {"_id": key}
+        for name, accumulator in spec.items():
+            if name == "_id":
+                continue
+            (operator, expression), = accumulator.items()
+            if operator == "$count":
+                result[name] = len(members)
+            else:
+                result[name] = _accumulate(operator, [_evaluate(expression, doc) for doc in members])
+        results.append(result)
+    return results
+
+
+def _project_stage(doc, spec):
+    """$project : inclusions (1), exclusions (0) ou expressions calculées."""
+    fields = {k: v for k, v in spec.items() if k != "_id"}
+    if fields and all(v in (0, False) for v in fields.values()) or spec == {"_id": 0}:
+        return _project(doc, spec)
+    result = {}
+    if spec.get("_id", 1) not in (0, False) and "_id" in doc:
+        result["_id"] = doc["_id"] if spec.get("_id", 1) in (1, True) else _evaluate(spec["_id"], doc)
+    for path, expr in fields.items():
+        value = _get_path(doc, path) if expr in (1, True) else _evaluate(expr, doc)
+        if value is not _MISSING:
+            _set_path(result, path, value)
+    return result
+
+
+def _unwind(docs, spec):
+    spec = {"path": spec} if isinstance(spec, str) else spec
+    path = spec["path"][1:]
+    keep = spec.get("preserveNullAndEmptyArrays", False)
+    results = []
+    for doc in docs:
+        value = _get_path(doc, path)
+        if isinstance(value, list) and value:
+            for item in value:
+                unwound = copy.deepcopy(doc)
+                _set_path(unwound, path, item)
+                results.append(unwound)
+        elif keep or not (_is_null(value) or isinstance(value, list)):
+            results.append(doc)
+    return results
+
+
+def _aggregate(collection, pipeline):
+    """Exécute le pipeline sur des copies des documents ; renvoie la liste des résultats."""
+    if pipeline and "$match" in pipeline[0]:
+        docs = collection._find(pipeline.pop(0)["$match"])
+    else:
+        docs = collection._find({})
+    docs = copy.deepcopy(docs)
+    for stage in pipeline:
+        (name, spec), = stage.items()
+        if name == "$match":
+            docs = [doc for doc in docs if _match(doc, spec)]
+        elif name == "$group":
+            docs = _group(docs, spec)
+        elif name == "$project":
+            docs = [_project_stage(doc, spec) for doc in docs]
+        elif name in ("$addFields", "$set"):
+            for doc in docs:
+                values = {path: _evaluate(expr, doc) for path, expr in spec.items()}
+                for path, value in values.items():
+                    if value is not _MISSING:
+                        _set_path(doc, path, value)
+        elif name == "$unset":
+            for doc in docs:
+                for path in [spec] if isinstance(spec, str) else spec:
+                    _unset_path(doc, path)
+        elif name == "$unwind":
+            docs = _unwind(docs, spec)
+        elif name == "$sort":
+            docs = _sorted(docs, spec.items())
+        elif name == "$skip":
+            docs = docs[spec:]
+        elif name == "$limit":
+            docs = docs[:spec]
+        elif name == "$sample":
+            docs = random.sample(docs, min(spec["size"], len(docs)))
+        elif name == "$count":
+            docs = [{spec: len(docs)}] if docs else []
+        elif name == "$out":
+            collection.database[spec]._replace_all(docs)
+            docs = []
+        else:
+            raise NotImplementedError(f"Étape d'agrégation non prise en charge en mémoire: {name}")
+    return docs
+
+
+class InsertOneResult:
+    def __init__(self, inserted_id):
+        self.inserted_id = inserted_id
+        self.acknowledged = True
+
+
+class InsertManyResult:
+    def __init__(self, inserted_ids):
+        self.inserted_ids = inserted_ids
+        self.acknowledged = True
+
+
+class UpdateResult:
+    def __init__(self, matched_count, modified_count, upserted_id=None):
+        self.matched_count = matched_count
+        self.modified_count = modified_count
+        self.upserted_id = upserted_id
+        self.acknowledged = True
+
+
+class DeleteResult:
+    def __init__(self, deleted_count):
+        self.deleted_count = deleted_count
+        self.acknowledged = True
+
+
+class BulkWriteResult:
+    def __init__(self, bulk_api_result):
+        self.bulk_api_result = bulk_api_result
+        self.inserted_count = bulk_api_result["nInserted"]
+        self.matched_count = bulk_api_result["nMatched"]
+        self.modified_count = bulk_api_result["nModified"]
+        self.deleted_count = bulk_api_result["nRemoved"]
+        self.upserted_count = bulk_api_result["nUpserted"]
+        self.upserted_ids = {u["index"]: u["_id"] for u in bulk_api_result["upserted"]}
+        self.acknowledged = True
+
+
+class _DuplicateKey(Exception):
+    """_id déjà présent ; args = (message, _id), converti en erreur pymongo par l'appelant."""
+
+
+class _DuplicateKeyError(ValueError):
+    """DuplicateKeyError sans pymongo : mêmes attributs code et details."""
+
+    def __init__(self, error, code=None, details=None):
+        super().__init__(error)
+        self.code = code
+        self.details = details
+
+
+class _BulkWriteError(ValueError):
+    """BulkWriteError sans pymongo : même attribut details."""
+
+    def __init__(self, results):
+        super().__init__("batch op errors occurred")
+        self.code = 65
+        self.details = results
+
+
+def _errors():
+    """{nom: exception} : celles de pymongo s'il est installé (importé au premier usage), sinon les locales."""
+    try:
+        from pymongo.errors import BulkWriteError, DuplicateKeyError
+    except ImportError:  # pymongo absent
+        return {"DuplicateKeyError": _DuplicateKeyError, "BulkWriteError": _BulkWriteError}
+    return {"DuplicateKeyError": DuplicateKeyError, "BulkWriteError": BulkWriteError}
+
+
+def __getattr__(name):
+    # from helpers.mongo_memory import BulkWriteError, sans importer pymongo avec le module
+    if name not in ("DuplicateKeyError", "BulkWriteError"):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    errors = _errors()
+    globals().update(errors)
+    return errors[name]
+
+
+def _duplicate_key_error(message, _id):
+    return _errors()["DuplicateKeyError"](message, 11000, {"code": 11000, "errmsg": message, "keyValue": {"_id": _id}})
+
+
+@contextlib.contextmanager
+def _duplicate_keys():
+    try:
+        yield
+    except _DuplicateKey as e:
+        raise _duplicate_key_error(*e.args) from None
+
+
+def _bulk_result():
+    return {"writeErrors": [], "writeConcernErrors": [], "nInserted": 0, "nUpserted": 0,
+            "nMatched": 0, "nModified": 0, "nRemoved": 0, "upserted": []}
+
+
+def _write_error(index, message, _id, operation):
+    return {"index": index, "code": 11000, "errmsg": message, "keyValue": {"_id": _id}, "op": operation}
+
+
+class _Operation:
+    """Opération de bulk_write sans pymongo : mêmes attributs que pymongo.operations."""
+
+    def __init__(self, filter=None, doc=None, upsert=False):
+        self._filter = filter
+        self._doc = doc
+        self._upsert = upsert
+
+
+class InsertOne(_Operation):
+    def __init__(self, document):
+        super().__init__(doc=document)
+
+
+class ReplaceOne(_Operation):
+    def __init__(self, filter, replacement, upsert=False):
+        super().__init__(filter, replacement, upsert)
+
+
+class UpdateOne(_Operation):
+    def __init__(self, filter, update, upsert=False):
+        super().__init__(filter, update, upsert)
+
+
+class UpdateMany(UpdateOne):
+    pass
+
+
+class DeleteOne(_Operation):
+    def __init__(self, filter):
+        super().__init__(filter)
+
+
+class DeleteMany(DeleteOne):
+    pass
+
+
+def _sorted(docs, keys):
+    """Tris stables successifs, de la dernière clé à la première."""
+    for key, direction in reversed(list(keys)):
+        docs.sort(key=lambda doc: _sort_key(_get_path(doc, key)), reverse=direction < 0)
+    return docs
+
+
+class MemoryCursor:
+    """Curseur de find() : sort / skip / limit paresseux, documents copiés à la lecture."""
+
+    def __init__(self, collection, query, projection):
+        self._collection = collection
+        self._query = query
+        self._projection = projection
+        self._sort = []
+        self._skip = 0
+        self._limit = 0
+        self._iterator = None
+
+    def sort(self, key_or_list, direction=1):
+        if isinstance(key_or_list, str):
+            key_or_list = [(key_or_list, direction)]
+        self._sort = list(key_or_list.items() if isinstance(key_or_list, dict) else key_or_list)
+        return self
+
+    def skip(self, count):
+        self._skip = count
+        return self
+
+    def limit(self, count):
+        self._limit = count
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    def _documents(self):
+        docs = _sorted(self._collection._find(self._query), self._sort)
+        end = self._skip + self._limit if self._limit else None
+        for doc in docs[self._skip:end]:
+            yield _project(copy.deepcopy(doc), self._projection)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._iterator is None:
+            self._iterator = self._documents()
+        return next(self._iterator)
+
+    def to_list(self, length=None):
+        return list(itertools.islice(self, length))
+
+    def close(self):
+        self._iterator = iter(())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class MemoryCommandCursor:
+    """Curseur d'aggregate() : résultats calculés à l'appel, lus au fil de l'itération."""
+
+    def __init__(self, documents):
+        self._iterator = iter(documents)
+
+    def batch_size(self, size):
+        return self
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._iterator)
+
+    next = __next__
+
+    def to_list(self, length=None):
+        return list(itertools.islice(self, length))
+
+    def close(self):
+        self._iterator = iter(())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class MemoryCollection:
+    def __init__(self, database, name):
+        self.database = database
+        self.name = name
+        self.full_name = f"{database.name}.{name}"
+        self._docs = {}  # _id -> document, dans l'ordre d'insertion
+        self._indexes = {"_id_": {"key": [("_id", 1)]}}
+        self._lock = threading.RLock()
+
+    def __getitem__(self, name):
+        return self.database[f"{self.name}.{name}"]
+
+    def _find(self, query):
+        with self._lock:
+            return [doc for doc in self._docs.values() if _match(doc, query)]
+
+    def _insert(self, document):
+        if "_id" not in document:
+            document["_id"] = _object_id()  # comme pymongo, qui complète le document inséré
+        key = repr(document["_id"])
+        if key in self._docs:
+            message = f"E11000 duplicate key error collection: {self.full_name} index: _id_ dup key: {{ _id: {document['_id']!r} }}"
+            raise _DuplicateKey(message, document["_id"])
+        # _id en premier champ, comme le stocke le serveur
+        doc = {"_id": copy.deepcopy(document["_id"])}
+        doc.update((k, copy.deepcopy(v)) for k, v in document.items() if k != "_id")
+        self._docs[key] = doc
+        self.database._created(self.name)
+        return doc["_id"]
+
+    def insert_one(self, document):
+        with self._lock, _duplicate_keys():
+            return InsertOneResult(self._insert(document))
+
+    def insert_many(self, documents, ordered=True):
+        result = _bulk_result()
+        inserted_ids = []
+        with self._lock:
+            for index, document in enumerate(documents):
+                try:
+                    inserted_ids.append(self._insert(document))
+                    result["nInserted"] += 1
+                except _DuplicateKey as e:
+                    result["writeErrors"].append(_write_error(index, *e.args, document))
+                    if ordered:
+                        break
+        if result["writeErrors"]:
+            raise _errors()["BulkWriteError"](result)
+        return InsertManyResult(inserted_ids)
+
+    def find(self, filter=None, projection=None):
+        return MemoryCursor(self, filter or {}, projection)
+
+    def find_one(self, filter=None, projection=None):
+        if filter is not None and not isinstance(filter, dict):
+            filter = {"_id": filter}
+        return next(self.find(filter, projection).limit(1), None)
+
+    def count_documents(self, filter, skip=0, limit=0):
+        count = max(len(self._find(filter)) - skip, 0)
+        return min(count, limit) if limit else count
+
+    def estimated_document_count(self):
+        return len(self._docs)
+
+    def distinct(self, key, filter=None):
+        values = []
+        for doc in self._find(filter or {}):
+            value = _get_path(doc, key)
+            for item in value if isinstance(value, list) else [value]:
+                if item is not _MISSING and not any(_same(item, v) for v in values):
+                    values.append(item)
+        return values
+
+    def _update(self, filter, update, many, upsert, replace=False):
+        if not replace and not all(k.startswith("$") for k in update):
+            raise ValueError("Le document de mise à jour doit utiliser des opérateurs ($set, $inc...)")
+        with self._lock:
+            matched = self._find(filter)
+            if not many:
+                matched = matched[:1]
+            modified = 0
+            for doc in matched:
+                before = copy.deepcopy(doc)
+                if replace:
+                    doc.clear()
+                    doc["_id"] = before["_id"]
+                    doc.update((k, v) for k, v in copy.deepcopy(update).items() if k != "_id")
+                else:
+                    _apply_update(doc, update)
+                modified += not _same(doc, before)
+            upserted_id = None
+            if not matched and upsert:
+                doc = _upsert_seed(filter)
+                if replace:
+                    doc = {**({"_id": doc["_id"]} if "_id" in doc else {}), **copy.deepcopy(update)}
+                else:
+                    _apply_update(doc, update)
+                upserted_id = self._insert(doc)
+            return UpdateResult(len(matched), modified, upserted_id)
+
+    def update_one(self, filter, update, upsert=False):
+        with _duplicate_keys():
+            return self._update(filter, update, many=False, upsert=upsert)
+
+    def update_many(self, filter, update, upsert=False):
+        with _duplicate_keys():
+            return self._update(filter, update, many=True, upsert=upsert)
+
+    def replace_one(self, filter, replacement, upsert=False):
+        with _duplicate_keys():
+            return self._update(filter, replacement, many=False, upsert=upsert, replace=True)
+
+    def _delete(self, filter, many):
+        with self._lock:
+            matched = self._find(filter)
+            if not many:
+                matched = matched[:1]
+            for doc in matched:
+                del self._docs[repr(doc["_id"])]
+            return DeleteResult(len(matched))
+
+    def delete_one(self, filter):
+        return self._delete(filter, many=False)
+
+    def delete_many(self, filter):
+        return self._delete(filter, many=True)
+
+    def bulk_write(self, requests, ordered=True):
+        """InsertOne / UpdateOne / UpdateMany / ReplaceOne / DeleteOne / DeleteMany de pymongo."""
+        result = _bulk_result()
+        with self._lock:
+            for index, request in enumerate(requests):
+                try:
+                    self._bulk_apply(index, request, result)
+                except _DuplicateKey as e:
+                    result["writeErrors"].append(_write_error(index, *e.args, getattr(request, "_doc", None)))
+                    if ordered:
+                        break
+        if result["writeErrors"]:
+            raise _errors()["BulkWriteError"](result)
+        return BulkWriteResult(result)
+
+    def _bulk_apply(self, index, request, result):
+        kind = type(request).__name__
+        if kind == "InsertOne":
+            self._insert(request._doc)
+            result["nInserted"] += 1
+        elif kind in ("UpdateOne", "UpdateMany", "ReplaceOne"):
+            outcome = self._update(request._filter, request._doc, many=kind == "UpdateMany",
+                                   upsert=bool(request._upsert), replace=kind == "ReplaceOne")
+            result["nMatched"] += outcome.matched_count
+            result["nModified"] += outcome.modified_count
+            if outcome.upserted_id is not None:
+                result["nUpserted"] += 1
+                result["upserted"].append({"index": index, "_id": outcome.upserted_id})
+        elif kind in ("DeleteOne", "DeleteMany"):
+            result["nRemoved"] += self._delete(request._filter, many=kind == "DeleteMany").deleted_count
+        else:
+            raise NotImplementedError(f"Opération bulk_write non prise en charge en mémoire: {kind}")
+
+    def aggregate(self, pipeline, **kwargs):
+        """Pipeline d'agrégation (voir _aggregate) ; allowDiskUse, batchSize... sont ignorés."""
+        return MemoryCommandCursor(_aggregate(self, list(pipeline)))
+
+    def _replace_all(self, docs):
+        """Cible d'un $out : documents remplacés, index conservés."""
+        with self._lock:
+            self._docs = {}
+            for doc in docs:
+                self._insert(doc)
+            self.database._created(self.name)
+
+    def create_index(self, keys, **kwargs):
+        """Enregistre l'index (index_information) ; les recherches restent des parcours complets."""
+        if isinstance(keys, str):
+            keys = [(keys, 1)]
+        name = kwargs.pop("name", None) or "_".join(f"{field}_{direction}" for field, direction in keys)
+        with self._lock:
+            self._indexes[name] = {"key": list(keys), **kwargs}
+        return name
+
+    def index_information(self):
+        return copy.deepcopy(self._indexes)
+
+    def drop_index(self, name):
+        self._indexes.pop(name, None)
+
+    def drop(self):
+        self.database.drop_collection(self.name)
+
+
+class MemoryDatabase:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+        self._collections = {}
+        self._existing = set()
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name):
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = MemoryCollection(self, name)
+            return self._collections[name]
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def get_collection(self, name):
+        return self[name]
+
+    def create_collection(self, name):
+        self._created(name)
+        return self[name]
+
+    def _created(self, name):
+        self._existing.add(name)
+
+    def list_collection_names(self):
+        return sorted(self._existing)
+
+    def drop_collection(self, name):
+        name = getattr(name, "name", name)
+        with self._lock:
+            self._collections.pop(name, None)
+            self._existing.discard(name)
+
+    def command(self, command, *args, **kwargs):
+        name = command if isinstance(command, str) else next(iter(command))
+        if name == "ping":
+            return {"ok": 1.0}
+        if name == "explain" and "find" in command["explain"]:
+            return self._explain_find(command["explain"])
+        raise NotImplementedError(f"Commande non prise en charge par le backend mémoire: {name}")
+
+
+    def _explain_find(self, find):
+        """explain("executionStats") d'un find : toujours un parcours complet (COLLSCAN)."""
+        collection = self[find["find"]]
+        start = time.perf_counter()
+        cursor = collection.find(find.get("filter"), find.get("projection"))
+        if find.get("sort"):
+            cursor.sort(find["sort"])
+        returned = len(cursor.skip(find.get("skip", 0)).limit(find.get("limit", 0)).to_list())
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        plan = {"stage": "COLLSCAN", "filter": find.get("filter") or {}, "direction": "forward"}
+        if find.get("sort"):
+            plan = {"stage": "SORT", "sortPattern": find["sort"], "inputStage": plan}
+        return {
+            "queryPlanner": {"namespace": collection.full_name, "winningPlan": plan, "rejectedPlans": []},
+            "executionStats": {
+                "executionSuccess": True,
+                "nReturned": returned,
+                "executionTimeMillis": round(elapsed_ms),
+                "totalKeysExamined": 0,
+                "totalDocsExamined": collection.estimated_document_count(),
+                "executionStages": plan,
+            },
+            "ok": 1.0,
+        }
+
+
+class MemoryClient:
+    """Client en mémoire : même accès client[base][collection] que MongoClient."""
+
+    def __init__(self, uri=MEMORY_URI, **kwargs):
+        self.uri = uri
+        self._databases = {}
+        self._lock = threading.Lock()
+        self.admin = self["admin"]
+
+    def __getitem__(self, name):
+        with self._lock:
+            if name not in self._databases:
+                self._databases[name] = MemoryDatabase(self, name)
+            return self._databases[name]
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def get_database(self, name):
+        return self[name]
+
+    def list_database_names(self):
+        return sorted(name for name, db in self._databases.items() if db.list_collection_names())
+
+    def drop_database(self, name):
+        name = getattr(name, "name", name)
+        with self._lock:
+            self._databases.pop(name, None)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
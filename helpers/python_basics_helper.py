@@ -5,23 +5,12 @@ Système d'aide pour les exercices Python de base
 Version simplifiée sans boucles infinies
 """
 
-import subprocess
-import sys
+import importlib.util
 
-# Imports conditionnels pour Jupyter
-try:
-    import ipywidgets as widgets
-    from IPython.display import HTML, display
-    JUPYTER_AVAILABLE = True
-except ImportError:
-    JUPYTER_AVAILABLE = False
-    # Fonctions de remplacement pour le mode console
-    def display(content):
-        print(content)
-    
-    class HTML:
-        def __init__(self, content):
-            self.content = content
+# Détection de Jupyter sans importer ipywidgets/IPython (importés à la demande)
+JUPYTER_AVAILABLE = all(
+    importlib.util.find_spec(module) is not None for module in ("ipywidgets", "IPython")
+)
 
 def install_python_basics_packages():
     """Installe les packages nécessaires pour le notebook Python basique."""
@@ -30,12 +19,8 @@ def install_python_basics_packages():
     print("🚀 Installation des packages pour Python...")
     print("📝 Note: Les modules de base Python ne nécessitent pas d'installation")
     
-    for package in packages:
-        try:
-            subprocess.check_call([sys.executable, "-m", "pip", "install", package])
-            print(f"✅ {package} installé avec succès")
-        except subprocess.CalledProcessError:
-            print(f"❌ Erreur lors de l'installation de {package}")
+    from helpers.deps_helper import ensure_packages
+    ensure_packages(packages)
     
     print("\n✨ Installation terminée ! Vous pouvez maintenant continuer les exercices.")
 
@@ -232,6 +217,7 @@ emp1.changer_departement("DevOps")""",
         help_data = self.helps[step]
         
         if JUPYTER_AVAILABLE:
+            from IPython.display import HTML, display
             # Version Jupyter avec HTML
             html_hint = f"""
             <details style="margin: 10px 0; border: 1px solid #ddd; border-radius: 5px; padding: 5px; background: #f9f9f9;">
@@ -268,6 +254,7 @@ emp1.changer_departement("DevOps")""",
     def solution(self, code, explanation=""):
         """Affiche une solution"""
         if JUPYTER_AVAILABLE:
+            from IPython.display import HTML, display
             html = f"""
             <details style="margin: 10px 0; border: 1px solid #ddd; border-radius: 5px; padding: 5px;">
                 <summary style="cursor: pointer; background: #fff3e0; padding: 10px; border-radius: 3px; font-weight: bold;">
@@ -289,6 +276,7 @@ emp1.changer_departement("DevOps")""",
     def hint(self, text):
         """Affiche un conseil"""
         if JUPYTER_AVAILABLE:
+            from IPython.display import HTML, display
             html = f"""
             <details style="margin: 10px 0; border: 1px solid #ddd; border-radius: 5px; padding: 5px;">
                 <summary style="cursor: pointer; background: #fff3e0; padding: 10px; border-radius: 3px; font-weight: bold;">
@@ -306,6 +294,7 @@ emp1.changer_departement("DevOps")""",
     def success(self, message):
         """Affiche un message de succès"""
         if JUPYTER_AVAILABLE:
+            from IPython.display import HTML, display
             html = f"""
             <div style="background: linear-gradient(90deg, #FF9800, #F57C00); color: white; padding: 15px; border-radius: 10px; margin: 10px 0; text-align: center; font-weight: bold; font-size: 16px;">
                 🐍 {message} 🐍
@@ -315,12 +304,25 @@ emp1.changer_departement("DevOps")""",
         else:
             print(f"🎉 {message} 🎉")
 
-# Chargement automatique
-print("🚀 Chargement du système d'aide Python...")
-helper = PythonBasicsHelper()
+def load_python_basics_helper():
+    """Charge le système d'aide Python et l'expose sous le nom `helper`."""
+    print("🚀 Chargement du système d'aide Python...")
+    helper = PythonBasicsHelper()
+
+    # Création des boutons seulement dans Jupyter
+    if not JUPYTER_AVAILABLE:
+        print("📚 Système d'aide Python chargé (mode console)")
+        print("✨ Utilisez helper.help('1.1.1') pour obtenir de l'aide")
+        return helper
+
+    import ipywidgets as widgets
+    from IPython import get_ipython
+    from IPython.display import display
+
+    ip = get_ipython()
+    if ip is not None:
+        ip.user_ns['helper'] = helper
 
-# Création des boutons seulement dans Jupyter
-if JUPYTER_AVAILABLE:
     # Bouton d'installation
     install_output = widgets.Output()
     install_button = widgets.Button(
@@ -345,6 +347,9 @@ if JUPYTER_AVAILABLE:
     print("  • helper.hint('conseil') - Afficher un conseil")
 
     display(widgets.VBox([install_button, install_output]))
-else:
-    print("📚 Système d'aide Python chargé (mode console)")
-    print("✨ Utilisez helper.help('1.1.1') pour obtenir de l'aide")
\ No newline at end of file
+    return helper
+
+
+if __name__ == "__main__":
+    # Compatibilité avec exec(open('helpers/python_basics_helper.py').read())
+    helper = load_python_basics_helper()
@@ -1,13 +1,18 @@
 
-import subprocess
-import sys
-import ipywidgets as widgets
-import pandas as pd
-import numpy as np
 import random
 from datetime import datetime, timedelta
-from IPython.display import HTML, display
-from IPython import get_ipython
+
+from helpers._lazy import lazy_getattr
+
+# pandas, numpy, ipywidgets et IPython ne sont importés qu'au premier usage
+__getattr__ = lazy_getattr(__name__, {
+    "pd": "pandas",
+    "np": "numpy",
+    "widgets": "ipywidgets",
+    "HTML": "IPython.display:HTML",
+    "display": "IPython.display:display",
+    "get_ipython": "IPython:get_ipython",
+})
 
 def install_packages():
     """Installe les packages nécessaires pour le notebook."""
@@ -22,12 +27,8 @@ def install_packages():
     print("🚀 Démarrage de l'installation des packages...")
     print("Cette opération peut prendre quelques instants.")
     
-    for package in packages:
-        try:
-            subprocess.check_call([sys.executable, "-m", "pip", "install", package, "--quiet"])
-            print(f"✅ {package} installé.")
-        except subprocess.CalledProcessError:
-            print(f"❌ Erreur lors de l'installation de {package}.")
+    from helpers.deps_helper import ensure_packages
+    ensure_packages(packages)
             
     print("\\n✨ Installation terminée !")
     print("Si vous rencontrez des problèmes, essayez de redémarrer le noyau (Kernel).")
@@ -193,6 +194,7 @@ print("="*35)
     def _get_namespace(self):
         """Retourne le namespace utilisateur de Jupyter pour accéder aux variables du notebook."""
         try:
+            from IPython import get_ipython
             ip = get_ipython()
             if ip is not None and hasattr(ip, 'user_ns'):
                 return ip.user_ns
@@ -207,6 +209,7 @@ print("="*35)
             print(f"❌ Aide non trouvée pour l'étape {step}")
             return
         
+        from IPython.display import HTML, display
         help_data = self.helps[step]
         
         # Conseil caché
@@ -239,6 +242,8 @@ print("="*35)
 
     def auto_reset_toolbar(self):
         """Affiche une barre d'outils avec tous les resets disponibles"""
+        import ipywidgets as widgets
+        from IPython.display import display
         print("🔧 BARRE D'OUTILS DE RESET AUTOMATIQUE")
         print("="*50)
         
@@ -293,6 +298,8 @@ print("="*35)
             print(f"❌ Template non trouvé pour l'étape {step}")
             return
         
+        import ipywidgets as widgets
+        from IPython.display import display
         output = widgets.Output()
         button = widgets.Button(
             description=f"🔄 Reset {step}",
@@ -313,6 +320,7 @@ print("="*35)
         display(widgets.VBox([button, output]))
     
     def solution(self, code, explanation=""):
+        from IPython.display import HTML, display
         html = f"""
         <details style="margin: 10px 0; border: 1px solid #ddd; border-radius: 5px; padding: 5px;">
             <summary style="cursor: pointer; background: #f0f8ff; padding: 10px; border-radius: 3px; font-weight: bold;">
@@ -327,6 +335,7 @@ print("="*35)
         display(HTML(html))
     
     def hint(self, text):
+        from IPython.display import HTML, display
         html = f"""
         <details style="margin: 10px 0; border: 1px solid #ddd; border-radius: 5px; padding: 5px;">
             <summary style="cursor: pointer; background: #fff3e0; padding: 10px; border-radius: 3px; font-weight: bold;">
@@ -341,6 +350,7 @@ print("="*35)
     
     def _check_dataframe(self, df_name, min_rows=None, required_columns=None):
         try:
+            import pandas as pd
             ns = self._get_namespace()
             df = ns.get(df_name)
             
@@ -387,6 +397,8 @@ print("="*35)
             return False, f"❌ Erreur: {e}"
     
     def check_df_button(self, df_name, min_rows=None, required_columns=None):
+        import ipywidgets as widgets
+        from IPython.display import display
         output = widgets.Output()
         button = widgets.Button(
             description=f"📊 Vérifier {df_name}",
@@ -407,6 +419,8 @@ print("="*35)
         display(widgets.VBox([button, output]))
     
     def check_var_button(self, var_name, expected_type=None, min_length=None):
+        import ipywidgets as widgets
+        from IPython.display import display
         output = widgets.Output()
         button = widgets.Button(
             description=f"🔍 Vérifier {var_name}",
@@ -427,10 +441,13 @@ print("="*35)
         display(widgets.VBox([button, output]))
     
     def success(self, message):
+        from IPython.display import HTML, display
         html = self.success_style.format(message=message)
         display(HTML(html))
     
     def demo_button(self, demo_func, button_text="🎬 Voir la démonstration"):
+        import ipywidgets as widgets
+        from IPython.display import display
         output = widgets.Output()
         button = widgets.Button(
             description=button_text,
@@ -448,6 +465,7 @@ print("="*35)
 
 def load_helper():
     """Charge le système d'aide et l'assigne à une variable globale."""
+    from IPython import get_ipython
     if 'pandas_helper' not in get_ipython().user_ns:
         helper = PandasHelper()
         get_ipython().user_ns['pandas_helper'] = helper
@@ -456,3 +474,15 @@ def load_helper():
     else:
         print("✅ Le système d'aide est déjà chargé.")
 
+
+if __name__ == "__main__":
+    # Compatibilité avec exec(open('helpers/setup_helper.py').read()) :
+    # le notebook retrouve pd, np, widgets... dans son espace de noms
+    # (mais pas le __getattr__ paresseux, inutile hors d'un module)
+    del __getattr__
+    import ipywidgets as widgets
+    import pandas as pd
+    import numpy as np
+    from IPython.display import HTML, display
+    from IPython import get_ipython
+    load_helper()
@@ -1,14 +1,86 @@
-import subprocess
-import sys
-import ipywidgets as widgets
-import pandas as pd
-import numpy as np
 import sqlite3
 import os
 import random
+import threading
+import json
+import re
+import sys
+import time
 from datetime import datetime, timedelta
-from IPython.display import HTML, display
-from IPython import get_ipython
+
+from helpers._lazy import lazy_getattr
+
+# pandas, numpy, ipywidgets et IPython ne sont importés qu'au premier usage
+__getattr__ = lazy_getattr(__name__, {
+    "pd": "pandas",
+    "np": "numpy",
+    "widgets": "ipywidgets",
+    "HTML": "IPython.display:HTML",
+    "display": "IPython.display:display",
+    "get_ipython": "IPython:get_ipython",
+})
+
+# Nombre de requêtes préparées gardées en cache par connexion
+CACHED_STATEMENTS = 256
+
+# Profils de réglage pour SQLiteHelper.configure(). journal_mode et page_size
+# sont écrits dans le fichier ; les autres PRAGMA valent par connexion et sont
+# réappliqués à chaque reconnexion. busy_timeout laisse attendre un écrivain
+# d'un autre noyau au lieu d'échouer en "database is locked".
+PRAGMA_PROFILES = {
+    "read-heavy": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -262144,       # 256 Mio (négatif = en Kio)
+        "mmap_size": 1073741824,     # 1 Gio lus via mmap, sans copie
+        "temp_store": "MEMORY",
+        "page_size": 4096,
+        "busy_timeout": 5000,
+    },
+    "bulk-load": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -524288,       # 512 Mio
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+        "page_size": 16384,          # moins de pages à écrire pour les gros volumes
+        "busy_timeout": 5000,
+    },
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -65536,        # 64 Mio
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "page_size": 4096,
+        "busy_timeout": 5000,
+    },
+}
+
+# Instructions VM entre deux appels du progress handler pour QueryProfiler.attach :
+# une connexion existante ne peut pas être enveloppée, la fin d'une requête est
+# donc son dernier tick, relevé à chaque instruction pour que les requêtes
+# courtes des notebooks aient aussi une latence
+ATTACH_PROGRESS_STEP = 1
+
+# Lignes par INSERT multi-VALUES de bulk_load (borné par la limite de paramètres)
+BULK_ROWS_PER_STATEMENT = 500
+
+# Table annexe des statistiques (compteurs tenus à jour par triggers)
+STATS_TABLE = "_helper_stats"
+# Part de lignes modifiées depuis la dernière analyse au-delà de laquelle
+# les statistiques de colonnes sont signalées comme périmées
+STATS_STALE_RATIO = 0.1
+
+# Pages copiées par étape de sauvegarde : entre deux étapes le verrou de
+# lecture est relâché et les autres connexions avancent
+SNAPSHOT_PAGES = 1024
+
+# Valeurs numériques renvoyées par SQLite pour les PRAGMA à mots-clés
+_PRAGMA_CODES = {
+    "synchronous": {"OFF": 0, "NORMAL": 1, "FULL": 2, "EXTRA": 3},
+    "temp_store": {"DEFAULT": 0, "FILE": 1, "MEMORY": 2},
+}
 
 def install_sqlite_packages():
     """Installe les packages nécessaires pour le notebook SQLite."""
@@ -22,15 +94,398 @@ def install_sqlite_packages():
     print("🚀 Démarrage de l'installation des packages SQLite...")
     print("📝 Note: SQLite est inclus dans Python, aucune installation supplémentaire nécessaire")
     
-    for package in packages:
-        try:
-            subprocess.check_call([sys.executable, "-m", "pip", "install", package, "--quiet"])
-            print(f"✅ {package} installé.")
-        except subprocess.CalledProcessError:
-            print(f"❌ Erreur lors de l'installation de {package}.")
+    from helpers.deps_helper import ensure_packages
+    ensure_packages(packages)
             
     print("\\n✨ Installation terminée !")
 
+def _quote(identifier):
+    """Protège un nom de table ou de colonne pour SQL."""
+    return '"' + str(identifier).replace('"', '""') + '"'
+
+
+def _sql_type(dtype):
+    """Type de colonne SQLite correspondant à un dtype pandas."""
+    kind = getattr(dtype, "kind", "O")
+    if kind in "iub":
+        return "INTEGER"
+    if kind == "f":
+        return "REAL"
+    return "TEXT"
+
+
+def _column_values(series):
+    """Valeurs Python d'une colonne, prêtes à être liées à une requête SQLite.
+
+    Les dates deviennent du texte ISO 8601 (jour seul si aucune heure) et
+    les NaT des NULL ; les NaN sont stockés en NULL par SQLite, les pd.NA
+    (types nullables, colonnes objet) deviennent None.
+    """
+    import numpy as np
+    if series.dtype.kind == "M":
+        values = series.to_numpy()
+        unit = "D" if (series.dropna() == series.dropna().dt.normalize()).all() else "s"
+        text = np.datetime_as_string(values, unit=unit).astype(object)
+        text[np.isnat(values)] = None
+        return text.tolist()
+    values = series.tolist()
+    if not (isinstance(series.dtype, np.dtype) and series.dtype.kind in "biuf"):
+        # pd.NA ne peut pas être lié à une requête sqlite3
+        missing = np.flatnonzero(series.isna().to_numpy())
+        for i in missing:
+            values[i] = None
+    return values
+
+
+def _max_variables(conn):
+    """Nombre maximal de paramètres '?' par requête pour cette connexion."""
+    if hasattr(conn, "getlimit"):
+        return conn.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+    return 32766 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999
+
+
+def _numpy_column(values):
+    """Tableau NumPy d'une colonne de résultats : int64, float64 (NULL -> NaN) ou objets."""
+    import numpy as np
+    kinds = set(map(type, values))
+    if kinds <= {int}:
+        return np.array(values, dtype=np.int64)
+    if kinds <= {int, float, type(None)}:
+        return np.array(values, dtype=np.float64)
+    return np.array(values, dtype=object)
+
+
+def _arrow_column(values):
+    """Tableau Arrow d'une colonne de résultats (NULL natifs, entiers conservés)."""
+    import pyarrow as pa
+    kinds = set(map(type, values)) - {type(None)}
+    if kinds == {int}:
+        return pa.array(values, type=pa.int64())
+    if kinds <= {int, float} and kinds:
+        return pa.array(values, type=pa.float64())
+    if kinds == {str}:
+        return pa.array(values, type=pa.string())
+    return pa.array(values)
+
+_SQL_KEYWORDS = {
+    "WHERE", "JOIN", "ON", "GROUP", "ORDER", "LIMIT", "LEFT", "RIGHT", "INNER", "OUTER",
+    "CROSS", "NATURAL", "HAVING", "UNION", "USING",
+}
+_CLAUSE_END = r"(?=\bGROUP\s+BY\b|\bORDER\s+BY\b|\bLIMIT\b|\bHAVING\b|\bWHERE\b|\b(?:LEFT|INNER|CROSS|NATURAL)?\s*JOIN\b|$)"
+
+
+def _sql_clauses(sql):
+    """Découpe grossièrement une requête SELECT en clauses (hors sous-requêtes)."""
+    sql = re.sub(r"'(?:[^']|'')*'", "?", sql)
+    flags = re.IGNORECASE | re.DOTALL
+
+    def clause(pattern):
+        return " ".join(m.group(1) for m in re.finditer(pattern + r"(.*?)" + _CLAUSE_END, sql, flags))
+
+    select = re.search(r"\bSELECT\s+(DISTINCT\s+)?(.*?)\bFROM\b", sql, flags)
+    aliases = {}
+    for table, alias in re.findall(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", sql, flags):
+        aliases[table] = table
+        if alias and alias.upper() not in _SQL_KEYWORDS:
+            aliases[alias] = table
+    return {
+        "select": select.group(2) if select else "",
+        "distinct": bool(select and select.group(1)),
+        "where": clause(r"\bWHERE\b") + " " + clause(r"\bON\b"),
+        "group": clause(r"\bGROUP\s+BY\b"),
+        "order": clause(r"\bORDER\s+BY\b"),
+        "aliases": aliases,
+    }
+
+
+def _plan_issues(plan):
+    """Problèmes d'un EXPLAIN QUERY PLAN : scans complets, index automatiques, tris temporaires."""
+    issues = []
+    for row in plan:
+        detail = row[3]
+        scan = re.match(r"SCAN (\w+)(?: AS \w+)?$", detail)
+        if scan:
+            issues.append(("scan", scan.group(1), detail))
+        elif "AUTOMATIC" in detail:
+            issues.append(("automatique", detail.split()[1], detail))
+        elif detail.startswith("USE TEMP B-TREE"):
+            issues.append(("tri", None, detail))
+    return issues
+
+
+def _time_query(conn, sql, params, repeat):
+    """Temps médian (secondes) d'une requête, résultats compris."""
+    import statistics
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def normalize_sql(sql):
+    """Forme canonique d'une requête : littéraux remplacés par ?, espaces réduits."""
+    sql = re.sub(r"'(?:[^']|'')*'", "?", sql)
+    sql = re.sub(r"\b\d+(?:\.\d+)?\b", "?", sql)
+    sql = re.sub(r"\(\s*\?(?:\s*,\s*\?)*\s*\)", "(?)", sql)
+    return re.sub(r"\s+", " ", sql).strip().rstrip(";")
+
+
+class QueryProfiler:
+    """Profileur de requêtes SQLite (opt-in).
+
+    Deux modes de mesure :
+    - connexions créées par profiler.connect() (ou SQLiteHelper.enable_profiler) :
+      chaque execute et chaque lecture de résultats est chronométrée, la
+      latence inclut donc le fetch et les lignes renvoyées sont comptées ;
+    - profiler.attach(conn) sur une connexion existante (celle d'un notebook) :
+      set_trace_callback marque le début de chaque requête et
+      set_progress_handler, appelé toutes les ATTACH_PROGRESS_STEP
+      instructions, sa dernière activité : la latence va du début à la
+      dernière instruction exécutée, hors lecture des résultats par Python,
+      et les lignes ne sont pas connues. Une requête sans aucun tick
+      (attach avec un pas plus grand) est comptée dans `non_mesurees` du
+      rapport, sans entrer dans les percentiles.
+    Les compteurs d'instructions de la machine virtuelle SQLite (progress
+    handler) sont relevés dans les deux modes. La requête en cours est
+    suivie par thread : plusieurs threads peuvent partager le profileur.
+    """
+
+    def __init__(self, progress_step=1000):
+        self.progress_step = progress_step
+        self.samples = []
+        self._local = threading.local()
+
+    def _start(self, sql, latency=0.0):
+        # échantillon : [requête normalisée, latence (s), lignes, instructions VM]
+        sample = [normalize_sql(sql), latency, 0, 0]
+        self.samples.append(sample)
+        self._local.current = sample
+        return sample
+
+    def _on_progress(self, step=None):
+        sample = getattr(self._local, "current", None)
+        if sample is not None:
+            sample[3] += step or self.progress_step
+            self._local.last_tick = time.perf_counter()
+        return 0
+
+    def _on_trace(self, sql):
+        now = time.perf_counter()
+        self._close_traced()
+        if not sql.startswith("--"):  # "-- TRIGGER ..." : sous-requêtes de trigger
+            self._start(sql, float("nan"))
+            self._local.traced_start = self._local.last_tick = now
+
+    def _close_traced(self):
+        """Latence de la requête tracée du thread courant : jusqu'au dernier tick du progress handler."""
+        start = getattr(self._local, "traced_start", None)
+        if start is None:
+            return
+        self._local.traced_start = None
+        if self._local.last_tick > start:
+            self._local.current[1] = self._local.last_tick - start
+
+    def connect(self, database, **kwargs):
+        """sqlite3.connect() dont les requêtes sont mesurées par ce profileur."""
+        conn = sqlite3.connect(database, factory=_ProfiledConnection, **kwargs)
+        conn.profiler = self
+        conn.set_progress_handler(self._on_progress, self.progress_step)
+        return conn
+
+    def attach(self, conn, progress_step=ATTACH_PROGRESS_STEP):
+        """Profile une connexion existante via set_trace_callback / set_progress_handler."""
+        conn.set_trace_callback(self._on_trace)
+        conn.set_progress_handler(lambda: self._on_progress(progress_step), progress_step)
+        return conn
+
+    def detach(self, conn):
+        self._close_traced()
+        conn.set_trace_callback(None)
+        conn.set_progress_handler(None, self.progress_step)
+
+    def reset(self):
+        self.samples = []
+        self._local = threading.local()
+
+    def report(self, top=20):
+        """Top-N des requêtes normalisées par temps total : nombre, p50/p95/p99 (ms), lignes."""
+        import pandas as pd
+        self._close_traced()
+        columns = ["requete", "latence_s", "lignes", "instructions_vm"]
+        samples = pd.DataFrame([sample[:4] for sample in self.samples], columns=columns)
+        if samples.empty:
+            return pd.DataFrame(columns=["requete", "appels", "total_ms", "p50_ms", "p95_ms", "p99_ms",
+                                         "lignes_total", "lignes_moyenne", "instructions_vm", "non_mesurees"])
+        latence_ms = samples["latence_s"] * 1000
+        grouped = latence_ms.groupby(samples["requete"])
+        report = pd.DataFrame({
+            "appels": grouped.size(),
+            "total_ms": grouped.sum(),
+            "p50_ms": grouped.quantile(0.50),
+            "p95_ms": grouped.quantile(0.95),
+            "p99_ms": grouped.quantile(0.99),
+            "lignes_total": samples.groupby("requete")["lignes"].sum(),
+            "lignes_moyenne": samples.groupby("requete")["lignes"].mean(),
+            "instructions_vm": samples.groupby("requete")["instructions_vm"].sum(),
+            "non_mesurees": latence_ms.isna().groupby(samples["requete"]).sum(),
+        })
+        report = report.sort_values("total_ms", ascending=False).head(top).round(3)
+        return report.reset_index()
+
+
+class _ProfiledCursor(sqlite3.Cursor):
+    """Curseur qui chronomètre execute et la lecture des résultats."""
+
+    _sample = None
+
+    def _timed(self, method, *args):
+        profiler = self.connection.profiler
+        start = time.perf_counter()
+        if method in ("execute", "executemany"):
+            self._sample = profiler._start(args[0])
+        result = getattr(super(), method)(*args)
+        sample = self._sample
+        if sample is not None:
+            sample[1] += time.perf_counter() - start
+            if method == "executemany":
+                sample[2] += max(self.rowcount, 0)
+            elif method == "fetchone":
+                sample[2] += result is not None
+            elif method in ("fetchmany", "fetchall"):
+                sample[2] += len(result)
+        return result
+
+    def execute(self, sql, parameters=()):
+        return self._timed("execute", sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._timed("executemany", sql, seq_of_parameters)
+
+    def fetchone(self):
+        return self._timed("fetchone")
+
+    def fetchmany(self, size=None):
+        return self._timed("fetchmany", self.arraysize if size is None else size)
+
+    def fetchall(self):
+        return self._timed("fetchall")
+
+    def __next__(self):
+        row = self.fetchone()
+        if row is None:
+            raise StopIteration
+        return row
+
+
+class _ProfiledConnection(sqlite3.Connection):
+    """Connexion dont tous les curseurs sont des _ProfiledCursor."""
+
+    profiler = None
+
+    def cursor(self, factory=_ProfiledCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def _cache_sql(sql):
+    """Clé de cache d'une requête : espaces réduits hors chaînes, littéraux conservés."""
+    sql = re.sub(r"('(?:[^']|'')*')|\s+", lambda m: m.group(1) or " ", sql)
+    return sql.strip().rstrip(";").rstrip()
+
+
+def _cache_params(params):
+    if isinstance(params, dict):
+        return tuple(sorted(params.items()))
+    return tuple(params)
+
+
+def _rows_size(rows):
+    """Taille approximative (octets) d'une liste de lignes : tuples et valeurs."""
+    size = sys.getsizeof(rows)
+    for row in rows:
+        size += sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row)
+    return size
+
+
+class QueryCache:
+    """Cache LRU + TTL de résultats de SELECT, borné en entrées et en octets.
+
+    Clé : requête (espaces normalisés) + paramètres. Une entrée expire après
+    `ttl` secondes ; au-delà de `max_entries` ou de `max_bytes`, les entrées
+    les moins récemment lues sont évincées. Le cache est vidé par
+    SQLiteHelper à chaque écriture passant par le helper, et dès que
+    `PRAGMA data_version` (commits d'autres connexions) ou `total_changes`
+    (écritures directes sur la connexion du helper) change.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 2**20, ttl=60):
+        from collections import OrderedDict
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # clé -> (expiration, octets, lignes)
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                self._drop(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key, rows):
+        size = _rows_size(rows)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, rows)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, key):
+        self.bytes -= self._entries.pop(key)[1]
+
+    def clear(self):
+        with self._lock:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        lectures = self.hits + self.misses
+        return {
+            "entrees": len(self._entries),
+            "octets": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "taux_hit": round(self.hits / lectures, 3) if lectures else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
 class SQLiteHelper:
     def __init__(self):
         self.success_style = """
@@ -39,6 +494,16 @@ class SQLiteHelper:
         </div>
         """
         self.db_name = "entreprise.db"
+        # Une connexion (et un curseur) par thread, réutilisée d'un appel à l'autre
+        self._local = threading.local()
+        # Profil PRAGMA appliqué à chaque connexion (voir configure)
+        self.profile = None
+        # QueryProfiler actif (voir enable_profiler)
+        self.profiler = None
+        # QueryCache de cached_query (voir enable_cache)
+        self.cache = None
+        # Snapshots gardés en mémoire : nom -> (connexion :memory:, date)
+        self._snapshots = {}
         
         # Base de données des aides cachées
         self.helps = {
@@ -187,6 +652,7 @@ print("🔒 N'oubliez pas: conn.close() pour fermer la connexion")""",
             print(f"❌ Aide non trouvée pour l'étape {step}")
             return
             
+        from IPython.display import HTML, display
         help_data = self.helps[step]
         
         # Conseil caché
@@ -218,6 +684,7 @@ print("🔒 N'oubliez pas: conn.close() pour fermer la connexion")""",
         display(HTML(html_solution))
     
     def solution(self, code, explanation=""):
+        from IPython.display import HTML, display
         html = f"""
         <details style="margin: 10px 0; border: 1px solid #ddd; border-radius: 5px; padding: 5px;">
             <summary style="cursor: pointer; background: #e3f2fd; padding: 10px; border-radius: 3px; font-weight: bold;">
@@ -232,6 +699,7 @@ print("🔒 N'oubliez pas: conn.close() pour fermer la connexion")""",
         display(HTML(html))
     
     def hint(self, text):
+        from IPython.display import HTML, display
         html = f"""
         <details style="margin: 10px 0; border: 1px solid #ddd; border-radius: 5px; padding: 5px;">
             <summary style="cursor: pointer; background: #e3f2fd; padding: 10px; border-radius: 3px; font-weight: bold;">
@@ -245,35 +713,850 @@ print("🔒 N'oubliez pas: conn.close() pour fermer la connexion")""",
         display(HTML(html))
     
     def success(self, message):
+        from IPython.display import HTML, display
         html = self.success_style.format(message=message)
         display(HTML(html))
         
+    def _db_identity(self):
+        """Identifie le fichier de base : chemin absolu, périphérique et inode."""
+        path = os.path.abspath(self.db_name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return path, None, None
+        return path, stat.st_dev, stat.st_ino
+
+    def get_connection(self):
+        """Connexion SQLite du thread courant, ouverte une seule fois puis réutilisée.
+
+        Si le fichier est supprimé, remplacé (autre inode) ou si db_name
+        change, la connexion est rouverte automatiquement. Les requêtes
+        préparées restent en cache (cached_statements) tant qu'elle vit.
+        """
+        local = self._local
+        conn = getattr(local, 'conn', None)
+        if conn is not None and local.identity == self._db_identity():
+            return conn
+        self.close_connection()
+        if self.profiler:
+            conn = self.profiler.connect(self.db_name, cached_statements=CACHED_STATEMENTS)
+        else:
+            conn = sqlite3.connect(self.db_name, cached_statements=CACHED_STATEMENTS)
+        if self.profile:
+            self._apply_profile(conn)
+        local.conn = conn
+        local.cursor = conn.cursor()
+        local.identity = self._db_identity()
+        # Nouvelle connexion (peut-être un autre fichier) : résultats en cache douteux
+        local.cache_version = None
+        self._invalidate_cache()
+        return conn
+
+    def close_connection(self):
+        """Ferme la connexion du thread courant (rouverte au prochain appel)."""
+        local = self._local
+        conn = getattr(local, 'conn', None)
+        local.conn = local.cursor = local.identity = None
+        if conn is not None:
+            conn.close()
+
+    def _query(self, sql, params=(), one=False):
+        """Exécute une lecture avec le curseur réutilisé du thread courant."""
+        self.get_connection()
+        cursor = self._local.cursor
+        cursor.execute(sql, params)
+        return cursor.fetchone() if one else cursor.fetchall()
+
+    def enable_cache(self, max_entries=1024, max_bytes=64 * 2**20, ttl=60):
+        """Active le cache de résultats de cached_query ; retourne le QueryCache.
+
+        max_bytes borne la mémoire occupée par les résultats (estimée avec
+        sys.getsizeof), ttl leur durée de vie en secondes.
+        """
+        self.cache = QueryCache(max_entries, max_bytes, ttl)
+        return self.cache
+
+    def disable_cache(self):
+        self.cache = None
+
+    def cache_stats(self):
+        """Compteurs du cache : entrées, octets, hits, misses, évictions, expirations, invalidations."""
+        if self.cache is None:
+            raise ValueError("Cache inactif: appelez enable_cache() d'abord")
+        return self.cache.stats()
+
+    def _invalidate_cache(self):
+        if self.cache is not None:
+            self.cache.clear()
+
+    def _check_cache_version(self, conn):
+        """Vide le cache si la base a changé depuis la dernière lecture de ce thread.
+
+        data_version change quand une autre connexion valide une écriture
+        (dont le `conn` ouvert dans le notebook, qui est une connexion
+        distincte : ses commits ne sont vus qu'ainsi), total_changes quand
+        la connexion du helper écrit elle-même sans passer par
+        execute_write (get_connection().execute(...)).
+        """
+        version = (conn.execute("PRAGMA data_version").fetchone()[0], conn.total_changes)
+        local = self._local
+        if local.cache_version is not None and local.cache_version != version:
+            self._invalidate_cache()
+        local.cache_version = version
+
+    def cached_query(self, sql, params=(), one=False):
+        """SELECT servi par le cache de résultats (voir enable_cache).
+
+        Sans cache actif, équivaut à une lecture directe. Les lignes sont
+        mises en cache par requête + paramètres ; chaque appel ne coûte
+        qu'un PRAGMA data_version quand le résultat est déjà connu.
+        """
+        if self.cache is None:
+            return self._query(sql, params, one)
+        if not re.match(r"\s*(SELECT|WITH)\b", sql, re.IGNORECASE):
+            raise ValueError("cached_query n'accepte que des lectures (SELECT / WITH): utilisez execute_write")
+        self._check_cache_version(self.get_connection())
+        key = (_cache_sql(sql), _cache_params(params))
+        rows = self.cache.get(key)
+        if rows is None:
+            rows = tuple(self._query(sql, params))
+            self.cache.put(key, rows)
+        if one:
+            return rows[0] if rows else None
+        return list(rows)
+
+    def execute_write(self, sql, params=(), many=False):
+        """Écriture validée (INSERT / UPDATE / DELETE / DDL) qui vide le cache ; retourne rowcount."""
+        conn = self.get_connection()
+        with conn:
+            cursor = conn.executemany(sql, params) if many else conn.execute(sql, params)
+        self._invalidate_cache()
+        return cursor.rowcount
+
+    def enable_profiler(self, progress_step=1000):
+        """Active le profilage des requêtes passant par la connexion du helper.
+
+        Retourne le QueryProfiler : profiler.attach(conn) profile aussi la
+        connexion `conn` ouverte dans le notebook (solutions 4.2.2, 4.3.x).
+        """
+        self.profiler = QueryProfiler(progress_step)
+        self.close_connection()
+        return self.profiler
+
+    def disable_profiler(self):
+        self.profiler = None
+        self.close_connection()
+
+    def profile_report(self, top=20):
+        """Top-N des requêtes profilées (DataFrame), voir QueryProfiler.report."""
+        if self.profiler is None:
+            raise ValueError("Profileur inactif: appelez enable_profiler() d'abord")
+        return self.profiler.report(top)
+
+    def _apply_profile(self, conn, rebuild=False):
+        """Applique les PRAGMA du profil courant à une connexion.
+
+        page_size ne change que sur une base vide, ou avec rebuild=True
+        (VACUUM, qui réécrit tout le fichier) : WAL interdit ce changement,
+        la base repasse donc brièvement en journal DELETE.
+        """
+        settings = PRAGMA_PROFILES[self.profile]
+        page_size = settings["page_size"]
+        if conn.execute("PRAGMA page_size").fetchone()[0] != page_size:
+            empty = conn.execute("PRAGMA page_count").fetchone()[0] == 0
+            if empty or rebuild:
+                conn.execute("PRAGMA journal_mode=DELETE")
+                conn.execute(f"PRAGMA page_size={page_size}")
+                if not empty:
+                    conn.execute("VACUUM")
+        for name, value in settings.items():
+            if name != "page_size":
+                conn.execute(f"PRAGMA {name}={value}")
+
+    def configure(self, profile="read-heavy", rebuild=False, verbose=True):
+        """Règle la base avec un profil PRAGMA ("read-heavy", "bulk-load" ou "durable").
+
+        Le profil est gardé et réappliqué à chaque nouvelle connexion.
+        Retourne le rapport de vérification (voir pragma_report).
+        """
+        if profile not in PRAGMA_PROFILES:
+            raise ValueError(f"Profil inconnu: {profile!r} ({', '.join(PRAGMA_PROFILES)})")
+        self.profile = profile
+        self._apply_profile(self.get_connection(), rebuild=rebuild)
+        report = self.pragma_report()
+        if verbose:
+            ok = int(report["ok"].sum())
+            print(f"⚙️ Profil '{profile}' appliqué à {self.db_name}: {ok}/{len(report)} PRAGMA vérifiés")
+            for row in report[~report["ok"]].itertuples():
+                print(f"  ⚠️ {row.pragma}: demandé {row.demande}, obtenu {row.obtenu}")
+            if not report.loc[report["pragma"] == "page_size", "ok"].all():
+                print("  💡 page_size ne change qu'avec configure(..., rebuild=True) (VACUUM)")
+        return report
+
+    def pragma_report(self):
+        """Relit chaque PRAGMA du profil et le compare à la valeur demandée."""
+        import pandas as pd
+        if not self.profile:
+            raise ValueError("Aucun profil configuré: appelez configure() d'abord")
+        conn = self.get_connection()
+        rows = []
+        for name, wanted in PRAGMA_PROFILES[self.profile].items():
+            actual = conn.execute(f"PRAGMA {name}").fetchone()[0]
+            expected = _PRAGMA_CODES.get(name, {}).get(str(wanted).upper(), wanted)
+            if isinstance(actual, str):
+                ok = actual.lower() == str(expected).lower()
+            else:
+                ok = actual == expected
+            rows.append({"pragma": name, "demande": wanted, "obtenu": actual, "ok": ok})
+        return pd.DataFrame(rows)
+
+    def benchmark_profiles(self, rows=100_000, commits=500, lookups=2_000, profiles=None):
+        """Compare les profils PRAGMA sur une base jetable (entreprise.db n'est pas touchée).
+
+        Mesure pour chaque profil : une insertion groupée de `rows` employés,
+        `commits` petites transactions, des agrégats par département et des
+        lectures ponctuelles par id. Retourne un DataFrame (secondes).
+        """
+        import tempfile
+        import pandas as pd
+        rng = random.Random(0)
+        departements = ['IT', 'RH', 'Finance', 'Marketing', 'Ventes']
+        employes = [
+            (f"Employé {i}", rng.choice(departements), rng.randint(30000, 80000),
+             (datetime(2015, 1, 1) + timedelta(days=rng.randint(0, 3650))).strftime('%Y-%m-%d'))
+            for i in range(rows)
+        ]
+        results = []
+        for profile in profiles or PRAGMA_PROFILES:
+            with tempfile.TemporaryDirectory(prefix="sqlite_bench_") as tmp:
+                bench = SQLiteHelper()
+                bench.db_name = os.path.join(tmp, "bench.db")
+                bench.configure(profile, verbose=False)
+                conn = bench.get_connection()
+                conn.execute('''
+                    CREATE TABLE employes (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        nom TEXT NOT NULL,
+                        departement TEXT NOT NULL,
+                        salaire REAL NOT NULL,
+                        date_embauche DATE
+                    )
+                ''')
+                insert = "INSERT INTO employes (nom, departement, salaire, date_embauche) VALUES (?, ?, ?, ?)"
+                mesures = {"profil": profile}
+
+                start = time.perf_counter()
+                conn.executemany(insert, employes)
+                conn.commit()
+                mesures["insertion_groupee_s"] = time.perf_counter() - start
+
+                start = time.perf_counter()
+                for employe in employes[:commits]:
+                    conn.execute(insert, employe)
+                    conn.commit()
+                mesures["petites_transactions_s"] = time.perf_counter() - start
+
+                start = time.perf_counter()
+                for _ in range(5):
+                    conn.execute(
+                        "SELECT departement, AVG(salaire), COUNT(*) FROM employes GROUP BY departement"
+                    ).fetchall()
+                mesures["agregats_s"] = time.perf_counter() - start
+
+                start = time.perf_counter()
+                for _ in range(lookups):
+                    conn.execute("SELECT * FROM employes WHERE id = ?", (rng.randint(1, rows),)).fetchone()
+                mesures["lectures_ponctuelles_s"] = time.perf_counter() - start
+
+                bench.close_connection()
+                results.append(mesures)
+        return pd.DataFrame(results).set_index("profil").round(4)
+
+    def bulk_load(self, df, table, chunksize=100_000, if_exists="append", rebuild_indexes=True,
+                  verbose=True):
+        """Charge un DataFrame (ou un itérable de DataFrames) dans une table, en une transaction.
+
+        Les lignes sont envoyées par INSERT multi-VALUES (jusqu'à
+        BULK_ROWS_PER_STATEMENT lignes par requête), deux fois plus rapide
+        qu'executemany ligne à ligne. La table est créée si besoin ;
+        if_exists="replace" la recrée, "fail" refuse une table existante. Les
+        index de la table sont supprimés pendant le chargement puis
+        reconstruits une seule fois. Retourne un rapport (lignes, durée,
+        lignes/s). Combiné au profil configure("bulk-load") pour un maximum
+        de débit.
+        """
+        import itertools
+        import pandas as pd
+        if if_exists not in ("append", "replace", "fail"):
+            raise ValueError(f"if_exists invalide: {if_exists!r} (append, replace ou fail)")
+        if isinstance(df, pd.DataFrame):
+            chunks = (df.iloc[i:i + chunksize] for i in range(0, len(df), chunksize))
+        else:
+            chunks = iter(df)
+
+        start = time.perf_counter()
+        conn = self.get_connection()
+        if conn.in_transaction:
+            conn.commit()
+        conn.execute("BEGIN IMMEDIATE")
+        rows = 0
+        indexes = []
+        try:
+            exists = self._query("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?",
+                                 (table,), one=True) is not None
+            if exists and if_exists == "fail":
+                raise ValueError(f"La table {table!r} existe déjà")
+            if exists and if_exists == "replace":
+                conn.execute(f"DROP TABLE {_quote(table)}")
+                self._forget_stats(table)
+                exists = False
+            if exists and rebuild_indexes:
+                indexes = self._query("SELECT name, sql FROM sqlite_master "
+                                      "WHERE type='index' AND tbl_name=? AND sql IS NOT NULL", (table,))
+                for name, _ in indexes:
+                    conn.execute(f"DROP INDEX {_quote(name)}")
+            # Les triggers de statistiques coûteraient une mise à jour par ligne :
+            # ils sont retirés pendant le chargement et le compteur ajusté en une fois
+            stats_triggers = self._query(
+                "SELECT name, sql FROM sqlite_master WHERE type='trigger' AND tbl_name=? AND name GLOB ?",
+                (table, STATS_TABLE + "_*")
+            ) if exists else []
+            for name, _ in stats_triggers:
+                conn.execute(f"DROP TRIGGER {_quote(name)}")
+
+            statement = None
+            columns = None
+            for chunk in chunks:
+                if chunk.empty:
+                    continue
+                if columns is None:
+                    columns = list(chunk.columns)
+                elif list(chunk.columns) != columns:
+                    # Les valeurs sont liées par position : aligner sur les colonnes du premier bloc
+                    if set(chunk.columns) != set(columns):
+                        raise ValueError(
+                            f"Colonnes du bloc différentes du premier bloc : {list(chunk.columns)} "
+                            f"au lieu de {columns}"
+                        )
+                    chunk = chunk[columns]
+                if not exists:
+                    definition = ", ".join(f"{_quote(c)} {_sql_type(chunk[c].dtype)}" for c in columns)
+                    conn.execute(f"CREATE TABLE {_quote(table)} ({definition})")
+                    exists = True
+                placeholder = "(" + ", ".join("?" * len(columns)) + ")"
+                if statement is None:
+                    per_statement = max(1, min(BULK_ROWS_PER_STATEMENT, _max_variables(conn) // len(columns)))
+                    head = f"INSERT INTO {_quote(table)} ({', '.join(_quote(c) for c in columns)}) VALUES "
+                    statement = head + ", ".join([placeholder] * per_statement)
+                    step = per_statement * len(columns)
+                values = list(itertools.chain.from_iterable(
+                    zip(*(_column_values(chunk[c]) for c in columns))
+                ))
+                full = len(values) // step * step
+                cursor = conn.cursor()
+                for i in range(0, full, step):
+                    cursor.execute(statement, values[i:i + step])
+                if full < len(values):
+                    tail = (len(values) - full) // len(columns)
+                    cursor.execute(head + ", ".join([placeholder] * tail), values[full:])
+                rows += len(chunk)
+
+            for _, sql in indexes:
+                conn.execute(sql)
+            for _, sql in stats_triggers:
+                conn.execute(sql)
+            if stats_triggers:
+                conn.execute(f"UPDATE {STATS_TABLE} SET row_count = row_count + ?, "
+                             "modifications = modifications + ? WHERE table_name = ?", (rows, rows, table))
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self._invalidate_cache()
+
+        duree = time.perf_counter() - start
+        report = {
+            "table": table,
+            "lignes": rows,
+            "duree_s": round(duree, 3),
+            "lignes_par_s": round(rows / duree) if duree else None,
+            "index_reconstruits": [name for name, _ in indexes],
+        }
+        if verbose:
+            print(f"📥 {rows} lignes chargées dans '{table}' en {duree:.2f}s "
+                  f"({report['lignes_par_s']} lignes/s)")
+        return report
+
+    def load_etl_outputs(self, data_dir="data_etl", chunksize=100_000, if_exists="replace"):
+        """Charge ventes_clean.csv et clients_clean.csv (module 3) dans les tables ventes et clients."""
+        import pandas as pd
+        reports = []
+        for name, table in (("ventes_clean.csv", "ventes"), ("clients_clean.csv", "clients")):
+            chunks = pd.read_csv(os.path.join(data_dir, name), chunksize=chunksize)
+            reports.append(self.bulk_load(chunks, table, chunksize, if_exists=if_exists))
+        return reports
+
+    def iter_columns(self, sql, params=(), chunksize=100_000, format="numpy"):
+        """Résultats d'un SELECT par blocs de `chunksize` lignes, colonne par colonne.
+
+        format="numpy" : chaque bloc est un dict {colonne: np.ndarray}
+        (int64, float64 avec NaN pour NULL, objets pour le texte) ;
+        format="arrow" : chaque bloc est un pa.RecordBatch. Seul un bloc de
+        tuples existe à la fois : fetchall() garderait tout le résultat.
+        """
+        from operator import itemgetter
+        if format not in ("numpy", "arrow"):
+            raise ValueError(f"format invalide: {format!r} (numpy ou arrow)")
+        if format == "arrow":
+            import pyarrow as pa
+        cursor = self.get_connection().cursor()
+        cursor.execute(sql, params)
+        names = [col[0] for col in cursor.description]
+        getters = [itemgetter(i) for i in range(len(names))]
+        try:
+            while True:
+                rows = cursor.fetchmany(chunksize)
+                if not rows:
+                    break
+                if format == "numpy":
+                    yield {name: _numpy_column(list(map(get, rows))) for name, get in zip(names, getters)}
+                else:
+                    arrays = [_arrow_column(list(map(get, rows))) for get in getters]
+                    yield pa.RecordBatch.from_arrays(arrays, names=names)
+        finally:
+            cursor.close()
+
+    def query_columns(self, sql, params=(), chunksize=100_000, format="numpy"):
+        """Résultat complet d'un SELECT en colonnes, sans passer par une liste de tuples.
+
+        Retourne un dict {colonne: np.ndarray} (format="numpy") ou une
+        pa.Table (format="arrow") ; pd.DataFrame(colonnes) ou
+        table.to_pandas() en font un DataFrame. Voir iter_columns.
+        """
+        import numpy as np
+        chunks = list(self.iter_columns(sql, params, chunksize, format))
+        if format == "arrow":
+            import pyarrow as pa
+            if not chunks:
+                names = [col[0] for col in self.get_connection().execute(sql, params).description]
+                return pa.table({name: pa.array([], type=pa.null()) for name in names})
+            # Un bloc sans décimales ou sans valeurs ne doit pas figer le type de la colonne
+            return pa.concat_tables([pa.Table.from_batches([b]) for b in chunks],
+                                    promote_options="permissive")
+        if not chunks:
+            names = [col[0] for col in self.get_connection().execute(sql, params).description]
+            return {name: np.array([], dtype=object) for name in names}
+        return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
+
+    def benchmark_fetch(self, rows=10_000_000, chunksize=100_000, memory=False):
+        """Compare la lecture d'une grande table en DataFrame (base jetable).
+
+        Méthodes : fetchall + pd.DataFrame, pd.read_sql, query_columns
+        (NumPy puis pd.DataFrame, Arrow puis to_pandas). La table de `rows`
+        employés est générée par SQLite lui-même. memory=True ajoute le pic
+        d'allocation mesuré par tracemalloc (passe supplémentaire, plus lente).
+        Retourne un DataFrame (secondes, lignes/s, pic en Mo).
+        """
+        import gc
+        import tempfile
+        import tracemalloc
+        import pandas as pd
+        sql = "SELECT * FROM employes"
+        with tempfile.TemporaryDirectory(prefix="sqlite_fetch_") as tmp:
+            bench = SQLiteHelper()
+            bench.db_name = os.path.join(tmp, "bench.db")
+            bench.configure("bulk-load", verbose=False)
+            conn = bench.get_connection()
+            with conn:
+                conn.execute('''
+                    CREATE TABLE employes (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        nom TEXT NOT NULL,
+                        departement TEXT NOT NULL,
+                        salaire REAL NOT NULL,
+                        date_embauche DATE
+                    )
+                ''')
+                conn.execute('''
+                    WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?)
+                    INSERT INTO employes (nom, departement, salaire, date_embauche)
+                    SELECT 'Employé ' || i,
+                           CASE i % 5 WHEN 0 THEN 'IT' WHEN 1 THEN 'RH' WHEN 2 THEN 'Finance'
+                                      WHEN 3 THEN 'Marketing' ELSE 'Ventes' END,
+                           30000 + abs(random() % 5000000) / 100.0,
+                           date('2015-01-01', '+' || (i % 3650) || ' days')
+                    FROM n
+                ''', (rows,))
+
+            def fetchall_dataframe():
+                cursor = conn.execute(sql)
+                return pd.DataFrame(cursor.fetchall(), columns=[col[0] for col in cursor.description])
+
+            methods = {
+                "fetchall + DataFrame": fetchall_dataframe,
+                "pd.read_sql": lambda: pd.read_sql(sql, conn),
+                "query_columns numpy": lambda: pd.DataFrame(bench.query_columns(sql, chunksize=chunksize)),
+                "query_columns arrow": lambda: bench.query_columns(sql, chunksize=chunksize,
+                                                                   format="arrow").to_pandas(),
+            }
+            results = []
+            for name, method in methods.items():
+                gc.collect()
+                start = time.perf_counter()
+                df = method()
+                duree = time.perf_counter() - start
+                mesures = {"methode": name, "lignes": len(df), "duree_s": duree,
+                           "lignes_par_s": round(len(df) / duree)}
+                del df
+                if memory:
+                    gc.collect()
+                    tracemalloc.start()
+                    method()
+                    mesures["pic_mo"] = tracemalloc.get_traced_memory()[1] / 2**20
+                    tracemalloc.stop()
+                results.append(mesures)
+            bench.close_connection()
+        return pd.DataFrame(results).set_index("methode").round(3)
+
+    def _snapshot_dir(self):
+        return os.path.splitext(os.path.abspath(self.db_name))[0] + ".snapshots"
+
+    def snapshot(self, name=None, memory=False, pages=SNAPSHOT_PAGES, overwrite=False, verbose=True):
+        """Sauvegarde à chaud de la base via sqlite3.Connection.backup.
+
+        La copie avance par étapes de `pages` pages : les lecteurs (et, en
+        WAL, les écrivains) continuent entre deux étapes. Le snapshot est
+        écrit dans <base>.snapshots/<name>.db, ou gardé en mémoire avec
+        memory=True (restauration la plus rapide, perdu à la fin du
+        processus). Le nom par défaut est l'horodatage à la microseconde ;
+        un nom déjà pris n'est remplacé qu'avec overwrite=True. Retourne le
+        nom du snapshot.
+        """
+        if name is None:
+            name = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+            base, suffix = name, 1
+            while name in self.list_snapshots():
+                name = f"{base}-{suffix}"
+                suffix += 1
+        elif not overwrite and name in self.list_snapshots():
+            raise ValueError(f"Le snapshot {name!r} existe déjà (overwrite=True pour le remplacer)")
+        if memory:
+            target = sqlite3.connect(":memory:", check_same_thread=False)
+        else:
+            os.makedirs(self._snapshot_dir(), exist_ok=True)
+            path = os.path.join(self._snapshot_dir(), name + ".db")
+            if os.path.exists(path):
+                os.remove(path)
+            target = sqlite3.connect(path)
+        start = time.perf_counter()
+        try:
+            self.get_connection().backup(target, pages=pages)
+        except BaseException:
+            target.close()
+            raise
+        if memory:
+            previous = self._snapshots.pop(name, None)
+            if previous is not None:
+                previous[0].close()
+            self._snapshots[name] = (target, time.time())
+        else:
+            target.close()
+        if verbose:
+            lieu = "en mémoire" if memory else path
+            print(f"📸 Snapshot '{name}' ({lieu}) en {time.perf_counter() - start:.2f}s")
+        return name
+
+    def list_snapshots(self):
+        """Noms des snapshots disponibles (mémoire et disque), du plus ancien au plus récent."""
+        dates = {name: date for name, (_, date) in self._snapshots.items()}
+        directory = self._snapshot_dir()
+        if os.path.isdir(directory):
+            for f in os.listdir(directory):
+                if f.endswith(".db") and f[:-3] not in dates:
+                    dates[f[:-3]] = os.path.getmtime(os.path.join(directory, f))
+        return sorted(dates, key=dates.get)
+
+    def restore(self, name=None, pages=-1, verbose=True):
+        """Remet la base dans l'état d'un snapshot (le plus récent par défaut).
+
+        La copie se fait dans le fichier en place, via la connexion du
+        helper : les autres connexions voient le nouvel état sans avoir à
+        rouvrir la base. Une transaction en cours est annulée. pages=-1
+        copie tout en une étape (le plus rapide).
+        """
+        if name is None:
+            snapshots = self.list_snapshots()
+            if not snapshots:
+                raise ValueError(f"Aucun snapshot pour {self.db_name}: appelez snapshot() d'abord")
+            name = snapshots[-1]
+        if name in self._snapshots:
+            source, owned = self._snapshots[name][0], False
+        else:
+            path = os.path.join(self._snapshot_dir(), name + ".db")
+            if not os.path.exists(path):
+                raise ValueError(f"Snapshot inconnu: {name!r}")
+            source, owned = sqlite3.connect(path), True
+        conn = self.get_connection()
+        if conn.in_transaction:
+            conn.rollback()
+        start = time.perf_counter()
+        try:
+            source.backup(conn, pages=pages)
+        finally:
+            if owned:
+                source.close()
+            self._invalidate_cache()
+        if verbose:
+            print(f"♻️ {self.db_name} restaurée depuis '{name}' en {time.perf_counter() - start:.2f}s")
+        return name
+
+    def _forget_stats(self, table):
+        """Oublie les statistiques d'une table supprimée (les triggers partent avec elle)."""
+        if self.check_table_exists(STATS_TABLE):
+            self.get_connection().execute(f"DELETE FROM {STATS_TABLE} WHERE table_name = ?", (table,))
+
+    def _stats_enabled(self, table):
+        """Vrai si les triggers de statistiques de la table existent (ils partent avec un DROP TABLE)."""
+        names = {f"{STATS_TABLE}_{table}_{event}" for event in ("insert", "delete", "update")}
+        found = self._query("SELECT name FROM sqlite_master WHERE type='trigger' AND tbl_name=?", (table,))
+        return names <= {name for (name,) in found}
+
+    def enable_stats(self, table):
+        """Active les statistiques d'une table : compteur de lignes tenu par triggers.
+
+        Un seul COUNT(*) initial ; ensuite chaque INSERT / DELETE met à jour
+        le compteur de la table annexe _helper_stats, et chaque modification
+        (UPDATE compris) incrémente le compteur de péremption.
+        """
+        if not self.check_table_exists(table):
+            raise ValueError(f"La table {table!r} n'existe pas")
+        conn = self.get_connection()
+        literal = "'" + table.replace("'", "''") + "'"
+        with conn:
+            conn.execute(f'''
+                CREATE TABLE IF NOT EXISTS {STATS_TABLE} (
+                    table_name TEXT PRIMARY KEY,
+                    row_count INTEGER NOT NULL,
+                    modifications INTEGER NOT NULL DEFAULT 0,
+                    analyzed_rows INTEGER,
+                    analyzed_at TEXT,
+                    columns TEXT
+                )
+            ''')
+            count = conn.execute(f"SELECT COUNT(*) FROM {_quote(table)}").fetchone()[0]
+            conn.execute(f"INSERT OR REPLACE INTO {STATS_TABLE} (table_name, row_count) VALUES (?, ?)",
+                         (table, count))
+            for event, delta in (("INSERT", "+ 1"), ("DELETE", "- 1"), ("UPDATE", "")):
+                name = _quote(f"{STATS_TABLE}_{table}_{event.lower()}")
+                conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+                conn.execute(f'''
+                    CREATE TRIGGER {name} AFTER {event} ON {_quote(table)}
+                    BEGIN
+                        UPDATE {STATS_TABLE}
+                        SET row_count = row_count {delta}, modifications = modifications + 1
+                        WHERE table_name = {literal};
+                    END
+                ''')
+
+    def refresh_stats(self, table):
+        """Recalcule min / max / nombre de valeurs distinctes par colonne (une passe) et lance ANALYZE."""
+        if not self.check_table_exists(STATS_TABLE) \
+                or self._query(f"SELECT 1 FROM {STATS_TABLE} WHERE table_name = ?", (table,), one=True) is None \
+                or not self._stats_enabled(table):
+            self.enable_stats(table)
+        conn = self.get_connection()
+        columns = [col[1] for col in self._query(f"PRAGMA table_info({_quote(table)})")]
+        aggregates = ", ".join(
+            f"MIN({_quote(c)}), MAX({_quote(c)}), COUNT(DISTINCT {_quote(c)})" for c in columns
+        )
+        row = conn.execute(f"SELECT COUNT(*), {aggregates} FROM {_quote(table)}").fetchone()
+        stats = {
+            c: {"min": row[1 + 3 * i], "max": row[2 + 3 * i], "distincts": row[3 + 3 * i]}
+            for i, c in enumerate(columns)
+        }
+        with conn:
+            conn.execute(f"ANALYZE {_quote(table)}")
+            conn.execute(
+                f"UPDATE {STATS_TABLE} SET row_count = ?, modifications = 0, analyzed_rows = ?, "
+                "analyzed_at = ?, columns = ? WHERE table_name = ?",
+                (row[0], row[0], datetime.now().isoformat(timespec="seconds"), json.dumps(stats), table)
+            )
+        return self.table_stats(table)
+
+    def table_stats(self, name, refresh=False):
+        """Statistiques d'une table en une lecture indexée, sans COUNT(*).
+
+        Retourne le nombre exact de lignes (compteur par triggers), les
+        min / max / distincts par colonne de la dernière analyse, le nombre de
+        modifications depuis et `perime` (plus de STATS_STALE_RATIO des lignes
+        modifiées, ou jamais analysée). Le premier appel sur une table active
+        les statistiques (un COUNT(*) unique), de même si ses triggers ont
+        disparu (table supprimée puis recréée) ; refresh=True relance l'analyse.
+        """
+        if refresh:
+            return self.refresh_stats(name)
+        row = None
+        if self.check_table_exists(STATS_TABLE):
+            row = self._query(f"SELECT row_count, modifications, analyzed_rows, analyzed_at, columns "
+                              f"FROM {STATS_TABLE} WHERE table_name = ?", (name,), one=True)
+        if row is None or not self._stats_enabled(name):
+            # Compteur absent ou plus tenu à jour : on recompte et recrée les triggers
+            self.enable_stats(name)
+            return self.table_stats(name)
+        row_count, modifications, analyzed_rows, analyzed_at, columns = row
+        perime = analyzed_at is None or modifications > STATS_STALE_RATIO * max(analyzed_rows or 0, 1)
+        return {
+            "table": name,
+            "lignes": row_count,
+            "colonnes": json.loads(columns) if columns else {},
+            "analyse_le": analyzed_at,
+            "modifications_depuis_analyse": modifications,
+            "perime": perime,
+        }
+
+    def row_estimate(self, table):
+        """Nombre de lignes sans écriture : (nombre, source).
+
+        Compteur exact des statistiques si ses triggers sont actifs
+        ("statistiques"), sinon estimation de sqlite_stat1 laissée par le
+        dernier ANALYZE ("sqlite_stat1"), et COUNT(*) seulement si aucune
+        statistique n'existe ("count").
+        """
+        if self.check_table_exists(STATS_TABLE) and self._stats_enabled(table):
+            row = self._query(f"SELECT row_count FROM {STATS_TABLE} WHERE table_name = ?", (table,), one=True)
+            if row is not None:
+                return row[0], "statistiques"
+        if self.check_table_exists("sqlite_stat1"):
+            # Premier entier de stat : lignes de la table (ou de l'index, autant)
+            row = self._query("SELECT stat FROM sqlite_stat1 WHERE tbl = ? LIMIT 1", (table,), one=True)
+            if row is not None:
+                return int(row[0].split()[0]), "sqlite_stat1"
+        return self._query(f"SELECT COUNT(*) FROM {_quote(table)}", one=True)[0], "count"
+
+    def _index_candidate(self, clauses, table, alias_names):
+        """Colonnes d'un index composite pour une table : égalités, puis tri ou plage, puis couverture."""
+        columns = [col[1] for col in self._query(f"PRAGMA table_info({_quote(table)})")]
+
+        def refs(text, pattern=r"(?:(\w+)\.)?(\w+)"):
+            found = []
+            for qualifier, name in re.findall(pattern, text):
+                if name in columns and (not qualifier or qualifier in alias_names) and name not in found:
+                    found.append(name)
+            return found
+
+        operand = r"(?:(\w+)\.)?(\w+)\s*"
+        equal = refs(clauses["where"], operand + r"(?:=|\bIN\b|\bIS\b)")
+        ranges = [c for c in refs(clauses["where"], operand + r"(?:<|>|\bBETWEEN\b|\bLIKE\b)")
+                  if c not in equal]
+        order = refs(clauses["group"]) or refs(clauses["order"])
+        if not order and clauses["distinct"]:
+            order = refs(clauses["select"])
+        index = list(equal)
+        for column in (order or ranges[:1]):
+            if column not in index:
+                index.append(column)
+        if not index:
+            return []
+        selected = refs(clauses["select"])
+        if "*" not in clauses["select"] and len(set(index) | set(selected)) <= 6:
+            index += [c for c in selected if c not in index]
+        return index
+
+    def advise_indexes(self, queries, repeat=5, apply=False):
+        """Conseille des index pour une charge de requêtes et mesure leur effet.
+
+        Chaque requête (texte SQL ou couple (sql, paramètres)) passe par
+        EXPLAIN QUERY PLAN : scans complets, index automatiques et tris en
+        B-tree temporaire donnent un index composite proposé (colonnes
+        d'égalité, puis de tri ou de plage, puis colonnes lues pour le
+        rendre couvrant). Les requêtes sont chronométrées avant / après
+        création de tous les index proposés sur une copie jetable de la
+        base. apply=True crée ensuite sur la vraie base les index qui
+        accélèrent au moins une requête de 10 %. Retourne un DataFrame.
+        """
+        import tempfile
+        import pandas as pd
+        conn = self.get_connection()
+        workload = [(q, ()) if isinstance(q, str) else (q[0], tuple(q[1])) for q in queries]
+        existing = {tuple(col[2] for col in self._query(f"PRAGMA index_info({_quote(name)})"))
+                    for (name,) in self._query("SELECT name FROM sqlite_master WHERE type='index'")}
+
+        proposals = []
+        for sql, params in workload:
+            plan = conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+            issues = _plan_issues(plan)
+            clauses = _sql_clauses(sql)
+            indexes = []
+            tables = [alias for kind, alias, _ in issues if alias] or \
+                ([next(iter(clauses["aliases"]))] if clauses["aliases"] and issues else [])
+            for alias in tables:
+                table = clauses["aliases"].get(alias, alias)
+                names = {a for a, t in clauses["aliases"].items() if t == table}
+                columns = self._index_candidate(clauses, table, names)
+                if columns and tuple(columns) not in existing:
+                    name = "idx_" + "_".join([table] + columns)[:60]
+                    indexes.append(f"CREATE INDEX IF NOT EXISTS {_quote(name)} ON {_quote(table)} "
+                                   f"({', '.join(_quote(c) for c in columns)})")
+            proposals.append({"sql": sql, "params": params,
+                              "problemes": [detail for _, _, detail in issues], "index": indexes})
+
+        with tempfile.TemporaryDirectory(prefix="sqlite_advisor_") as tmp:
+            scratch = sqlite3.connect(os.path.join(tmp, "scratch.db"))
+            conn.backup(scratch)
+            for p in proposals:
+                p["avant"] = _time_query(scratch, p["sql"], p["params"], repeat)
+            for statement in dict.fromkeys(i for p in proposals for i in p["index"]):
+                scratch.execute(statement)
+            scratch.execute("ANALYZE")
+            scratch.commit()
+            for p in proposals:
+                p["apres"] = _time_query(scratch, p["sql"], p["params"], repeat)
+                plan = scratch.execute("EXPLAIN QUERY PLAN " + p["sql"], p["params"]).fetchall()
+                p["plan_apres"] = " | ".join(row[3] for row in plan)
+            scratch.close()
+
+        if apply:
+            gains = [i for p in proposals if p["apres"] and p["avant"] / p["apres"] >= 1.1 for i in p["index"]]
+            with conn:
+                for statement in dict.fromkeys(gains):
+                    conn.execute(statement)
+            if gains:
+                print(f"✅ {len(set(gains))} index créés sur {self.db_name}")
+
+        return pd.DataFrame([{
+            "requete": p["sql"],
+            "problemes": "; ".join(p["problemes"]) or "aucun",
+            "index_propose": "; ".join(p["index"]) or None,
+            "avant_ms": round(p["avant"] * 1000, 3),
+            "apres_ms": round(p["apres"] * 1000, 3),
+            "acceleration": round(p["avant"] / p["apres"], 1) if p["apres"] else None,
+            "plan_apres": p["plan_apres"],
+        } for p in proposals])
+
     def check_db_connection(self):
         """Vérifie la connexion à la base de données"""
         try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-            tables = cursor.fetchall()
-            conn.close()
-            return True, [table[0] for table in tables]
+            tables = self._query("SELECT name FROM sqlite_master WHERE type='table';")
+            # Tables internes masquées : statistiques du helper, sqlite_stat1 d'ANALYZE...
+            return True, [table[0] for table in tables
+                          if table[0] != STATS_TABLE and not table[0].startswith("sqlite_")]
         except Exception as e:
             return False, str(e)
     
     def check_table_exists(self, table_name):
         """Vérifie si une table existe"""
         try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?;", (table_name,))
-            result = cursor.fetchone()
-            conn.close()
+            result = self._query("SELECT name FROM sqlite_master WHERE type='table' AND name=?;",
+                                 (table_name,), one=True)
             return result is not None
         except Exception:
             return False
     
     def check_connection_button(self):
         """Bouton pour vérifier la connexion à la base"""
+        import ipywidgets as widgets
+        from IPython.display import display
         output = widgets.Output()
         button = widgets.Button(
             description="🔗 Vérifier Connexion",
@@ -300,6 +1583,8 @@ print("🔒 N'oubliez pas: conn.close() pour fermer la connexion")""",
     
     def check_table_button(self, table_name):
         """Bouton pour vérifier l'existence d'une table"""
+        import ipywidgets as widgets
+        from IPython.display import display
         output = widgets.Output()
         button = widgets.Button(
             description=f"📋 Vérifier {table_name}",
@@ -313,21 +1598,19 @@ print("🔒 N'oubliez pas: conn.close() pour fermer la connexion")""",
                 if self.check_table_exists(table_name):
                     print(f"✅ Table '{table_name}' existe")
                     
-                    # Compter les enregistrements
+                    # Compter les enregistrements sans écrire dans la base (voir row_estimate)
                     try:
-                        conn = sqlite3.connect(self.db_name)
-                        cursor = conn.cursor()
-                        cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-                        count = cursor.fetchone()[0]
-                        print(f"📊 {count} enregistrements")
+                        lignes, source = self.row_estimate(table_name)
+                        if source == "sqlite_stat1":
+                            print(f"📊 ≈{lignes} enregistrements (estimation du dernier ANALYZE)")
+                        else:
+                            print(f"📊 {lignes} enregistrements")
                         
                         # Montrer la structure
-                        cursor.execute(f"PRAGMA table_info({table_name})")
-                        columns = cursor.fetchall()
+                        columns = self._query(f"PRAGMA table_info({table_name})")
                         print("🏗️ Structure:")
                         for col in columns:
                             print(f"  - {col[1]} ({col[2]})")
-                        conn.close()
                     except Exception as e:
                         print(f"⚠️ Erreur lors de la vérification: {e}")
                 else:
@@ -338,10 +1621,24 @@ print("🔒 N'oubliez pas: conn.close() pour fermer la connexion")""",
 
 def load_sqlite_helper():
     """Charge le système d'aide SQLite."""
+    from IPython import get_ipython
     if 'sqlite_helper' not in get_ipython().user_ns:
         helper = SQLiteHelper()
         get_ipython().user_ns['sqlite_helper'] = helper
         print("🗄️ Système d'aide SQLite chargé !")
         print("✨ Prêt pour les bases de données relationnelles !")
     else:
-        print("✅ Le système d'aide SQLite est déjà chargé.")
\ No newline at end of file
+        print("✅ Le système d'aide SQLite est déjà chargé.")
+
+
+if __name__ == "__main__":
+    # Compatibilité avec exec(open('helpers/sqlite_helper.py').read()) :
+    # le notebook retrouve pd, np, widgets... dans son espace de noms
+    # (mais pas le __getattr__ paresseux, inutile hors d'un module)
+    del __getattr__
+    import ipywidgets as widgets
+    import pandas as pd
+    import numpy as np
+    from IPython.display import HTML, display
+    from IPython import get_ipython
+    load_sqlite_helper()